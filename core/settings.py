@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -61,6 +62,20 @@ LOGOUT_REDIRECT_URL = '/admin/login/'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Кэш задаётся окружением, например:
+#   DJANGO_CACHE_BACKEND=django.core.cache.backends.filebased.FileBasedCache
+#   DJANGO_CACHE_LOCATION=/var/tmp/hr-equipment-cache
+# При нескольких веб-процессах и командах импорта он должен быть общим (файлы,
+# Redis, memcached): сводка дашборда, сброшенная импортом, должна сбрасываться
+# во всех процессах. Без переменных — кэш Django по умолчанию (в памяти процесса).
+if os.environ.get('DJANGO_CACHE_BACKEND'):
+    CACHES = {
+        'default': {
+            'BACKEND': os.environ['DJANGO_CACHE_BACKEND'],
+            'LOCATION': os.environ.get('DJANGO_CACHE_LOCATION', ''),
+        }
+    }
+
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
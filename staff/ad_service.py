@@ -1,84 +1,271 @@
 # staff/ad_service.py
-from django.conf import settings
-from ldap3 import Server, Connection, Tls, MODIFY_REPLACE # type: ignore
+"""
+Запросы к AD (статус и разблокировка учётной записи, статусы всех
+учётных записей для sync_ad_status).
+
+Связанные (bind) LDAPS-соединения держатся в пуле процесса (LdapPool) и
+переиспользуются между запросами — без TLS-рукопожатия и bind на каждую
+проверку статуса. Соединение выдаётся одному потоку за раз; простаивавшее
+дольше HEALTH_CHECK_AFTER проверяется (Who am I), дольше IDLE_TIMEOUT —
+закрывается. Если соединение оборвалось посреди запроса, запрос один раз
+повторяется на новом.
+"""
+import logging
 import ssl
+import threading
+import time
+from contextlib import contextmanager
 from datetime import datetime, timezone
 
+from django.conf import settings
+from ldap3 import Server, Connection, Tls, MODIFY_REPLACE # type: ignore
+from ldap3.core.exceptions import LDAPBindError, LDAPCommunicationError, LDAPException # type: ignore
+
+POOL_SIZE = 4
+# Контроллер домена сам закрывает простаивающие соединения (MaxConnIdleTime, 15 минут)
+IDLE_TIMEOUT = 300
+HEALTH_CHECK_AFTER = 30
+# Сколько ждать свободного соединения, если все заняты
+ACQUIRE_TIMEOUT = 10
+CONNECT_TIMEOUT = 5
+RECEIVE_TIMEOUT = 10
+# Размер страницы постраничного поиска (MaxPageSize контроллера домена — 1000)
+PAGE_SIZE = 500
+USER_FILTER = '(&(objectCategory=person)(objectClass=user))'
+STATUS_ATTRIBUTES = ['sAMAccountName', 'userAccountControl', 'lockoutTime', 'displayName']
+
+logger = logging.getLogger(__name__)
+
+
+class PoolTimeoutError(LDAPException):
+    """Все соединения пула заняты дольше ACQUIRE_TIMEOUT"""
+
+
+class StaleConnectionError(LDAPCommunicationError):
+    """Оборвалось соединение, взятое из пула (а не только что открытое)"""
+
+
+# Ошибки, после которых отвечаем "Connection failed", как при неудачном подключении
+CONNECTION_ERRORS = (LDAPCommunicationError, LDAPBindError, PoolTimeoutError)
+
+
+class LdapPool:
+    """Пул связанных соединений ldap3 с одними параметрами подключения"""
+
+    def __init__(self, factory, size=POOL_SIZE, idle_timeout=IDLE_TIMEOUT):
+        self._factory = factory
+        self._idle_timeout = idle_timeout
+        self._idle = []  # (соединение, время возврата в пул), последним — самое свежее
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(size)
+
+    @contextmanager
+    def connection(self):
+        """Соединение для одного потока; при ошибке связи оно закрывается, а не возвращается"""
+        if not self._slots.acquire(timeout=ACQUIRE_TIMEOUT):
+            raise PoolTimeoutError('Нет свободного соединения с AD')
+        try:
+            conn = self._take()
+            reused = conn is not None
+            if not reused:
+                conn = self._factory()
+            try:
+                yield conn
+            except LDAPCommunicationError as e:
+                self._close(conn)
+                if reused:
+                    raise StaleConnectionError(str(e)) from e
+                raise
+            except BaseException:
+                self._close(conn)
+                raise
+            else:
+                self._give_back(conn)
+        finally:
+            self._slots.release()
+
+    def clear(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn, _ in idle:
+            self._close(conn)
+
+    def _take(self):
+        while True:
+            with self._lock:
+                if not self._idle:
+                    return None
+                conn, released_at = self._idle.pop()
+            idle_for = time.monotonic() - released_at
+            if idle_for < HEALTH_CHECK_AFTER and self._usable(conn):
+                return conn
+            if idle_for < self._idle_timeout and self._alive(conn):
+                return conn
+            self._close(conn)
+
+    def _give_back(self, conn):
+        if not self._usable(conn):
+            self._close(conn)
+            return
+        with self._lock:
+            self._idle.append((conn, time.monotonic()))
+
+    @staticmethod
+    def _usable(conn):
+        return conn.bound and not conn.closed
+
+    def _alive(self, conn):
+        if not self._usable(conn):
+            return False
+        try:
+            return conn.extend.standard.who_am_i() is not None
+        except LDAPException:
+            return False
+
+    @staticmethod
+    def _close(conn):
+        try:
+            conn.unbind()
+        except Exception:
+            pass
+
+
+# (сервер, порт, пользователь) -> LdapPool; пул общий для всех ADService процесса
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def is_locked(lockout_time):
+    """Заблокирована ли учётная запись по значению lockoutTime"""
+    # Упрощенная проверка блокировки
+    if lockout_time:
+        # Простая проверка: если lockoutTime существует и не равен 0 - заблокирован
+        if isinstance(lockout_time, datetime):
+            # Если это datetime и год больше 1601 - заблокирован
+            return lockout_time.year > 1601
+        # Если это число - проверяем что > 0
+        try:
+            return int(lockout_time) > 0
+        except:
+            return False
+    return False
+
+
+def _single(value):
+    # В ответе постраничного поиска отсутствующий атрибут — пустой список
+    if isinstance(value, list):
+        return value[0] if value else None
+    return value
+
+
 class ADService:
     def __init__(self):
         config = getattr(settings, 'AD_CONFIG', {})
         self.server = config.get('SERVER')
+        self.port = config.get('PORT', 636)
+        self.use_ssl = config.get('USE_SSL', True)
         self.admin_user = config.get('ADMIN_USER')
         self.admin_password = config.get('ADMIN_PASSWORD')
         self.base_dn = config.get('BASE_DN', 'DC=corp,DC=p-el,DC=ru')
-        
+        self.pool_size = config.get('POOL_SIZE', POOL_SIZE)
+
     def connect(self):
-        """Подключение к AD"""
+        """Новое подключение к AD (с bind); ошибка подключения — исключение ldap3"""
+        tls = Tls(validate=ssl.CERT_NONE)
+        server = Server(self.server, port=self.port, use_ssl=self.use_ssl, tls=tls, connect_timeout=CONNECT_TIMEOUT)
+        return Connection(server, self.admin_user, self.admin_password, auto_bind=True, receive_timeout=RECEIVE_TIMEOUT)
+
+    def pool(self):
+        key = (self.server, self.port, self.admin_user)
+        with _pools_lock:
+            if key not in _pools:
+                _pools[key] = LdapPool(self.connect, size=self.pool_size)
+            return _pools[key]
+
+    def run(self, operation):
+        """operation(conn) на соединении из пула; если оно оказалось оборванным — ещё раз на новом"""
+        pool = self.pool()
         try:
-            tls = Tls(validate=ssl.CERT_NONE)
-            server = Server(self.server, port=636, use_ssl=True, tls=tls)
-            return Connection(server, self.admin_user, self.admin_password, auto_bind=True)
-        except Exception as e:
-            print(f"AD error: {e}")
-            return None
+            with pool.connection() as conn:
+                return operation(conn)
+        except StaleConnectionError:
+            # Оборвалось одно — скорее всего, и остальные простаивавшие тоже
+            pool.clear()
+            with pool.connection() as conn:
+                return operation(conn)
 
     def get_user_status(self, username):
         """Статус учетной записи"""
-        conn = self.connect()
-        if not conn: return {'error': 'Connection failed'}
-        
         try:
-            conn.search(self.base_dn, f"(sAMAccountName={username})", 
-                       attributes=['userAccountControl', 'lockoutTime', 'displayName'])
-            if not conn.entries: return {'found': False}
-            
-            user = conn.entries[0]
-            uac = int(user.userAccountControl.value or 0)
-            
-            # Упрощенная проверка блокировки
-            lockout_time = user.lockoutTime.value
-            if lockout_time:
-                # Простая проверка: если lockoutTime существует и не равен 0 - заблокирован
-                if isinstance(lockout_time, datetime):
-                    # Если это datetime и год больше 1601 - заблокирован
-                    locked = lockout_time.year > 1601
-                else:
-                    # Если это число - проверяем что > 0
-                    try:
-                        locked = int(lockout_time) > 0
-                    except:
-                        locked = False
-            else:
-                locked = False
-                
-            disabled = bool(uac & 2)
-            
-            return {
-                'found': True, 
-                'locked': locked, 
-                'disabled': disabled,
-                'display_name': user.displayName.value if user.displayName else username
-            }
+            return self.run(lambda conn: self._user_status(conn, username))
+        except CONNECTION_ERRORS:
+            logger.exception("AD: нет связи при запросе статуса %s", username)
+            return {'error': 'Connection failed'}
         except Exception as e:
+            logger.exception("AD: ошибка запроса статуса %s", username)
             return {'error': str(e)}
-        finally:
-            conn.unbind()
+
+    def _user_status(self, conn, username):
+        conn.search(self.base_dn, f"(sAMAccountName={username})",
+                   attributes=['userAccountControl', 'lockoutTime', 'displayName'])
+        if not conn.entries: return {'found': False}
+
+        user = conn.entries[0]
+        uac = int(user.userAccountControl.value or 0)
+
+        return {
+            'found': True,
+            'locked': is_locked(user.lockoutTime.value),
+            'disabled': bool(uac & 2),
+            'display_name': user.displayName.value if user.displayName else username
+        }
+
+    def get_all_user_statuses(self, page_size=PAGE_SIZE):
+        """
+        Статусы всех учётных записей под BASE_DN одним постраничным поиском
+        (вместо поиска на каждого пользователя): {логин в нижнем регистре: статус
+        в формате get_user_status}. Ошибка связи — исключение ldap3.
+        """
+        return self.run(lambda conn: self._all_user_statuses(conn, page_size))
+
+    def _all_user_statuses(self, conn, page_size):
+        statuses = {}
+        entries = conn.extend.standard.paged_search(
+            self.base_dn, USER_FILTER, attributes=STATUS_ATTRIBUTES,
+            paged_size=page_size, generator=True,
+        )
+        for entry in entries:
+            if entry.get('type') != 'searchResEntry':
+                continue  # ссылки на другие разделы каталога
+            attributes = entry['attributes']
+            login = _single(attributes.get('sAMAccountName'))
+            if not login:
+                continue
+            statuses[login.lower()] = {
+                'found': True,
+                'locked': is_locked(_single(attributes.get('lockoutTime'))),
+                'disabled': bool(int(_single(attributes.get('userAccountControl')) or 0) & 2),
+                'display_name': _single(attributes.get('displayName')) or login,
+            }
+        return statuses
 
     def unlock_user(self, username):
         """Разблокировка пользователя"""
-        conn = self.connect()
-        if not conn: return {'success': False, 'error': 'Connection failed'}
-        
         try:
-            conn.search(self.base_dn, f"(sAMAccountName={username})", attributes=['distinguishedName'])
-            if not conn.entries: return {'success': False, 'error': 'User not found'}
-            
-            user_dn = conn.entries[0].distinguishedName.value
-            conn.modify(user_dn, {'lockoutTime': [(MODIFY_REPLACE, [0])]})
-            
-            success = conn.result['result'] == 0
-            return {'success': success, 'message': f'Пользователь {username} разблокирован'}
+            return self.run(lambda conn: self._unlock(conn, username))
+        except CONNECTION_ERRORS:
+            logger.exception("AD: нет связи при разблокировке %s", username)
+            return {'success': False, 'error': 'Connection failed'}
         except Exception as e:
+            logger.exception("AD: ошибка разблокировки %s", username)
             return {'success': False, 'error': str(e)}
-        finally:
-            conn.unbind()
\ No newline at end of file
+
+    def _unlock(self, conn, username):
+        conn.search(self.base_dn, f"(sAMAccountName={username})", attributes=['distinguishedName'])
+        if not conn.entries: return {'success': False, 'error': 'User not found'}
+
+        user_dn = conn.entries[0].distinguishedName.value
+        conn.modify(user_dn, {'lockoutTime': [(MODIFY_REPLACE, [0])]})
+
+        success = conn.result['result'] == 0
+        return {'success': success, 'message': f'Пользователь {username} разблокирован'}
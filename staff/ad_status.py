@@ -0,0 +1,131 @@
+# staff/ad_status.py
+"""
+Статус учётной записи AD для карточки сотрудника — через кэш Django.
+
+Запись кэша — последний ответ ADService.get_user_status и время проверки.
+Свежая (моложе STATUS_TTL) отдаётся как есть. Устаревшая хранится ещё
+STALE_TTL и тоже отдаётся сразу (с пометкой stale), а обновление из AD
+идёт в фоновом потоке — не больше одного на пользователя одновременно.
+Нет записи — запрос к AD синхронно.
+
+ad_lockout_webhook и разблокировка удаляют запись: после них последний
+статус заведомо неверен, и следующая проверка идёт в AD.
+Ошибки связи с AD не кэшируются — при наличии отдаётся прежний статус.
+
+sync_statuses (команда sync_ad_status) получает статусы всех учётных
+записей одним постраничным поиском, сохраняет их в ADAccountStatus для
+списков сотрудников и заодно заполняет этот кэш.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from .ad_service import PAGE_SIZE, ADService
+from .models import ADAccountStatus, Employee
+
+BATCH_SIZE = 500
+
+CACHE_KEY = 'ad_status_{}'
+REFRESH_LOCK_KEY = 'ad_status_refresh_{}'
+STATUS_TTL = 300
+# Сколько после STATUS_TTL ещё можно показывать последний статус, пока идёт обновление
+STALE_TTL = 86400
+# Страховка: блокировка фонового обновления снимается, даже если поток упал
+REFRESH_LOCK_TIMEOUT = 60
+
+
+def _key(username):
+    # sAMAccountName не зависит от регистра, а webhook и база пишут его по-разному
+    return CACHE_KEY.format(username.lower())
+
+
+def status_ttl():
+    return getattr(settings, 'AD_CONFIG', {}).get('STATUS_TTL', STATUS_TTL)
+
+
+def invalidate(username):
+    cache.delete(_key(username))
+
+
+def fetch(username):
+    """Статус из AD (мимо кэша) с записью в кэш; ошибки не кэшируются"""
+    status = ADService().get_user_status(username)
+    if 'error' not in status:
+        cache.set(_key(username), {'status': status, 'checked_at': time.time()}, status_ttl() + STALE_TTL)
+    return status
+
+
+def _refresh(username):
+    try:
+        fetch(username)
+    finally:
+        cache.delete(REFRESH_LOCK_KEY.format(username.lower()))
+
+
+def refresh_in_background(username):
+    # cache.add — только первый запрос запускает поток, остальные отдают устаревшее
+    if cache.add(REFRESH_LOCK_KEY.format(username.lower()), True, REFRESH_LOCK_TIMEOUT):
+        threading.Thread(target=_refresh, args=(username,), daemon=True).start()
+
+
+def get_status(username, force=False):
+    """
+    Статус для карточки: словарь ADService.get_user_status плюс checked_at
+    (unix-время проверки) и stale (True — устаревший, обновляется в фоне)
+    """
+    entry = cache.get(_key(username))
+    if entry is not None and not force:
+        stale = time.time() - entry['checked_at'] >= status_ttl()
+        if stale:
+            refresh_in_background(username)
+        return {**entry['status'], 'checked_at': entry['checked_at'], 'stale': stale}
+
+    status = fetch(username)
+    if 'error' not in status:
+        return {**status, 'checked_at': time.time(), 'stale': False}
+    if entry is not None:
+        # Принудительная проверка не удалась — показываем последний известный статус
+        return {**entry['status'], 'checked_at': entry['checked_at'], 'stale': True}
+    return status
+
+
+def sync_statuses(page_size=PAGE_SIZE):
+    """
+    Статусы AD всех сотрудников с AD-логином -> ADAccountStatus (таблица
+    заменяется целиком в одной транзакции) и кэш get_status.
+    Возвращает счётчики; ошибка связи с AD — исключение ldap3.
+    """
+    statuses = ADService().get_all_user_statuses(page_size)
+    fetched_at = timezone.now()
+    checked_at = time.time()
+
+    rows = []
+    entries = {}
+    for pk, login in Employee.objects.exclude(ad_login__isnull=True).exclude(ad_login='').values_list('pk', 'ad_login'):
+        status = statuses.get(login.lower(), {'found': False})
+        rows.append(ADAccountStatus(
+            employee_id=pk,
+            found=status['found'],
+            locked=status.get('locked', False),
+            disabled=status.get('disabled', False),
+            display_name=status.get('display_name', ''),
+            fetched_at=fetched_at,
+        ))
+        entries[_key(login)] = {'status': status, 'checked_at': checked_at}
+
+    with transaction.atomic():
+        ADAccountStatus.objects.all().delete()
+        ADAccountStatus.objects.bulk_create(rows, batch_size=BATCH_SIZE)
+    cache.set_many(entries, status_ttl() + STALE_TTL)
+
+    return {
+        'ad_users': len(statuses),
+        'employees': len(rows),
+        'not_found': sum(not row.found for row in rows),
+        'locked': sum(row.locked for row in rows),
+        'disabled': sum(row.disabled for row in rows),
+    }
@@ -0,0 +1,177 @@
+# staff/bulk_upsert.py
+"""
+Пакетный upsert записей по уникальному ключу (например, Equipment.serial_number).
+
+Вместо update_or_create на каждую строку (SELECT + INSERT/UPDATE в отдельной
+транзакции) строки копятся в пачку; существующие ключи пачки загружаются
+одним IN-запросом, запись идёт одним bulk-запросом в одной транзакции.
+
+BulkUpdater — то же для изменений уже загруженных объектов: вместо save()
+всех колонок на каждую строку — bulk_update только изменившихся полей.
+"""
+from django.db import connections, router, transaction
+from django.utils import timezone
+
+
+class BulkUpserter:
+    """
+    Накопитель строк для model с уникальным полем key_field.
+
+    add() возвращает список результатов, если пачка заполнилась и была
+    записана, иначе пустой список. flush() дописывает остаток.
+    Результат — пары (item, created), где item — словарь, переданный в add().
+    Признак created совпадает с тем, что вернул бы update_or_create
+    при последовательной обработке тех же строк.
+    on_flush() вызывается внутри транзакции записи пачки — чтобы связанные
+    изменения (например, BulkUpdater сотрудников) писались вместе с ней.
+    """
+
+    def __init__(self, model, key_field, update_fields, batch_size=1000, on_flush=None):
+        self.model = model
+        self.on_flush = on_flush
+        self.key_field = key_field
+        self.update_fields = list(update_fields)
+        self.batch_size = batch_size
+        self.pending = []
+        self.created = 0
+        self.updated = 0
+
+    def add(self, key, defaults, **extra):
+        """Добавляет строку; extra возвращается вместе с результатом (для логов)"""
+        self.pending.append({'key': key, 'defaults': defaults, **extra})
+        if len(self.pending) >= self.batch_size:
+            return self.flush()
+        return []
+
+    def flush(self):
+        if not self.pending:
+            return []
+        items, self.pending = self.pending, []
+
+        # Существующие ключи пачки — одним запросом
+        existing = self.model.objects.in_bulk(
+            [item['key'] for item in items], field_name=self.key_field
+        )
+
+        results = []
+        latest = {}  # ключ -> последняя версия строки в пачке (как при последовательной записи)
+        for item in items:
+            key = item['key']
+            created = key not in existing and key not in latest
+            latest[key] = item
+            results.append((item, created))
+            if created:
+                self.created += 1
+            else:
+                self.updated += 1
+
+        objects = [
+            self.model(**{self.key_field: key}, **item['defaults'])
+            for key, item in latest.items()
+        ]
+        with transaction.atomic():
+            self._write(objects, existing)
+            if self.on_flush:
+                self.on_flush()
+        return results
+
+    def _write(self, objects, existing):
+        connection = connections[router.db_for_write(self.model)]
+        if connection.features.supports_update_conflicts_with_target:
+            # INSERT ... ON CONFLICT (key) DO UPDATE — один запрос и для новых, и для существующих
+            self.model.objects.bulk_create(
+                objects,
+                update_conflicts=True,
+                unique_fields=[self.key_field],
+                update_fields=self.update_fields,
+                batch_size=self.batch_size,
+            )
+            return
+
+        to_create = []
+        to_update = []
+        for obj in objects:
+            current = existing.get(getattr(obj, self.key_field))
+            if current is None:
+                to_create.append(obj)
+            else:
+                obj.pk = current.pk
+                to_update.append(obj)
+        self.model.objects.bulk_create(to_create, batch_size=self.batch_size)
+        self.model.objects.bulk_update(to_update, self.update_fields, batch_size=self.batch_size)
+
+
+def bulk_update_changed(model, entries, batch_size=1000):
+    """
+    Пишет изменения объектов: entries — пары (объект, изменённые поля).
+    Объекты группируются по набору изменённых полей, на группу — один
+    bulk_update (UPDATE ... CASE по pk). auto_now-поле updated_at
+    bulk_update не проставляет, поэтому оно выставляется здесь.
+    """
+    groups = {}
+    for obj, fields in entries:
+        groups.setdefault(frozenset(fields), []).append(obj)
+    has_updated_at = any(field.name == 'updated_at' for field in model._meta.fields)
+    now = timezone.now()
+    for fields, objs in groups.items():
+        fields = sorted(fields)
+        if has_updated_at:
+            for obj in objs:
+                obj.updated_at = now
+            fields.append('updated_at')
+        model.objects.bulk_update(objs, fields, batch_size=batch_size)
+
+
+class BulkUpdater:
+    """
+    Накопитель изменений объектов model, у которых уже есть pk.
+
+    add(obj, changed, row) — changed: поле -> старое значение; повторные
+    изменения одного объекта сливаются, старое значение берётся из первого.
+    Как и у BulkUpserter, add() возвращает результаты, если пачка заполнилась
+    и была записана, flush() дописывает остаток. Пачка пишется в одной
+    транзакции; если она не прошла (например, дубль уникального поля),
+    объекты пишутся по одному, чтобы ошибка одного не потеряла остальные.
+    Результат — пары (entry, error): entry — {'obj', 'changed', 'rows'},
+    error — исключение или None.
+    """
+
+    def __init__(self, model, batch_size=1000):
+        self.model = model
+        self.batch_size = batch_size
+        self.pending = {}  # id(объекта) -> entry
+
+    def add(self, obj, changed, row=None):
+        entry = self.pending.get(id(obj))
+        if entry is None:
+            entry = self.pending[id(obj)] = {'obj': obj, 'changed': {}, 'rows': []}
+        for field, old in changed.items():
+            entry['changed'].setdefault(field, old)
+        if row is not None:
+            entry['rows'].append(row)
+        if len(self.pending) >= self.batch_size:
+            return self.flush()
+        return []
+
+    def flush(self):
+        if not self.pending:
+            return []
+        entries, self.pending = list(self.pending.values()), {}
+        try:
+            with transaction.atomic():
+                self._write(entries)
+            return [(entry, None) for entry in entries]
+        except Exception:
+            pass
+        results = []
+        for entry in entries:
+            try:
+                with transaction.atomic():
+                    self._write([entry])
+                results.append((entry, None))
+            except Exception as e:
+                results.append((entry, e))
+        return results
+
+    def _write(self, entries):
+        bulk_update_changed(self.model, [(entry['obj'], entry['changed']) for entry in entries], self.batch_size)
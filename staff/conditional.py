@@ -0,0 +1,62 @@
+# staff/conditional.py
+"""
+Условные ответы (ETag / 304) и gzip для частых запросов staff: правая панель
+сотрудника, его оборудование (HTML и JSON), подсказки сотрудников.
+
+ETag считается без запросов к базе — из версий в кэше, которые models
+сбрасывают при записи: версия панели сотрудника (employee_panel) меняется
+при каждом сохранении сотрудника (вместе с updated_at) и при изменении
+закреплённого за ним оборудования, у которого своей отметки времени нет;
+версия списка активных сотрудников (employee_typeahead) — при записи
+сотрудников. Если If-None-Match совпал, view не вызывается: 304 отдаётся
+до выборки и рендера.
+"""
+import hashlib
+
+from django.views.decorators.gzip import gzip_page
+from django.views.decorators.http import condition
+from django.views.decorators.vary import vary_on_headers
+
+from .employee_panel import panel_version
+from .employee_typeahead import current_version
+
+
+def make_etag(*parts):
+    return hashlib.md5(':'.join(str(part) for part in parts).encode()).hexdigest()
+
+
+def _employee_id(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def employee_panel_etag(request, *args, **kwargs):
+    """employees_list: ETag только у HTMX-ответа с панелью, полная страница без него"""
+    employee_id = _employee_id(request.GET.get('selected_id'))
+    if request.headers.get('HX-Request') != 'true' or employee_id is None:
+        return None
+    # В панели есть CSRF-токен: после смены секрета (новый вход) панель должна перерисоваться
+    return make_etag('panel', employee_id, panel_version(employee_id), request.META.get('CSRF_COOKIE', ''))
+
+
+def employee_equipment_etag(request, employee_id, *args, **kwargs):
+    return make_etag(request.resolver_match.url_name, employee_id, panel_version(employee_id))
+
+
+def typeahead_etag(request, *args, **kwargs):
+    return make_etag('typeahead', current_version(), request.GET.get('q', ''), request.GET.get('limit', ''))
+
+
+def conditional(etag_func, vary=()):
+    """
+    condition(etag_func) + gzip. vary — заголовки, от которых зависит ответ
+    по тому же URL (например, HX-Request у employees_list).
+    """
+    def decorator(view):
+        view = condition(etag_func=etag_func)(view)
+        if vary:
+            view = vary_on_headers(*vary)(view)
+        return gzip_page(view)
+    return decorator
@@ -0,0 +1,63 @@
+# staff/dashboard_summary.py
+"""
+Сводка главной страницы: счётчики сотрудников по статусам и матрица
+свободного оборудования тип × офис.
+
+Сводка считается двумя запросами и хранится в кэше до первого изменения
+Employee / Equipment: save() и delete() сбрасывают её сигналами, массовые
+update / delete / bulk_create / bulk_update — через SummaryQuerySet (см. models).
+Сброс выполняется после коммита транзакции: иначе параллельный запрос
+успел бы положить в кэш ещё не изменённые данные.
+"""
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Q
+
+CACHE_KEY = 'staff:dashboard_summary'
+# Страховка на случай изменений в обход ORM (сырой SQL, правка базы вручную)
+CACHE_TIMEOUT = 600
+
+
+def invalidate_summary():
+    transaction.on_commit(lambda: cache.delete(CACHE_KEY))
+
+
+def build_summary():
+    # models импортирует этот модуль для сброса кэша, поэтому импорт здесь
+    from .models import Employee, Equipment
+
+    counts = Employee.objects.aggregate(
+        total_employees=Count('id'),
+        active=Count('id', filter=Q(status='active')),
+        dismissed=Count('id', filter=Q(status='dismissed')),
+        maternity=Count('id', filter=Q(status='maternity')),
+    )
+
+    free = Equipment.objects.filter(
+        employee__isnull=True,
+        disposed=False,
+    ).values_list('type', 'office').annotate(count=Count('id')).order_by()
+
+    data = {}
+    for type_key, office_key, count in free:
+        data.setdefault(type_key, {})[office_key] = count
+    offices = {office_key for row in data.values() for office_key in row}
+
+    type_labels = dict(Equipment.EQUIPMENT_TYPES)
+    office_labels = dict(Employee.OFFICE_CHOICES)
+    return {
+        **counts,
+        'free_equipment_summary': {
+            'types': sorted(data, key=lambda x: type_labels.get(x, x)),
+            'offices': sorted(offices, key=lambda x: office_labels.get(x, x)),
+            'data': data,
+        },
+    }
+
+
+def get_summary():
+    summary = cache.get(CACHE_KEY)
+    if summary is None:
+        summary = build_summary()
+        cache.set(CACHE_KEY, summary, CACHE_TIMEOUT)
+    return summary
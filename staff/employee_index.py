@@ -0,0 +1,149 @@
+# staff/employee_index.py
+"""
+Индекс сотрудников в памяти для сопоставления строк Excel с базой.
+
+Все сотрудники загружаются одним запросом, дальше каждая строка листа
+разрешается поиском по словарю, без обращения к БД.
+"""
+from .models import Employee
+
+
+def normalize_name(value):
+    """Приводит ФИО к ключу поиска: нижний регистр, ё -> е, одиночные пробелы"""
+    if not value:
+        return ''
+    return ' '.join(str(value).lower().replace('ё', 'е').split())
+
+
+def _insert_by_pk(bucket, employee):
+    bucket.append(employee)
+    bucket.sort(key=lambda e: e.pk or 0)
+
+
+class EmployeeIndex:
+    """
+    Префиксный индекс по ФИО.
+
+    Ключи: полное ФИО и пара "Фамилия Имя" (в листе Выдано указана только она).
+    Внутри ключа сотрудники лежат в порядке pk — так же, как их возвращал
+    .first() без явной сортировки, поэтому при неоднозначном имени выбирается
+    тот же сотрудник, что и раньше. Неоднозначные имена копятся в self.ambiguous.
+    """
+
+    def __init__(self, employees=None):
+        if employees is None:
+            employees = Employee.objects.order_by('pk')
+        self.employees = []
+        self.by_fio = {}
+        self.by_short_name = {}
+        self.by_login = {}
+        self.ambiguous = {}
+        self._scan_cache = {}
+        for employee in employees:
+            self.add(employee)
+
+    def add(self, employee):
+        """Добавляет сотрудника в индекс (например, только что созданного импортом)"""
+        self.employees.append(employee)
+        key = normalize_name(employee.fio)
+        if key:
+            self.by_fio.setdefault(key, []).append(employee)
+            short_key = ' '.join(key.split()[:2])
+            if short_key != key:
+                self.by_short_name.setdefault(short_key, []).append(employee)
+        if employee.ad_login:
+            self.by_login[employee.ad_login] = employee
+        self._scan_cache.clear()
+
+    def remove(self, employee):
+        """Убирает сотрудника из индекса (например, если его не удалось записать)"""
+        self.employees = [e for e in self.employees if e is not employee]
+        key = normalize_name(employee.fio)
+        for mapping, bucket_key in ((self.by_fio, key), (self.by_short_name, ' '.join(key.split()[:2]))):
+            bucket = mapping.get(bucket_key, [])
+            if employee in bucket:
+                bucket.remove(employee)
+        if employee.ad_login and self.by_login.get(employee.ad_login) is employee:
+            del self.by_login[employee.ad_login]
+        self._scan_cache.clear()
+
+    def candidates(self, name):
+        """Сотрудники, чьё ФИО начинается с name (по границе слов)"""
+        key = normalize_name(name)
+        if not key:
+            return []
+        exact = self.by_fio.get(key, [])
+        if len(key.split()) != 2:
+            return exact
+        # "Фамилия Имя" совпадает и с полным ФИО из двух слов, и с ФИО с отчеством
+        by_prefix = self.by_short_name.get(key, [])
+        if not exact:
+            return by_prefix
+        return sorted(exact + by_prefix, key=lambda e: e.pk or 0)
+
+    def find_by_prefix(self, name):
+        """Аналог filter(fio__startswith=name).first() с учётом неоднозначности"""
+        found = self.candidates(name)
+        if len(found) > 1:
+            self.ambiguous[normalize_name(name)] = [e.fio for e in found]
+        return found[0] if found else None
+
+    def find_exact(self, name):
+        """Аналог filter(fio__iexact=name).first()"""
+        found = self.by_fio.get(normalize_name(name))
+        return found[0] if found else None
+
+    def find_by_login(self, ad_login):
+        if not ad_login:
+            return None
+        return self.by_login.get(ad_login)
+
+    def reindex(self, employee, old_fio, old_login):
+        """Обновляет ключи сотрудника после изменения ФИО или AD-логина в памяти"""
+        if old_login != employee.ad_login:
+            if old_login and self.by_login.get(old_login) is employee:
+                del self.by_login[old_login]
+            if employee.ad_login:
+                self.by_login[employee.ad_login] = employee
+        old_key = normalize_name(old_fio)
+        new_key = normalize_name(employee.fio)
+        if old_key != new_key:
+            for mapping, key in ((self.by_fio, old_key), (self.by_short_name, ' '.join(old_key.split()[:2]))):
+                bucket = mapping.get(key, [])
+                if employee in bucket:
+                    bucket.remove(employee)
+            if new_key:
+                _insert_by_pk(self.by_fio.setdefault(new_key, []), employee)
+                short_key = ' '.join(new_key.split()[:2])
+                if short_key != new_key:
+                    _insert_by_pk(self.by_short_name.setdefault(short_key, []), employee)
+        self._scan_cache.clear()
+
+    def find_containing(self, name):
+        """Аналог filter(fio__icontains=name).first(): сначала префикс, затем поиск подстроки"""
+        employee = self.find_by_prefix(name)
+        if employee:
+            return employee
+        key = normalize_name(name)
+        return self._scan(('fio', key), lambda e: key in normalize_name(e.fio))
+
+    def find_by_last_name(self, last_name, first_name=None):
+        """Аналог filter(last_name__icontains=..., first_name__icontains=...).first()"""
+        last_key = normalize_name(last_name)
+        first_key = normalize_name(first_name)
+        if not last_key:
+            return None
+        return self._scan(
+            ('parts', last_key, first_key),
+            lambda e: last_key in normalize_name(e.last_name)
+            and (not first_key or first_key in normalize_name(e.first_name)),
+        )
+
+    def _scan(self, cache_key, predicate):
+        # Поиск подстроки не ложится на словарь; нужен только для промахов
+        # префиксного индекса, поэтому результат запоминается по ключу запроса
+        if cache_key not in self._scan_cache:
+            self._scan_cache[cache_key] = next(
+                (e for e in self.employees if predicate(e)), None
+            )
+        return self._scan_cache[cache_key]
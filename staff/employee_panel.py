@@ -0,0 +1,100 @@
+# staff/employee_panel.py
+"""
+Кэш HTML правой панели employees_list (partials/right_column_content.html).
+
+Ключ фрагмента — id сотрудника и версия его панели. Версия хранится
+отдельным ключом и меняется при любой записи сотрудника или оборудования,
+которое за ним закреплено (было или стало): сигналы и SummaryQuerySet
+в models, включая .update() из сигнала увольнения. Старые фрагменты
+после этого просто не читаются и истекают по таймауту. Ключ версии
+пишется только при записи — чтение панели (и ETag в conditional) по
+любому id файлов в кэше не создаёт; пока записи не было, версия 0.
+
+Во фрагменте есть {% csrf_token %} и пароли сотрудника — их в кэше нет:
+фрагмент рендерится с заглушками, а токен текущего запроса и пароли
+(одним запросом к базе) подставляются при каждой выдаче.
+"""
+import uuid
+
+from django.core.cache import cache
+from django.db import transaction
+from django.middleware.csrf import get_token
+from django.template.defaultfilters import escapejs
+from django.template.loader import render_to_string
+from django.utils.html import escape
+
+TEMPLATE = 'staff/partials/right_column_content.html'
+VERSION_KEY = 'staff:employee_panel_version:{}'
+FRAGMENT_KEY = 'staff:employee_panel:{}:{}'
+FRAGMENT_TIMEOUT = 3600
+CSRF_PLACEHOLDER = '__employee_panel_csrf__'
+
+PASSWORD_FIELDS = ('ad_password', 'email_password', 'pass_3cx', 'b24_password', 'tel_b24_password', 'vats_password')
+# Пароль выводится в карточке и как текст, и в строке JS — заглушка с "<" после
+# escape и escapejs выглядит по-разному, и каждая заменяется своим экранированием
+PASSWORD_PLACEHOLDER = '<employee_panel_password:{}>'
+
+
+def invalidate_panels(employee_ids):
+    pks = {pk for pk in employee_ids if pk is not None}
+    if pks:
+        transaction.on_commit(lambda: _bump_versions(pks))
+
+
+def _bump_versions(pks):
+    cache.set_many({VERSION_KEY.format(pk): uuid.uuid4().hex for pk in pks}, None)
+    # Ключ версии могут вытеснить из кэша — тогда версия снова 0,
+    # и фрагмент с версией 0 не должен пережить запись
+    cache.delete_many([FRAGMENT_KEY.format(pk, 0) for pk in pks])
+
+
+def panel_field(model):
+    """Поле строки model, по которому она попадает на панель сотрудника"""
+    return 'pk' if model._meta.model_name == 'employee' else 'employee_id'
+
+
+def assigned_id(kwargs):
+    """id сотрудника, которого .update(employee=...) закрепляет за оборудованием"""
+    value = kwargs.get('employee', kwargs.get('employee_id'))
+    value = getattr(value, 'pk', value)
+    return value if isinstance(value, int) else None
+
+
+def panel_version(employee_id):
+    """Текущая версия панели сотрудника; меняется при каждой его записи или записи его оборудования"""
+    return cache.get(VERSION_KEY.format(employee_id)) or 0
+
+
+def render_panel(request, employee_id):
+    """HTML панели сотрудника или None, если его нет"""
+    # models импортирует этот модуль для сброса версий, поэтому импорт здесь
+    from .models import Employee
+
+    try:
+        employee_id = int(employee_id)
+    except (TypeError, ValueError):
+        return None
+    key = FRAGMENT_KEY.format(employee_id, panel_version(employee_id))
+    html = cache.get(key)
+    if html is None:
+        try:
+            employee = Employee.objects.with_laptop_anydesk().prefetch_related('equipment_set').get(pk=employee_id)
+        except Employee.DoesNotExist:
+            return None
+        for field in PASSWORD_FIELDS:
+            setattr(employee, field, PASSWORD_PLACEHOLDER.format(field))
+        html = render_to_string(TEMPLATE, {
+            'selected_employee': employee,
+            'csrf_token': CSRF_PLACEHOLDER,
+        })
+        cache.set(key, html, FRAGMENT_TIMEOUT)
+
+    passwords = Employee.objects.filter(pk=employee_id).values(*PASSWORD_FIELDS).first()
+    if passwords is None:
+        return None
+    for field, value in passwords.items():
+        placeholder = PASSWORD_PLACEHOLDER.format(field)
+        # Как в шаблоне карточки: {{ ...|default:"—" }} и '{{ ...|escapejs }}'
+        html = html.replace(escape(placeholder), escape(value) if value else '—')
+        html = html.replace(escapejs(placeholder), escapejs(value))
+    return html.replace(CSRF_PLACEHOLDER, get_token(request))
@@ -0,0 +1,87 @@
+# staff/employee_search.py
+"""
+Серверный поиск сотрудников для левой колонки employees_list.
+
+Фильтры: строка поиска (каждое слово должно встретиться в ФИО, должности,
+AD-логине, email, SIP или телефоне — через индекс search_index, без него
+подстрокой через LIKE), статус и офис. Страницы — по ключу (fio, id):
+следующая страница начинается строго после последней строки предыдущей,
+поэтому время ответа не зависит от того, насколько далеко пролистан список
+(в отличие от OFFSET). Порядок обслуживается индексом employee_fio_id_idx.
+
+Из базы выбираются только поля строки списка — без паролей и info.
+"""
+import base64
+import json
+
+from django.db.models import Q
+
+from . import search_index
+from .models import Employee
+
+PAGE_SIZE = 50
+
+# Поля, нужные шаблону строки списка (partials/employee_list_rows.html)
+LIST_FIELDS = ('id', 'fio', 'position', 'status', 'office', 'ad_login', 'email', 'sip_number')
+# Статус AD из таблицы sync_ad_status — тем же запросом (LEFT JOIN)
+AD_FIELDS = ('ad_account__locked', 'ad_account__disabled', 'ad_account__fetched_at')
+
+SEARCH_FIELDS = ('fio', 'position', 'ad_login', 'email', 'sip_number')
+
+
+def search_employees(query='', status='all', office='all'):
+    employees = Employee.objects.select_related('ad_account').only(*LIST_FIELDS, *AD_FIELDS)
+    if status and status != 'all':
+        employees = employees.filter(status=status)
+    if office and office != 'all':
+        employees = employees.filter(office=office)
+    if not query.split():
+        return employees
+    # Полнотекстовый индекс (SQLite FTS5), без него — LIKE по каждому слову
+    ids = search_index.search_ids(Employee, query)
+    if ids is not None:
+        return employees.filter(pk__in=ids)
+    for part in query.split():
+        condition = Q()
+        for field in SEARCH_FIELDS:
+            for variant in case_variants(part):
+                condition |= Q(**{f'{field}__contains': variant})
+        employees = employees.filter(condition)
+    return employees
+
+
+def case_variants(part):
+    """
+    Написания слова для поиска без учёта регистра: LIKE в SQLite не различает
+    регистр только для латиницы, поэтому для кириллицы перебираются
+    типичные варианты ("иванов" -> "Иванов", "ИВАНОВ").
+    """
+    return {part, part.lower(), part.upper(), part.capitalize()}
+
+
+def encode_cursor(employee):
+    raw = json.dumps([employee.fio, employee.pk], ensure_ascii=False).encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def decode_cursor(cursor):
+    """(fio, id) последней показанной строки или None для битого курсора"""
+    try:
+        fio, pk = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return str(fio), int(pk)
+    except (ValueError, TypeError):
+        return None
+
+
+def keyset_page(employees, cursor=None, size=PAGE_SIZE):
+    """Страница после cursor: (сотрудники, курсор следующей страницы или None)"""
+    employees = employees.order_by('fio', 'id')
+    after = decode_cursor(cursor) if cursor else None
+    if after:
+        fio, pk = after
+        employees = employees.filter(Q(fio__gt=fio) | Q(fio=fio, id__gt=pk))
+    rows = list(employees[:size + 1])
+    if len(rows) > size:
+        rows = rows[:size]
+        return rows, encode_cursor(rows[-1])
+    return rows, None
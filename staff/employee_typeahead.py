@@ -0,0 +1,63 @@
+# staff/employee_typeahead.py
+"""
+Подсказки активных сотрудников для полей выбора (закрепление оборудования
+в equipment_list, выбор сотрудника в provisioning) вместо <select> со всеми
+сотрудниками на каждой странице.
+
+Кортежи (id, ФИО, офис) активных сотрудников хранятся в памяти процесса
+вместе с версией из общего кэша Django. Запись сотрудников (сигналы и
+SummaryQuerySet в models) удаляет версию — каждый процесс перечитает
+список при следующем запросе подсказок, а не на каждый запрос.
+"""
+import uuid
+
+from django.core.cache import cache
+from django.db import transaction
+
+VERSION_KEY = 'staff:active_employees_version'
+LIMIT = 20
+MAX_LIMIT = 50
+
+# (версия, кортежи (id, ФИО, офис, ФИО для сравнения))
+_snapshot = (None, ())
+
+
+def invalidate_active_employees():
+    transaction.on_commit(lambda: cache.delete(VERSION_KEY))
+
+
+def _fold(text):
+    return (text or '').lower().replace('ё', 'е')
+
+
+def current_version():
+    return cache.get_or_set(VERSION_KEY, uuid.uuid4().hex, None)
+
+
+def active_employees():
+    global _snapshot
+    version = current_version()
+    if _snapshot[0] != version:
+        # models импортирует этот модуль для сброса версии, поэтому импорт здесь
+        from .models import Employee
+        rows = Employee.objects.filter(status='active').order_by('fio').values_list('id', 'fio', 'office')
+        _snapshot = (version, tuple((pk, fio, office, _fold(fio)) for pk, fio, office in rows))
+    return _snapshot[1]
+
+
+def suggest(query, limit=LIMIT):
+    """
+    Первые limit активных сотрудников (по ФИО), у которых каждое слово
+    запроса — начало одного из слов ФИО: "ив пет" найдёт "Иванов Пётр".
+    """
+    words = _fold(query).split()
+    if not words:
+        return []
+    results = []
+    for pk, fio, office, folded in active_employees():
+        parts = folded.split()
+        if all(any(part.startswith(word) for part in parts) for word in words):
+            results.append((pk, fio, office))
+            if len(results) >= limit:
+                break
+    return results
@@ -0,0 +1,64 @@
+# staff/employee_updater.py
+"""
+Пакетная запись сотрудников для команд импорта.
+
+employee.save() пишет все колонки и вызывает сигналы на каждую строку.
+Здесь изменения пишутся bulk_update (сигналы не вызываются), а освобождение
+оборудования при смене статуса делается за сигнал free_equipment_on_status_change
+хуком models.release_equipment — одним UPDATE на пачку.
+"""
+from django.db import transaction
+
+from .bulk_upsert import BulkUpdater
+from .models import RELEASE_STATUSES, Employee, release_equipment
+
+
+class EmployeeUpdater(BulkUpdater):
+    """
+    BulkUpdater для Employee. equipment_freed — сколько единиц оборудования
+    освобождено у сотрудников, сменивших статус на уволен / декрет.
+    """
+
+    def __init__(self, batch_size=1000):
+        super().__init__(Employee, batch_size=batch_size)
+        self.equipment_freed = 0
+
+    def _write(self, entries):
+        released = [
+            entry['obj'].pk for entry in entries
+            if 'status' in entry['changed']
+            and entry['obj'].status in RELEASE_STATUSES
+            and entry['changed']['status'] != entry['obj'].status
+        ]
+        freed = release_equipment(released) if released else 0
+        super()._write(entries)
+        # Счётчик увеличивается только если пачка записалась
+        self.equipment_freed += freed
+
+
+def create_employees(pending_new, batch_size=1000):
+    """
+    Создаёт сотрудников пачкой. pending_new — пары (сотрудник, номер строки);
+    возвращает тройки (сотрудник, номер строки, ошибка или None).
+    Если пачка не прошла (например, дубль AD-логина) — создаём построчно,
+    чтобы ошибка одной строки не потеряла остальные.
+    """
+    if not pending_new:
+        return []
+    employees = [employee for employee, _ in pending_new]
+    try:
+        with transaction.atomic():
+            Employee.objects.bulk_create(employees, batch_size=batch_size)
+        return [(employee, row_num, None) for employee, row_num in pending_new]
+    except Exception:
+        pass
+    results = []
+    for employee, row_num in pending_new:
+        employee.pk = None
+        try:
+            with transaction.atomic():
+                employee.save(force_insert=True)
+            results.append((employee, row_num, None))
+        except Exception as e:
+            results.append((employee, row_num, e))
+    return results
@@ -0,0 +1,130 @@
+# staff/equipment_pagination.py
+"""
+Постраничный вывод equipment_list без OFFSET и без COUNT на каждый запрос.
+
+Число строк под фильтром кэшируется по нормализованному набору фильтров.
+В ключ входит «версия» счётчиков: запись Employee / Equipment (сигналы и
+SummaryQuerySet в models) удаляет версию, и все старые ключи разом
+перестают читаться — перебирать их не нужно (FileBasedCache не удаляет
+по маске). Сотрудники тоже сбрасывают счётчики: поиск идёт и по ФИО держателя.
+
+Страницы — по ключу -id: after=<id> — строки с меньшим id (следующая
+страница), before=<id> — с большим (предыдущая), page=last — хвост списка.
+Номер страницы в ссылках нужен только для отображения «N из M».
+"""
+import hashlib
+import json
+import uuid
+
+from django.core.cache import cache
+from django.db import transaction
+
+COUNT_VERSION_KEY = 'staff:equipment_count_version'
+# Страховка на случай изменений в обход ORM, как у сводки дашборда
+COUNT_TIMEOUT = 600
+
+
+def invalidate_counts():
+    transaction.on_commit(lambda: cache.delete(COUNT_VERSION_KEY))
+
+
+def count_key(filters):
+    version = cache.get_or_set(COUNT_VERSION_KEY, uuid.uuid4().hex, None)
+    digest = hashlib.md5(json.dumps(filters, ensure_ascii=False).encode()).hexdigest()
+    return f'staff:equipment_count:{version}:{digest}'
+
+
+def cached_count(equipment, filters):
+    """COUNT по queryset equipment; filters — кортеж нормализованных фильтров, ключ кэша"""
+    key = count_key(filters)
+    count = cache.get(key)
+    if count is None:
+        count = equipment.order_by().count()
+        cache.set(key, count, COUNT_TIMEOUT)
+    return count
+
+
+def parse_id(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class KeysetPage:
+    """Страница списка: то подмножество интерфейса django Page, что нужно шаблону"""
+
+    def __init__(self, object_list, number, num_pages, has_previous, has_next):
+        self.object_list = object_list
+        self.number = number
+        self.num_pages = num_pages
+        self._has_previous = has_previous
+        self._has_next = has_next
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_next(self):
+        return self._has_next
+
+    def has_other_pages(self):
+        return self._has_previous or self._has_next
+
+    def previous_page_number(self):
+        return max(self.number - 1, 1)
+
+    def next_page_number(self):
+        return min(self.number + 1, self.num_pages)
+
+    @property
+    def previous_cursor(self):
+        return self.object_list[0].pk if self.object_list else None
+
+    @property
+    def next_cursor(self):
+        return self.object_list[-1].pk if self.object_list else None
+
+
+def keyset_page(equipment, count, per_page, page=None, after=None, before=None):
+    """
+    Страница equipment в порядке -id. Лишняя (per_page + 1)-я строка
+    показывает, есть ли страница дальше в направлении выборки.
+    page без курсора (старые ссылки ?page=N) выбирается через OFFSET.
+    """
+    num_pages = max(1, -(-count // per_page))
+    number = parse_id(page) or 1
+    after, before = parse_id(after), parse_id(before)
+
+    if page == 'last':
+        number = num_pages
+        tail = count - (num_pages - 1) * per_page
+        rows = list(equipment.order_by('id')[:tail])[::-1]
+        return KeysetPage(rows, number, num_pages, number > 1, False)
+
+    if before is not None:
+        rows = list(equipment.filter(id__gt=before).order_by('id')[:per_page + 1])
+        has_previous = len(rows) > per_page
+        rows = rows[:per_page][::-1]
+        number = min(number, num_pages) if has_previous else 1
+        return KeysetPage(rows, number, num_pages, has_previous, True)
+
+    equipment = equipment.order_by('-id')
+    if after is not None:
+        rows = list(equipment.filter(id__lt=after)[:per_page + 1])
+        has_previous = True
+    else:
+        number = min(number, num_pages)
+        offset = (number - 1) * per_page
+        rows = list(equipment[offset:offset + per_page + 1])
+        has_previous = number > 1
+    has_next = len(rows) > per_page
+    rows = rows[:per_page]
+    if not has_next:
+        number = num_pages
+    return KeysetPage(rows, max(1, min(number, num_pages)), num_pages, has_previous, has_next)
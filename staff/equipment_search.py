@@ -0,0 +1,48 @@
+# staff/equipment_search.py
+"""
+Фильтры списка оборудования — общие для equipment_list и /api/equipment/.
+
+Строка поиска ищется по серийному номеру, модели, MAC и ФИО держателя:
+через полнотекстовый индекс (search_index), без него — LIKE.
+"""
+from django.db.models import Q
+
+from . import search_index
+from .models import Equipment
+
+
+def search_equipment(query='', type_filter='', office_filter='', disposed_filter='',
+                     assigned_filter='', employee_filter=''):
+    equipment = Equipment.objects.all()
+
+    if query.strip():
+        # Полнотекстовый индекс (SQLite FTS5) вместо LIKE по четырём полям через JOIN
+        ids = search_index.search_ids(Equipment, query)
+        if ids is not None:
+            equipment = equipment.filter(pk__in=ids)
+        else:
+            equipment = equipment.filter(
+                Q(serial_number__icontains=query) |
+                Q(model__icontains=query) |
+                Q(mac_address__icontains=query) |
+                Q(employee__fio__icontains=query)
+            )
+    if type_filter:
+        equipment = equipment.filter(type=type_filter)
+    if office_filter:
+        equipment = equipment.filter(office=office_filter)
+    if disposed_filter:
+        equipment = equipment.filter(disposed=disposed_filter == 'true')
+
+    # Фильтр по закреплению
+    if assigned_filter == 'true':  # Закрепленное
+        equipment = equipment.exclude(employee__isnull=True)
+    elif assigned_filter == 'false':  # Свободное
+        equipment = equipment.filter(employee__isnull=True)
+
+    if employee_filter:  # Фильтр по сотруднику
+        try:
+            equipment = equipment.filter(employee_id=int(employee_filter))
+        except (ValueError, TypeError):
+            pass
+    return equipment
@@ -0,0 +1,324 @@
+# staff/import_changes.py
+"""
+Набор изменений импорта (dry-run) и его применение.
+
+В режиме dry-run (--dry-run любой команды импорта, см. ImportCommandMixin)
+WorkbookSync и SpecImporter не пишут в базу: всё, что они записали бы,
+уходит в ChangeSet построчно в JSONL — создание и обновление сотрудников
+(смена статуса — отдельная операция status), освобождение оборудования
+(free), создание и обновление оборудования, отпечатки строк. Состояние базы
+загружается один раз (индекс сотрудников, снимок оборудования) и дальше
+меняется только в памяти, так что итог совпадает с обычным прогоном.
+
+apply_change_set() применяет такой файл: тяжёлое сравнение можно сделать
+заранее, а запись останется короткой.
+
+Формат строки:
+    {"op": "update", "model": "employee", "employee": {"pk": 12},
+     "fio": "...", "fields": {"phone": "123"}, "changes": {"phone": ["", "123"]},
+     "sheet": "Employment", "row": 5}
+Сотрудник, которого создаёт этот же набор, указывается как {"new": n}.
+"""
+import json
+from collections import Counter
+
+from django.db import connection, transaction
+
+from .bulk_upsert import BulkUpserter, bulk_update_changed
+from .import_fingerprints import FingerprintStore
+from .models import Employee, Equipment
+
+WRITE_STATEMENTS = ('INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+
+
+def forbid_writes(execute, sql, params, many, context):
+    """execute_wrapper для dry-run: любой пишущий запрос — ошибка"""
+    if sql.lstrip().upper().startswith(WRITE_STATEMENTS):
+        raise RuntimeError(f"Запись в базу в режиме dry-run: {sql[:80]}")
+    return execute(sql, params, many, context)
+
+
+def employee_create_fields():
+    """Поля сотрудника, которые переносятся при создании (без pk и служебных дат)"""
+    return [
+        field.attname for field in Employee._meta.concrete_fields
+        if not field.primary_key and not getattr(field, 'auto_now', False)
+        and not getattr(field, 'auto_now_add', False)
+    ]
+
+
+def to_python(field, value):
+    """Значение поля сотрудника из JSON набора изменений"""
+    return Employee._meta.get_field(field).to_python(value)
+
+
+def blank_equipment():
+    """Значения полей нового оборудования по умолчанию (в формате снимка)"""
+    values = {field.attname: field.get_default() for field in Equipment._meta.concrete_fields}
+    values['employee'] = None
+    del values['employee_id']
+    return values
+
+
+class ChangeSet:
+    """
+    Приёмник изменений dry-run: пишет операции в stream (JSONL)
+    и считает их в self.counts ("employee create", "equipment update", ...).
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.counts = Counter()
+        self._planned = {}  # id(сотрудника) -> номер в наборе
+        self._equipment = None
+
+    def _emit(self, record):
+        self.counts[f"{record['model']} {record['op']}"] += 1
+        self.stream.write(json.dumps(record, ensure_ascii=False, default=str) + '\n')
+
+    # === Сотрудники ===
+
+    def employee_ref(self, employee):
+        if employee is None:
+            return None
+        if employee.pk:
+            return {'pk': employee.pk}
+        return {'new': self._planned[id(employee)]}
+
+    def is_planned(self, employee):
+        """Сотрудник создаётся этим набором (в базе его ещё нет)"""
+        return id(employee) in self._planned
+
+    def create_employee(self, employee, sheet, row_num):
+        self._planned[id(employee)] = len(self._planned) + 1
+        self._emit({
+            'op': 'create', 'model': 'employee', 'employee': self.employee_ref(employee),
+            'fio': employee.fio,
+            'fields': {name: getattr(employee, name) for name in employee_create_fields()},
+            'sheet': sheet, 'row': row_num,
+        })
+
+    def update_employee(self, employee, old_values, sheet, row_num):
+        """old_values — поле -> значение до изменения; новое берётся из объекта"""
+        self._emit({
+            'op': 'status' if 'status' in old_values else 'update',
+            'model': 'employee', 'employee': self.employee_ref(employee), 'fio': employee.fio,
+            'fields': {field: getattr(employee, field) for field in old_values},
+            'changes': {field: [old, getattr(employee, field)] for field, old in old_values.items()},
+            'sheet': sheet, 'row': row_num,
+        })
+
+    # === Оборудование ===
+
+    @property
+    def equipment(self):
+        """Снимок оборудования: serial_number (или pk без номера) -> значения полей"""
+        if self._equipment is None:
+            self._equipment = {}
+            for values in Equipment.objects.values():
+                employee_id = values.pop('employee_id')
+                values['employee'] = {'pk': employee_id} if employee_id else None
+                self._equipment[values['serial_number'] or ('pk', values['id'])] = values
+        return self._equipment
+
+    def release_equipment(self, employees, sheet):
+        """Освобождает оборудование сотрудников (как UPDATE ... SET employee = NULL)"""
+        refs = [self.employee_ref(employee) for employee in employees]
+        return self._free(
+            [values for values in self.equipment.values() if values['employee'] in refs], sheet
+        )
+
+    def free_equipment(self, serials, sheet):
+        """Освобождает выданное оборудование по серийным номерам (--prune)"""
+        found = (self.equipment.get(serial) for serial in serials)
+        return self._free([values for values in found if values and values['employee']], sheet)
+
+    def _free(self, items, sheet):
+        for values in items:
+            self._emit({
+                'op': 'free', 'model': 'equipment', 'equipment': values['id'],
+                'serial_number': values['serial_number'], 'employee': values['employee'],
+                'sheet': sheet,
+            })
+            values['employee'] = None
+        return len(items)
+
+    def equipment_upserter(self, update_fields, sheet):
+        return PlannedUpserter(self, update_fields, sheet)
+
+    def plan_equipment(self, serial, defaults, update_fields, sheet, row_num):
+        """Возвращает created, как BulkUpserter; неизменившееся оборудование не пишется"""
+        fields = dict(defaults, employee=self.employee_ref(defaults.get('employee')))
+        current = self.equipment.get(serial)
+        record = {
+            'model': 'equipment', 'serial_number': serial, 'fields': fields,
+            'employee_fio': defaults['employee'].fio if defaults.get('employee') else None,
+            'sheet': sheet, 'row': row_num,
+        }
+        if current is None:
+            self.equipment[serial] = dict(blank_equipment(), **fields, serial_number=serial)
+            self._emit({'op': 'create', **record})
+            return True
+        changes = {
+            field: [current.get(field), fields[field]]
+            for field in update_fields if current.get(field) != fields[field]
+        }
+        if changes:
+            current.update(fields)
+            self._emit({'op': 'update', **record, 'changes': changes})
+        return False
+
+    # === Отпечатки ===
+
+    def fingerprints(self, store):
+        changed, stale = store.pending()
+        if changed or stale:
+            self._emit({
+                'op': 'fingerprints', 'model': 'fingerprint', 'sheet': store.sheet,
+                'save': changed, 'delete': stale,
+            })
+
+
+class PlannedUpserter:
+    """Интерфейс BulkUpserter для dry-run: результат сразу, без записи"""
+
+    def __init__(self, changes, update_fields, sheet):
+        self.changes = changes
+        self.update_fields = list(update_fields)
+        self.sheet = sheet
+        self.created = 0
+        self.updated = 0
+
+    def add(self, key, defaults, **extra):
+        item = {'key': key, 'defaults': defaults, **extra}
+        created = self.changes.plan_equipment(key, defaults, self.update_fields, self.sheet, extra.get('row'))
+        if created:
+            self.created += 1
+        else:
+            self.updated += 1
+        return [(item, created)]
+
+    def flush(self):
+        return []
+
+
+class ChangeSetApplier:
+    """
+    Применяет операции набора по порядку. Подряд идущие однотипные операции
+    пишутся пачкой: создание сотрудников — bulk_create, оборудование — BulkUpserter,
+    освобождение — один UPDATE, обновления сотрудников — bulk_update_changed.
+
+    Обновление сотрудника применяется, только если в базе всё ещё старые
+    значения; иначе запись считается конфликтом (stats['conflicts']) и пропускается.
+    Текущие значения пачки читаются одним запросом (select_for_update — набор
+    применяется в транзакции). Повторное обновление того же сотрудника
+    сначала записывает пачку: его старые значения — результат предыдущего.
+    """
+
+    def __init__(self, batch_size=1000, log=None):
+        self.batch_size = batch_size
+        self.log = log or (lambda message, level='info': None)
+        self.stats = Counter()
+        self.planned = {}  # номер в наборе -> pk созданного сотрудника
+        self._kind = None
+        self._pending = []
+        self._pending_pks = set()  # сотрудники в текущей пачке обновлений
+        self._upserter = None
+
+    def resolve(self, ref):
+        if ref is None:
+            return None
+        if 'pk' in ref:
+            return ref['pk']
+        return self.planned[ref['new']]
+
+    def apply(self, record):
+        op, model = record['op'], record['model']
+        kind = (model, op, tuple(record['fields']) if model == 'equipment' and op != 'free' else None)
+        if kind != self._kind:
+            self.flush()
+            self._kind = kind
+
+        if model == 'employee' and op == 'create':
+            self._pending.append(record)
+        elif model == 'employee':
+            pk = self.resolve(record['employee'])
+            if pk in self._pending_pks:
+                self.flush()
+            self._pending.append((pk, record))
+            self._pending_pks.add(pk)
+            if len(self._pending) >= self.batch_size:
+                self.flush()
+        elif op == 'free':
+            self._pending.append(record['equipment'])
+        elif model == 'equipment':
+            if self._upserter is None:
+                self._upserter = BulkUpserter(
+                    Equipment, 'serial_number', list(record['fields']), batch_size=self.batch_size
+                )
+            fields = dict(record['fields'])
+            fields['employee_id'] = self.resolve(fields.pop('employee'))
+            self._upserter.add(record['serial_number'], fields)
+        elif op == 'fingerprints':
+            FingerprintStore.write(record['sheet'], record['save'], record['delete'])
+        self.stats[f"{model} {op}"] += 1
+
+    def _update_employees(self, pending):
+        """Пачка обновлений сотрудников: pending — пары (pk, запись набора)"""
+        fields = sorted({field for _, record in pending for field in record['changes']})
+        current = {
+            values.pop('pk'): values
+            for values in Employee.objects.select_for_update()
+            .filter(pk__in=[pk for pk, _ in pending]).values('pk', *fields)
+        }
+        entries = []
+        for pk, record in pending:
+            # В JSON даты — строки: сравнение и запись после приведения к типу поля
+            values = current.get(pk)
+            old = {field: to_python(field, changes[0]) for field, changes in record['changes'].items()}
+            if values is None or any(values[field] != value for field, value in old.items()):
+                self.stats['conflicts'] += 1
+                self.log(f"⚠️ Конфликт: {record['fio']} изменён после построения набора (строка {record.get('row')})", 'warning')
+                continue
+            employee = Employee(pk=pk)
+            for field, value in record['fields'].items():
+                setattr(employee, field, to_python(field, value))
+            entries.append((employee, list(record['fields'])))
+        bulk_update_changed(Employee, entries, self.batch_size)
+
+    def flush(self):
+        pending, self._pending = self._pending, []
+        self._pending_pks = set()
+        if self._kind and self._kind[:2] == ('employee', 'create') and pending:
+            employees = [Employee(**record['fields']) for record in pending]
+            if connection.features.can_return_rows_from_bulk_insert:
+                Employee.objects.bulk_create(employees, batch_size=self.batch_size)
+            else:
+                for employee in employees:
+                    employee.save(force_insert=True)
+            for record, employee in zip(pending, employees):
+                self.planned[record['employee']['new']] = employee.pk
+        elif self._kind and self._kind[0] == 'employee' and pending:
+            self._update_employees(pending)
+        elif self._kind and self._kind[1] == 'free' and pending:
+            for start in range(0, len(pending), self.batch_size):
+                Equipment.objects.filter(pk__in=pending[start:start + self.batch_size]).update(employee=None)
+        if self._upserter is not None:
+            self._upserter.flush()
+            self._upserter = None
+
+
+def apply_change_set(lines, batch_size=1000, log=None):
+    """Применяет набор изменений (итерируемое строк JSONL) в одной транзакции"""
+    applier = ChangeSetApplier(batch_size=batch_size, log=log)
+    with transaction.atomic():
+        for line in lines:
+            if line.strip():
+                applier.apply(json.loads(line))
+        applier.flush()
+    return applier.stats
+
+
+def dry_run_guard():
+    """Контекст, в котором пишущие запросы запрещены"""
+    return connection.execute_wrapper(forbid_writes)
@@ -0,0 +1,115 @@
+# staff/import_fingerprints.py
+"""
+Инкрементальный импорт по отпечаткам строк.
+
+Для каждой строки листа хранится хэш её содержимого (ImportFingerprint),
+ключ — AD-логин, серийный номер или ФИО. При следующем запуске строка с тем
+же хэшем пропускается без обращения к ORM; применяются только новые
+и изменённые строки, отпечатки пропавших строк удаляются (при повторном
+появлении строка будет применена заново). Флаг full заставляет применить
+все строки, как при первом импорте.
+
+Для листов, где пропажа строки что-то значит (import_vanished), отпечатки
+пропавших строк хранятся (keep_vanished), пока их не применят с --prune.
+
+Ограничение: если данные в базе поменяли вручную (через интерфейс или
+админку), неизменившаяся строка листа их не перезапишет — для этого нужен
+полный прогон (--full).
+"""
+import hashlib
+from collections import Counter
+
+from .models import ImportFingerprint
+
+# Запас под лимит переменных SQLite в IN (...)
+DELETE_CHUNK = 500
+
+
+def row_digest(values):
+    """Хэш содержимого строки (значения уже нормализованы clean_cell)"""
+    return hashlib.sha1(repr(tuple(values)).encode('utf-8')).hexdigest()
+
+
+class FingerprintStore:
+    """
+    Отпечатки одного листа.
+
+    Использование:
+        store = FingerprintStore('Employment', full=options['full'])
+        for row_num, row in sheet.rows():
+            if not store.changed(key, row, row_num=row_num):
+                continue
+            ...  # применяем строку; при ошибке store.forget_row(row_num)
+        store.save()
+    """
+
+    def __init__(self, sheet, full=False, keep_vanished=False):
+        self.sheet = sheet
+        self.full = full
+        self.keep_vanished = keep_vanished
+        self.stored = dict(
+            ImportFingerprint.objects.filter(sheet=sheet).values_list('key', 'digest')
+        )
+        self.seen = {}
+        self.applied = 0
+        self.skipped = 0
+        self._occurrences = Counter()
+        self._forced = set()
+        self._slot_by_row = {}
+        self._failed = set()
+
+    def changed(self, key, values, row_num=None):
+        """True, если строку нужно применить"""
+        # Повторы одного ключа в листе хранятся отдельно: key, key#1, key#2...
+        occurrence = self._occurrences[key]
+        self._occurrences[key] += 1
+        slot = f"{key}#{occurrence}" if occurrence else key
+        digest = row_digest(values)
+        self.seen[slot] = digest
+        if row_num is not None:
+            self._slot_by_row[row_num] = slot
+
+        # Если одна из строк ключа применяется, применяем и все следующие с тем же
+        # ключом — иначе итог зависел бы от того, какая из них изменилась
+        if self.full or key in self._forced or self.stored.get(slot) != digest:
+            self._forced.add(key)
+            self.applied += 1
+            return True
+        self.skipped += 1
+        return False
+
+    def forget_row(self, row_num):
+        """Строку не удалось применить — не запоминаем её, в следующий раз она будет применена"""
+        slot = self._slot_by_row.pop(row_num, None)
+        if slot is not None:
+            self.seen.pop(slot, None)
+            self._failed.add(slot)
+
+    @property
+    def vanished(self):
+        """Ключи, которые были в листе при прошлом импорте и пропали в этом (строки с ошибкой не в счёт)"""
+        return set(self.stored) - set(self.seen) - self._failed
+
+    def pending(self):
+        """Отпечатки для записи и устаревшие ключи: (slot -> digest, [slot, ...])"""
+        changed = {slot: digest for slot, digest in self.seen.items() if self.stored.get(slot) != digest}
+        kept = self.vanished if self.keep_vanished else set()
+        stale = [slot for slot in self.stored if slot in changed or (slot not in self.seen and slot not in kept)]
+        return changed, stale
+
+    def save(self):
+        """Записывает отпечатки изменённых строк и удаляет отпечатки пропавших (кроме keep_vanished)"""
+        kept = self.vanished if self.keep_vanished else set()
+        self.write(self.sheet, *self.pending())
+        self.stored = {**{slot: self.stored[slot] for slot in kept}, **self.seen}
+
+    @staticmethod
+    def write(sheet, changed, stale):
+        for start in range(0, len(stale), DELETE_CHUNK):
+            ImportFingerprint.objects.filter(
+                sheet=sheet, key__in=stale[start:start + DELETE_CHUNK]
+            ).delete()
+        ImportFingerprint.objects.bulk_create(
+            [ImportFingerprint(sheet=sheet, key=slot, digest=digest) for slot, digest in changed.items()],
+            batch_size=DELETE_CHUNK,
+        )
@@ -0,0 +1,300 @@
+# staff/import_metrics.py
+"""
+Замеры импорта по этапам: чтение (read), разбор строки в поля (parse),
+сопоставление (match), сравнение (diff) и запись (write).
+
+Для каждого этапа копятся время, число SQL-запросов и пик памяти
+по tracemalloc. Этапы чередуются построчно, поэтому время считается
+по отрезкам: при входе в этап текущий отрезок закрывается и относится
+к предыдущему этапу, всё вне этапов попадает в other.
+
+Использование в команде:
+    class Command(ImportCommandMixin, BaseCommand):
+        def add_arguments(self, parser):
+            ...
+            self.add_import_arguments(parser)
+
+        def handle(self, *args, **options):
+            with self.open_workbook(file_path) as reader:  # загрузка книги — этап read
+                for row_num, row in self.metrics.timed(reader.sheet('Выдано').rows()):
+                    with self.metrics.stage('parse'):
+                        ...
+                    with self.metrics.stage('match'):
+                        ...
+                    self.say(f"✅ Создан: {fio}")  # молчит при --quiet
+"""
+import json
+import os
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+from django.core.management.base import ALL_CHECKS
+from django.db import connection, transaction
+
+from .import_changes import ChangeSet, apply_change_set, dry_run_guard
+from .import_fingerprints import FingerprintStore
+from .import_reader import WorkbookReader
+from .import_vanished import PRUNE_ACTIONS, prune
+from .sheet_spec import SpecImporter
+
+STAGES = ('read', 'parse', 'match', 'diff', 'write', 'other')
+
+
+class ImportMetrics:
+    """Счётчики по этапам; с enabled=False stage() и timed() ничего не делают"""
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.stats = {name: {'seconds': 0.0, 'queries': 0, 'peak_kb': 0.0} for name in STAGES}
+        self.total = 0.0
+        self._stack = []
+        self._mark = None
+        self._started = None
+        self._own_tracing = False
+        self._wrapper = None
+
+    def __enter__(self):
+        if not self.enabled:
+            return self
+        self._own_tracing = not tracemalloc.is_tracing()
+        if self._own_tracing:
+            tracemalloc.start()
+        self._wrapper = connection.execute_wrapper(self._count_query)
+        self._wrapper.__enter__()
+        self._started = self._mark = time.perf_counter()
+        tracemalloc.reset_peak()
+        return self
+
+    def __exit__(self, *exc_info):
+        if not self.enabled:
+            return
+        self._switch()
+        self.total = time.perf_counter() - self._started
+        self._wrapper.__exit__(*exc_info)
+        if self._own_tracing:
+            tracemalloc.stop()
+
+    def _current(self):
+        return self.stats[self._stack[-1] if self._stack else 'other']
+
+    def _switch(self):
+        """Закрывает текущий отрезок и относит его к этапу на вершине стека"""
+        now = time.perf_counter()
+        stats = self._current()
+        stats['seconds'] += now - self._mark
+        stats['peak_kb'] = max(stats['peak_kb'], tracemalloc.get_traced_memory()[1] / 1024)
+        tracemalloc.reset_peak()
+        self._mark = now
+
+    def _count_query(self, execute, sql, params, many, context):
+        self._current()['queries'] += 1
+        return execute(sql, params, many, context)
+
+    def stage(self, name):
+        if not self.enabled or self._started is None:
+            return nullcontext()
+        return self._stage(name)
+
+    @contextmanager
+    def _stage(self, name):
+        self._switch()
+        self._stack.append(name)
+        try:
+            yield
+        finally:
+            self._switch()
+            self._stack.pop()
+
+    def timed(self, rows, stage='read'):
+        """Итератор по rows, время получения каждой строки относится к stage"""
+        if not self.enabled:
+            yield from rows
+            return
+        rows = iter(rows)
+        while True:
+            with self.stage(stage):
+                try:
+                    row = next(rows)
+                except StopIteration:
+                    return
+            yield row
+
+    def report(self):
+        """Строки итоговой таблицы"""
+        lines = [f"{'этап':<8}{'сек':>9}{'доля':>8}{'запросов':>10}{'пик, КБ':>11}"]
+        for name, stats in self.stats.items():
+            share = stats['seconds'] / self.total * 100 if self.total else 0
+            lines.append(
+                f"{name:<8}{stats['seconds']:>9.2f}{share:>7.0f}%{stats['queries']:>10}{stats['peak_kb']:>11.0f}"
+            )
+        lines.append(f"{'всего':<8}{self.total:>9.2f}{'':>8}{sum(s['queries'] for s in self.stats.values()):>10}")
+        return lines
+
+    def as_dict(self):
+        return {'total_seconds': round(self.total, 3), 'stages': self.stats}
+
+    def write_json(self, path, **extra):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({**extra, **self.as_dict()}, f, ensure_ascii=False, indent=2)
+
+
+class ImportCommandMixin:
+    """
+    Общие опции команд импорта: --quiet (без построчных сообщений),
+    --metrics (таблица замеров по этапам) и --metrics-json (отчёт в файл).
+    Команды с incremental = True получают и --full / --prune (см. import_spec).
+
+    --dry-run выполняет команду, запрещая запись в базу: всё, что она записала
+    бы, уходит в набор изменений self.changes (import_changes.ChangeSet)
+    и сохраняется в --diff-out. --apply применяет сохранённый набор вместо
+    разбора книги. import_spec учитывает self.changes сам, остальной код
+    команды должен проверять его, если пишет в базу.
+    """
+
+    quiet = False
+    metrics = ImportMetrics(enabled=False)
+    incremental = False
+    full = False
+    prune = False
+    changes = None
+
+    def add_import_arguments(self, parser):
+        if self.incremental:
+            parser.add_argument('--full', action='store_true', help='Применить все строки, а не только изменившиеся с прошлого запуска')
+            parser.add_argument('--prune', action='store_true', help='Применить строки, пропавшие из листа: освободить оборудование (Выдано), уволить сотрудников (Employment)')
+        parser.add_argument('--dry-run', action='store_true', help='Ничего не записывать, а сохранить изменения в --diff-out')
+        parser.add_argument('--diff-out', type=str, default='changes.jsonl', help='Файл набора изменений для --dry-run (JSONL)')
+        parser.add_argument('--apply', type=str, metavar='CHANGES', help='Применить набор изменений, сохранённый --dry-run')
+        parser.add_argument('--quiet', action='store_true', help='Не выводить сообщения по каждой строке')
+        parser.add_argument('--metrics', action='store_true', help='Замеры по этапам: время, SQL-запросы, пик памяти (tracemalloc замедляет импорт)')
+        parser.add_argument('--metrics-json', type=str, help='Сохранить замеры по этапам в JSON')
+
+    @property
+    def command_name(self):
+        return self.__module__.rsplit('.', 1)[-1]
+
+    def execute(self, *args, **options):
+        self.quiet = options.get('quiet', False)
+        self.full = options.get('full', False)
+        self.prune = options.get('prune', False)
+        json_path = options.get('metrics_json')
+        self.metrics = ImportMetrics(enabled=bool(options.get('metrics') or json_path))
+        if self.requires_system_checks and not options.get('skip_checks'):
+            # Системные проверки Django — до замеров, иначе они попадают в other
+            if self.requires_system_checks == ALL_CHECKS:
+                self.check()
+            else:
+                self.check(tags=self.requires_system_checks)
+            options = {**options, 'skip_checks': True}
+        if options.get('apply'):
+            # Набор изменений применяется вместо handle() команды
+            self.handle = self.apply_changes
+        with self.metrics:
+            if options.get('dry_run'):
+                with open(options['diff_out'], 'w', encoding='utf-8') as stream, dry_run_guard():
+                    self.changes = ChangeSet(stream)
+                    result = super().execute(*args, **options)
+                self.report_changes(options['diff_out'])
+            else:
+                result = super().execute(*args, **options)
+        if self.metrics.enabled:
+            self.stdout.write(self.style.SUCCESS("⏱ Замеры по этапам:"))
+            for line in self.metrics.report():
+                self.stdout.write(f"   {line}")
+        if json_path:
+            self.metrics.write_json(json_path, command=self.command_name)
+            self.stdout.write(self.style.SUCCESS(f"💾 Замеры сохранены: {json_path}"))
+        return result
+
+    def report_changes(self, path):
+        self.stdout.write(self.style.SUCCESS(f"📝 Набор изменений: {path}"))
+        for name, value in sorted(self.changes.counts.items()):
+            self.stdout.write(self.style.SUCCESS(f"   {name}: {value}"))
+        self.stdout.write(self.style.SUCCESS('✅ Пробный прогон завершён, база не изменена'))
+
+    def apply_changes(self, *args, **options):
+        path = options['apply']
+        if not os.path.exists(path):
+            self.stdout.write(self.style.ERROR(f'Файл не найден: {path}'))
+            return
+        with open(path, encoding='utf-8') as stream:
+            stats = apply_change_set(stream, batch_size=options.get('batch_size') or 1000, log=self.log)
+
+        self.stdout.write(self.style.SUCCESS("📊 Применено:"))
+        for name, value in sorted(stats.items()):
+            self.stdout.write(self.style.SUCCESS(f"   {name}: {value}"))
+        self.stdout.write(self.style.SUCCESS('✅ Набор изменений применён!'))
+
+    def open_workbook(self, file_path):
+        """WorkbookReader; загрузка книги (openpyxl читает её при открытии) относится к этапу read"""
+        with self.metrics.stage('read'):
+            return WorkbookReader(file_path)
+
+    def say(self, message, style=None):
+        """Построчное сообщение: при --quiet не выводится"""
+        if not self.quiet:
+            self.stdout.write(style(message) if style else message)
+
+    def log(self, message, level='info'):
+        """Сообщение с уровнем ('info' / 'warning' / 'error') — для WorkbookSync и apply_change_set"""
+        style = {
+            'warning': self.style.WARNING,
+            'error': self.style.ERROR,
+        }.get(level, self.style.SUCCESS)
+        self.stdout.write(style(message))
+
+    def import_spec(self, reader, spec, batch_size=1000, on_result=None, index=None):
+        """
+        Импорт листа spec.sheet по описанию из sheet_specs (SpecImporter) в одной
+        транзакции. У команд с incremental = True строки, не изменившиеся
+        с прошлого запуска, пропускаются (отпечатки "<команда>:<лист>"),
+        с --prune применяются пропавшие (import_vanished). В --dry-run записи
+        и отпечатки уходят в self.changes.
+        Возвращает SpecImporter (stats, index, backfilled) или None, если листа нет;
+        итоги по отпечаткам выводит report_incremental().
+        """
+        if spec.sheet not in reader:
+            self.stdout.write(self.style.WARNING(f"Лист '{spec.sheet}' не найден в файле"))
+            return None
+        fingerprints = None
+        if self.incremental:
+            with self.metrics.stage('read'):
+                fingerprints = FingerprintStore(
+                    f'{self.command_name}:{spec.sheet}', full=self.full,
+                    keep_vanished=not self.prune and spec.sheet in PRUNE_ACTIONS,
+                )
+        importer = SpecImporter(
+            spec, index=index, batch_size=batch_size, on_result=on_result, metrics=self.metrics,
+            fingerprints=fingerprints, on_error=self.report_error, changes=self.changes,
+        )
+        with transaction.atomic():
+            importer.run(reader.sheet(spec.sheet))
+            if fingerprints is not None:
+                importer.vanished = fingerprints.vanished
+                with self.metrics.stage('write'):
+                    if self.prune and spec.sheet in PRUNE_ACTIONS:
+                        importer.stats['pruned'] = prune(
+                            spec.sheet, importer.vanished, index=importer.index, changes=self.changes
+                        )
+                    if self.changes is not None:
+                        self.changes.fingerprints(fingerprints)
+                    else:
+                        fingerprints.save()
+        return importer
+
+    def report_incremental(self, importer):
+        """Строки итогов инкрементального импорта: пропущенные, пропавшие, применённые --prune"""
+        if importer is None or importer.fingerprints is None:
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f"   Без изменений с прошлого импорта: {importer.fingerprints.skipped}, "
+            f"исчезло из листа: {len(importer.vanished)}"
+        ))
+        if 'pruned' in importer.stats:
+            self.stdout.write(self.style.SUCCESS(
+                f"   Пропавшие строки: {PRUNE_ACTIONS[importer.spec.sheet]} {importer.stats['pruned']}"
+            ))
+
+    def report_error(self, record, row_num, error):
+        self.stdout.write(self.style.ERROR(f"❌ Ошибка в строке {row_num}: {error}"))
@@ -0,0 +1,127 @@
+# staff/import_reader.py
+"""
+Потоковое чтение Excel-книг для команд импорта.
+
+Книга открывается в режиме read-only: openpyxl не строит модель всех листов
+в памяти, а разбирает XML нужного листа по мере итерации. Поэтому память
+не растёт с размером файла, а первая строка доступна сразу.
+
+CSV-файл (выгрузка export_workbook --format csv) читается как книга
+из одного листа, названного по имени файла: "Выдано.csv" -> лист "Выдано".
+"""
+import csv
+from pathlib import Path
+
+from openpyxl import load_workbook
+
+
+def clean_cell(value):
+    """Нормализация значения ячейки: None -> '', остальное -> str без пробелов по краям"""
+    if value is None:
+        return ''
+    return str(value).strip()
+
+
+class SheetReader:
+    """Ленивый доступ к строкам одного листа"""
+
+    def __init__(self, worksheet):
+        self.worksheet = worksheet
+        self.title = worksheet.title
+
+    def header(self, row=1):
+        """Заголовки листа в том же виде, что строили команды импорта"""
+        for values in self.worksheet.iter_rows(min_row=row, max_row=row, values_only=True):
+            return [str(h).strip() if h else f"col_{i}" for i, h in enumerate(values)]
+        return []
+
+    def rows(self, min_row=2, width=None, clean=True):
+        """
+        Генератор (номер_строки, кортеж_значений) начиная с min_row.
+        clean=True прогоняет каждую ячейку через clean_cell.
+        width дополняет короткие строки пустыми значениями, чтобы
+        обращение по фиксированному индексу (row[18]) не падало.
+        """
+        filler = '' if clean else None
+        for row_num, values in enumerate(
+            self.worksheet.iter_rows(min_row=min_row, values_only=True), start=min_row
+        ):
+            if clean:
+                values = tuple(clean_cell(value) for value in values)
+            if width and len(values) < width:
+                values = tuple(values) + (filler,) * (width - len(values))
+            yield row_num, values
+
+
+class CsvSheetReader(SheetReader):
+    """Лист из CSV-файла с тем же интерфейсом, что SheetReader"""
+
+    def __init__(self, file_path, title):
+        self.file_path = file_path
+        self.title = title
+
+    def _values(self, min_row):
+        # utf-8-sig: выгрузка пишется с BOM для Excel
+        with open(self.file_path, encoding='utf-8-sig', newline='') as f:
+            for row_num, values in enumerate(csv.reader(f), start=1):
+                if row_num >= min_row:
+                    yield row_num, values
+
+    def header(self, row=1):
+        for _, values in self._values(row):
+            return [h.strip() if h else f"col_{i}" for i, h in enumerate(values)]
+        return []
+
+    def rows(self, min_row=2, width=None, clean=True):
+        filler = '' if clean else None
+        for row_num, values in self._values(min_row):
+            values = tuple(clean_cell(value) if clean else (value or None) for value in values)
+            if width and len(values) < width:
+                values = values + (filler,) * (width - len(values))
+            yield row_num, values
+
+
+class WorkbookReader:
+    """
+    Обёртка над openpyxl в режиме read-only.
+
+    Использование:
+        with WorkbookReader(file_path) as reader:
+            if 'Выдано' in reader:
+                for row_num, row in reader.sheet('Выдано').rows():
+                    ...
+    """
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        if str(file_path).lower().endswith('.csv'):
+            self.workbook = None
+            self.csv_title = Path(file_path).stem
+        else:
+            self.workbook = load_workbook(file_path, read_only=True, data_only=True)
+
+    @property
+    def sheetnames(self):
+        return [self.csv_title] if self.workbook is None else self.workbook.sheetnames
+
+    def __contains__(self, sheet_name):
+        return sheet_name in self.sheetnames
+
+    def sheet(self, sheet_name):
+        if self.workbook is None:
+            if sheet_name != self.csv_title:
+                raise KeyError(sheet_name)
+            return CsvSheetReader(self.file_path, sheet_name)
+        return SheetReader(self.workbook[sheet_name])
+
+    def close(self):
+        # В read-only режиме openpyxl держит zip-архив открытым до явного закрытия
+        if self.workbook is not None:
+            self.workbook.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
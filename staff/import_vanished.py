@@ -0,0 +1,89 @@
+# staff/import_vanished.py
+"""
+Применение строк, пропавших из листа (--prune).
+
+FingerprintStore знает ключи, которые были в листе при прошлом импорте
+и пропали в этом (vanished). Без --prune они только считаются и остаются
+в отпечатках до запуска с --prune (keep_vanished); с --prune:
+
+    Выдано     — оборудование с пропавшим серийным номером освобождается;
+    Employment — активный сотрудник с пропавшим AD-логином / ФИО увольняется
+                 (как status_change.change_status: дата увольнения
+                 и освобождение оборудования).
+
+Для Dismissal и Свободное пропажа строки ничего не означает (сотрудник
+вернулся в Employment, оборудование выдано) — эти листы не трогаются.
+
+Из Employment сотрудник мог перейти в Dismissal, поэтому увольняются только
+сотрудники в статусе 'active': если Dismissal уже импортирован, статус взят
+из него. Ключи, известные только по строкам без серийного номера / ФИО
+("fio:..." в Выдано), не применяются.
+"""
+from datetime import date
+
+from .employee_index import EmployeeIndex
+from .models import Equipment
+from .status_change import MAX_EMPLOYEES, change_status
+
+FIO_PREFIX = 'fio:'
+
+# Лист -> что делается с пропавшими строками (для итогов команды)
+PRUNE_ACTIONS = {
+    'Выдано': 'освобождено оборудования',
+    'Employment': 'уволено сотрудников',
+}
+
+
+def vanished_employees(keys, index=None):
+    """Активные сотрудники по пропавшим ключам Employment (AD-логин или "fio:<ФИО>")"""
+    index = index or EmployeeIndex()
+    found = {}
+    for key in keys:
+        if key.startswith(FIO_PREFIX):
+            employee = index.find_exact(key[len(FIO_PREFIX):])
+        else:
+            employee = index.find_by_login(key)
+        if employee is not None and employee.pk and employee.status == 'active':
+            found[employee.pk] = employee
+    return list(found.values())
+
+
+def vanished_serials(keys):
+    return sorted(key for key in keys if not key.startswith(FIO_PREFIX))
+
+
+def prune(sheet, keys, index=None, changes=None):
+    """
+    Применяет пропавшие ключи листа sheet. С changes (dry-run, см. import_changes)
+    изменения уходят в набор. Возвращает число затронутых записей.
+    """
+    if not keys or sheet not in PRUNE_ACTIONS:
+        return 0
+
+    if sheet == 'Выдано':
+        serials = vanished_serials(keys)
+        if changes is not None:
+            return changes.free_equipment(serials, sheet)
+        freed = 0
+        for start in range(0, len(serials), MAX_EMPLOYEES):
+            freed += Equipment.objects.filter(
+                serial_number__in=serials[start:start + MAX_EMPLOYEES], employee__isnull=False
+            ).update(employee=None)
+        return freed
+
+    employees = vanished_employees(keys, index)
+    if changes is not None:
+        today = date.today()
+        changes.release_equipment(employees, sheet)
+        for employee in employees:
+            old = {'status': employee.status, 'dismissal_date': employee.dismissal_date}
+            employee.status, employee.dismissal_date = 'dismissed', today
+            changes.update_employee(employee, old, sheet, None)
+        return len(employees)
+
+    dismissed = 0
+    pks = [employee.pk for employee in employees]
+    for start in range(0, len(pks), MAX_EMPLOYEES):
+        updated, _, _ = change_status(pks[start:start + MAX_EMPLOYEES], 'dismissed')
+        dismissed += updated
+    return dismissed
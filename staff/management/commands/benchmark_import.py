@@ -0,0 +1,139 @@
+# staff/management/commands/benchmark_import.py
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test.utils import override_settings
+
+from staff.workbook_generator import generate_workbook
+
+# Имя -> (команда, аргументы, подготовка базы, листы, по которым считаются строки)
+BENCHMARKS = {
+    'employees': ('import_employees_complete', ['--full'], [], ['Employment']),
+    'dismissal': ('import_dismissal_fixed', [], ['import_employees_complete'], ['Dismissal']),
+    'dismissed_data': ('update_dismissed_data', [], ['import_employees_complete'], ['Dismissal']),
+    'equipment': ('import_equipment', ['--full'], ['import_employees_complete'], ['Выдано']),
+    'positions': ('update_positions_offices', [], ['import_employees_complete'], ['Выдано']),
+    'sync': ('sync_workbook', ['--full'], [], ['Employment', 'Dismissal', 'Выдано']),
+}
+
+WORKER_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'import-benchmark'},
+}
+
+
+class Command(BaseCommand):
+    help = 'Замер скорости импорта на синтетических книгах (строк/с, SQL-запросов, пиковый RSS)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=str, default='1000,10000,100000', help='Размеры книг через запятую')
+        parser.add_argument('--only', type=str, help=f"Замеры через запятую: {', '.join(BENCHMARKS)}")
+        parser.add_argument('--duplicates', type=float, default=0.02, help='Доля строк-повторов')
+        parser.add_argument('--ambiguity', type=float, default=0.02, help='Доля неоднозначных "Фамилия Имя"')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--json-out', type=str, help='Сохранить результаты в JSON')
+        # Внутренний режим: один замер в отдельном процессе на чистой базе
+        parser.add_argument('--worker', type=str, help='(служебный) выполнить один замер')
+        parser.add_argument('--file', type=str)
+        parser.add_argument('--db', type=str)
+
+    def handle(self, *args, **options):
+        if options['worker']:
+            self.run_worker(options['worker'], options['file'], options['db'])
+            return
+
+        names = options['only'].split(',') if options['only'] else list(BENCHMARKS)
+        unknown = set(names) - set(BENCHMARKS)
+        if unknown:
+            raise CommandError(f"Неизвестные замеры: {', '.join(sorted(unknown))}")
+        sizes = [int(size) for size in options['sizes'].split(',')]
+
+        results = []
+        with tempfile.TemporaryDirectory(prefix='import-bench-') as tmp:
+            for size in sizes:
+                path = os.path.join(tmp, f'bench_{size}.xlsx')
+                self.stdout.write(f"📄 Генерация книги на {size} строк...")
+                rows = generate_workbook(
+                    path, size, duplicates=options['duplicates'],
+                    ambiguity=options['ambiguity'], seed=options['seed'],
+                )
+                for name in names:
+                    result = self.run_benchmark(name, path, os.path.join(tmp, f'{name}_{size}.sqlite3'))
+                    result.update(size=size, rows=sum(rows[sheet] for sheet in BENCHMARKS[name][3]))
+                    result['rows_per_sec'] = round(result['rows'] / result['seconds'], 1) if result['seconds'] else None
+                    results.append(result)
+                    self.stdout.write(self.format_row(result))
+
+        self.stdout.write(self.style.SUCCESS("📊 Итоги:"))
+        self.stdout.write(f"{'замер':<16}{'строк':>9}{'сек':>10}{'строк/с':>11}{'запросов':>11}{'RSS, МБ':>10}")
+        for result in results:
+            self.stdout.write(self.format_row(result))
+        if options['json_out']:
+            with open(options['json_out'], 'w', encoding='utf-8') as f:
+                json.dump(results, f, ensure_ascii=False, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"💾 Результаты сохранены: {options['json_out']}"))
+
+    def run_benchmark(self, name, path, db):
+        """Запускает замер в отдельном процессе, чтобы пиковый RSS относился только к нему"""
+        process = subprocess.run(
+            [
+                sys.executable, str(settings.BASE_DIR / 'manage.py'), 'benchmark_import',
+                '--worker', name, '--file', path, '--db', db,
+            ],
+            capture_output=True, text=True,
+        )
+        if process.returncode != 0:
+            self.stdout.write(self.style.ERROR(f"❌ {name}: {process.stderr.strip().splitlines()[-1:]}"))
+            return {'name': name, 'seconds': None, 'queries': None, 'peak_rss_mb': None, 'error': process.stderr}
+        return json.loads(process.stdout.strip().splitlines()[-1])
+
+    def run_worker(self, name, path, db):
+        command, command_args, setup, _ = BENCHMARKS[name]
+
+        # Чистая база SQLite для каждого замера
+        connection = connections['default']
+        connection.close()
+        connection.settings_dict['NAME'] = db
+        call_command('migrate', verbosity=0, interactive=False)
+
+        # И свой кэш в памяти процесса: замер не сбрасывает сводку и версии панелей
+        # работающего сайта и не зависит от того, что в общем кэше осталось от прошлых
+        with override_settings(CACHES=WORKER_CACHES), \
+                open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+            for setup_command in setup:
+                call_command(setup_command, '--file', path, stdout=devnull)
+
+            queries = 0
+
+            def count_queries(execute, sql, params, many, context):
+                nonlocal queries
+                queries += 1
+                return execute(sql, params, many, context)
+
+            with connection.execute_wrapper(count_queries):
+                started = time.perf_counter()
+                call_command(command, '--file', path, *command_args, stdout=devnull)
+                seconds = time.perf_counter() - started
+
+        # ru_maxrss в Linux — в килобайтах
+        peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        self.stdout.write(json.dumps({
+            'name': name, 'seconds': round(seconds, 3), 'queries': queries, 'peak_rss_mb': round(peak_rss, 1),
+        }))
+
+    def format_row(self, result):
+        if result['seconds'] is None:
+            return f"{result['name']:<16}{result.get('rows', ''):>9}{'ошибка':>10}"
+        return (
+            f"{result['name']:<16}{result['rows']:>9}{result['seconds']:>10.2f}"
+            f"{result['rows_per_sec'] or 0:>11.0f}{result['queries']:>11}{result['peak_rss_mb']:>10.1f}"
+        )
@@ -0,0 +1,38 @@
+# staff/management/commands/export_workbook.py
+import os
+import time
+from django.core.management.base import BaseCommand, CommandError
+from staff.workbook_export import SHEETS, write_csv, write_xlsx
+
+class Command(BaseCommand):
+    help = 'Выгрузка базы в формате книги ТМЦ (листы и колонки как у импорта) — XLSX или CSV'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--file', type=str, default='ТМЦ выгрузка.xlsx',
+                            help='XLSX-файл; для --format csv — папка, куда пишутся файлы "<лист>.csv"')
+        parser.add_argument('--format', type=str, choices=['xlsx', 'csv'], default='xlsx')
+        parser.add_argument('--sheet', type=str, action='append', choices=list(SHEETS),
+                            help='Лист для выгрузки (можно несколько раз); по умолчанию все')
+
+    def handle(self, *args, **options):
+        target = options['file']
+        sheets = options['sheet'] or list(SHEETS)
+        started = time.perf_counter()
+
+        if options['format'] == 'xlsx':
+            self.stdout.write(f"📤 Выгрузка в {target}...")
+            counts = write_xlsx(target, sheets)
+        else:
+            if os.path.splitext(target)[1].lower() == '.xlsx':
+                raise CommandError('Для --format csv в --file укажите папку')
+            os.makedirs(target, exist_ok=True)
+            self.stdout.write(f"📤 Выгрузка CSV в папку {target}...")
+            counts = {}
+            for name in sheets:
+                counts[name] = write_csv(os.path.join(target, f'{name}.csv'), name)
+
+        for name, count in counts.items():
+            self.stdout.write(f"   {name}: {count} строк")
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Выгрузка завершена за {time.perf_counter() - started:.2f} с"
+        ))
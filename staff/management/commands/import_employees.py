@@ -1,13 +1,18 @@
 import os
 from django.core.management.base import BaseCommand
-from openpyxl import load_workbook
-from staff.models import Employee
+from staff.import_metrics import ImportCommandMixin
+from staff.sheet_specs import EMPLOYMENT
 
-class Command(BaseCommand):
+# Только создание отсутствующих (по логину, затем точному ФИО): существующие не меняются
+EMPLOYMENT_NEW = EMPLOYMENT.replace(update_fields=[])
+
+class Command(ImportCommandMixin, BaseCommand):
     help = 'Импорт сотрудников из вкладки Employment'
 
     def add_arguments(self, parser):
         parser.add_argument('--file', type=str, help='Путь к Excel-файлу', default='ТМЦ макет.xlsx')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Размер пачки для записи сотрудников')
+        self.add_import_arguments(parser)
 
     def handle(self, *args, **options):
         file_path = options['file']
@@ -15,59 +20,12 @@ class Command(BaseCommand):
             self.stdout.write(self.style.ERROR(f'Файл не найден: {file_path}'))
             return
 
-        wb = load_workbook(file_path, data_only=True)
-        
-        if 'Employment' in wb.sheetnames:
-            ws = wb['Employment']
-            self.parse_employees(ws)
-        
-        self.stdout.write(self.style.SUCCESS('✅ Импорт сотрудников завершён!'))
+        with self.open_workbook(file_path) as reader:
+            importer = self.import_spec(reader, EMPLOYMENT_NEW, options['batch_size'], on_result=self.report_row)
 
-    def clean_cell(self, value):
-        if value is None:
-            return ''
-        return str(value).strip()
+        if importer:
+            self.stdout.write(self.style.SUCCESS(f"📊 Создано: {importer.stats['created']}"))
+        self.stdout.write(self.style.SUCCESS('✅ Импорт сотрудников завершён!'))
 
-    def parse_employees(self, ws):
-        # Заголовки в строке 1
-        headers = ['num', 'first_last', 'middle', 'ad_login', 'pass_field']
-        
-        created_count = 0
-        
-        for row_num, row in enumerate(ws.iter_rows(min_row=2, values_only=True), start=2):
-            if not row[1]:  # Пропускаем пустые строки (колонка ФИ)
-                continue
-                
-            first_last = self.clean_cell(row[1])  # ФИ (Фамилия Имя)
-            middle = self.clean_cell(row[2])      # Отчество
-            ad_login = self.clean_cell(row[3])    # AD логин
-            
-            # Формируем полное ФИО
-            if first_last and middle:
-                fio = f"{first_last} {middle}"
-            else:
-                fio = first_last
-                
-            if not fio or fio.strip() == '':
-                continue
-                
-            # Создаем сотрудника
-            employee, created = Employee.objects.get_or_create(
-                ad_login=ad_login if ad_login else None,
-                defaults={
-                    'fio': fio.strip(),
-                    'first_name': '',
-                    'last_name': '', 
-                    'middle_name': middle,
-                    'status': 'active',
-                    'office': 'remote'
-                }
-            )
-            
-            if created:
-                created_count += 1
-                self.stdout.write(self.style.SUCCESS(f"✅ Создан: {fio} (AD: {ad_login})"))
-            else:
-                self.stdout.write(self.style.WARNING(f"⚠️ Уже существует: {fio}"))
-                
-        self.stdout.write(self.style.SUCCESS(f"📊 Создано сотрудников: {created_count}"))
\ No newline at end of file
+    def report_row(self, record, created):
+        self.say(f"✅ Создан: {record['fio']} (AD: {record['ad_login']})", self.style.SUCCESS)
@@ -0,0 +1,36 @@
+import os
+from django.core.management.base import BaseCommand
+from staff.import_metrics import ImportCommandMixin
+from staff.sheet_specs import SPECS
+
+class Command(ImportCommandMixin, BaseCommand):
+    help = 'Импорт одного листа книги ТМЦ по его описанию из sheet_specs'
+    incremental = True
+
+    def add_arguments(self, parser):
+        parser.add_argument('--file', type=str, help='Путь к Excel-файлу', default='ТМЦ макет.xlsx')
+        parser.add_argument('--sheet', type=str, required=True, choices=list(SPECS), help='Лист книги')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Размер пачки для записи')
+        self.add_import_arguments(parser)
+
+    def handle(self, *args, **options):
+        file_path = options['file']
+        if not os.path.exists(file_path):
+            self.stdout.write(self.style.ERROR(f'Файл не найден: {file_path}'))
+            return
+
+        spec = SPECS[options['sheet']]
+        self.stdout.write(f"📊 Начало парсинга листа '{spec.sheet}'")
+        with self.open_workbook(file_path) as reader:
+            importer = self.import_spec(reader, spec, options['batch_size'], on_result=self.report_row)
+        if importer is None:
+            return
+
+        line = ', '.join(f"{name}: {value}" for name, value in importer.stats.items())
+        self.stdout.write(self.style.SUCCESS(f"📊 Итоги: {line}"))
+        self.report_incremental(importer)
+        self.stdout.write(self.style.SUCCESS(f"✅ Импорт листа '{spec.sheet}' завершён!"))
+
+    def report_row(self, record, created):
+        name = record.get('fio') or record.get('serial_number')
+        self.say(f"{'✅ Создан' if created else '🔄 Обновлен'}: {name}")
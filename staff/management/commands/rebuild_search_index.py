@@ -0,0 +1,21 @@
+# staff/management/commands/rebuild_search_index.py
+import time
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from staff import search_index
+
+class Command(BaseCommand):
+    help = 'Полная пересборка полнотекстового индекса (SQLite FTS5) сотрудников и оборудования'
+
+    def handle(self, *args, **options):
+        if not search_index.is_enabled():
+            self.stdout.write(self.style.ERROR('❌ Индекс недоступен: нужна SQLite с FTS5 и применённые миграции'))
+            return
+
+        started = time.perf_counter()
+        with transaction.atomic():
+            employees, equipment = search_index.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Индекс пересобран за {time.perf_counter() - started:.2f} с: "
+            f"сотрудников {employees}, оборудования {equipment}"
+        ))
@@ -0,0 +1,28 @@
+# staff/management/commands/sync_ad_status.py
+import time
+from django.core.management.base import BaseCommand
+from staff import ad_status
+from staff.ad_service import CONNECTION_ERRORS, PAGE_SIZE
+
+class Command(BaseCommand):
+    help = 'Статусы учётных записей AD всех сотрудников одним постраничным поиском -> таблица ADAccountStatus'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--page-size', type=int, default=PAGE_SIZE, help='Размер страницы LDAP-поиска')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        try:
+            stats = ad_status.sync_statuses(page_size=options['page_size'])
+        except CONNECTION_ERRORS as e:
+            self.stdout.write(self.style.ERROR(f'❌ Нет связи с AD: {e}'))
+            return
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Статусы AD обновлены за {time.perf_counter() - started:.2f} с: "
+            f"учётных записей в AD {stats['ad_users']}, сотрудников с логином {stats['employees']}"
+        ))
+        self.stdout.write(
+            f"   🔒 заблокировано: {stats['locked']}, ⛔ отключено: {stats['disabled']}, "
+            f"⚠️ не найдено в AD: {stats['not_found']}"
+        )
@@ -0,0 +1,48 @@
+# staff/management/commands/sync_workbook.py
+import os
+from django.core.management.base import BaseCommand
+from staff.import_metrics import ImportCommandMixin
+from staff.workbook_sync import WorkbookSync
+
+class Command(ImportCommandMixin, BaseCommand):
+    help = 'Полная синхронизация из книги ТМЦ за один проход: Employment, Dismissal, Выдано, Свободное'
+    incremental = True
+
+    def add_arguments(self, parser):
+        parser.add_argument('--file', type=str, help='Путь к Excel-файлу', default='ТМЦ макет.xlsx')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Размер пачки для записи оборудования')
+        self.add_import_arguments(parser)
+
+    def handle(self, *args, **options):
+        file_path = options['file']
+        if not os.path.exists(file_path):
+            self.stdout.write(self.style.ERROR(f'Файл не найден: {file_path}'))
+            return
+
+        # Построчные сообщения только при -v 2, иначе они доминируют во времени работы
+        verbose = options['verbosity'] >= 2 and not self.quiet
+
+        # В --dry-run (self.changes) синхронизация пишет в набор изменений, а не в базу
+        with self.open_workbook(file_path) as reader:
+            sync = WorkbookSync(
+                reader,
+                batch_size=options['batch_size'],
+                log=self.log if verbose else None,
+                full=self.full,
+                prune=self.prune,
+                changes=self.changes,
+                metrics=self.metrics,
+            )
+            stats = sync.run()
+
+        self.stdout.write(self.style.SUCCESS("📊 Итоги синхронизации:"))
+        for stage, counters in stats.items():
+            line = ', '.join(f"{name}: {value}" for name, value in counters.items())
+            self.stdout.write(self.style.SUCCESS(f"   {stage}: {line}"))
+        if sync.index.ambiguous:
+            self.stdout.write(self.style.WARNING(f"   Неоднозначные имена: {len(sync.index.ambiguous)}"))
+            for name, fios in sync.index.ambiguous.items():
+                self.stdout.write(self.style.WARNING(f"      '{name}': {', '.join(fios)}"))
+
+        if self.changes is None:
+            self.stdout.write(self.style.SUCCESS('✅ Синхронизация завершена!'))
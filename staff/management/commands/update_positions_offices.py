@@ -1,14 +1,16 @@
 # staff/management/commands/update_positions_offices.py
 import os
 from django.core.management.base import BaseCommand
-from openpyxl import load_workbook
-from staff.models import Employee
+from staff.import_metrics import ImportCommandMixin
+from staff.sheet_specs import POSITIONS
 
-class Command(BaseCommand):
+class Command(ImportCommandMixin, BaseCommand):
     help = 'Обновление должностей и офисов из вкладки Выдано'
 
     def add_arguments(self, parser):
         parser.add_argument('--file', type=str, help='Путь к Excel-файлу', default='ТМЦ макет.xlsx')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Размер пачки для записи сотрудников')
+        self.add_import_arguments(parser)
 
     def handle(self, *args, **options):
         file_path = options['file']
@@ -16,66 +18,16 @@ class Command(BaseCommand):
             self.stdout.write(self.style.ERROR(f'Файл не найден: {file_path}'))
             return
 
-        wb = load_workbook(file_path, data_only=True)
-        
-        if 'Выдано' in wb.sheetnames:
-            ws = wb['Выдано']
-            self.update_from_equipment(ws)
-            
-        self.stdout.write(self.style.SUCCESS('✅ Обновление должностей и офисов завершено!'))
-
-    def clean_cell(self, value):
-        if value is None:
-            return ''
-        return str(value).strip()
-
-    def update_from_equipment(self, ws):
         self.stdout.write("📊 Обновление из вкладки Выдано")
-        
-        updated_positions = 0
-        updated_offices = 0
-        
-        # Пропускаем заголовок
-        headers = next(ws.iter_rows(min_row=1, max_row=1, values_only=True))
-        
-        for row_num, row in enumerate(ws.iter_rows(min_row=2, values_only=True), start=2):
-            try:
-                if not row[0]:  # Пропускаем пустые строки (ФИО сотрудника)
-                    continue
-                    
-                fio_excel = self.clean_cell(row[0])  # ФИО сотрудника
-                position = self.clean_cell(row[1])   # должность
-                office = self.clean_cell(row[2])     # офис
-                
-                if not fio_excel:
-                    continue
-                
-                # Ищем сотрудника по ФИО (в Excel только "Фамилия Имя")
-                employee = Employee.objects.filter(fio__startswith=fio_excel).first()
-                
-                if employee:
-                    update_fields = []
-                    
-                    # Обновляем должность
-                    if position and (not employee.position or employee.position.strip() == ''):
-                        employee.position = position
-                        update_fields.append('position')
-                        updated_positions += 1
-                        self.stdout.write(f"   💼 Должность для {employee.fio}: {position}")
-                    
-                    # Обновляем офис
-                    if office and office.upper() in dict(Employee.OFFICE_CHOICES):
-                        if employee.office == 'remote' or not employee.office:
-                            employee.office = office.upper()
-                            update_fields.append('office')
-                            updated_offices += 1
-                            self.stdout.write(f"   🏢 Офис для {employee.fio}: {office.upper()}")
-                    
-                    if update_fields:
-                        employee.save(update_fields=update_fields)
-                        
-            except Exception as e:
-                self.stdout.write(self.style.ERROR(f"❌ Ошибка в строке {row_num}: {str(e)}"))
-                
-        self.stdout.write(self.style.SUCCESS(f"📊 Обновлено должностей: {updated_positions}"))
-        self.stdout.write(self.style.SUCCESS(f"📊 Обновлено офисов: {updated_offices}"))
\ No newline at end of file
+        with self.open_workbook(file_path) as reader:
+            # Сотрудник — по началу ФИО; заполняются пустая должность и офис тех, кто на удалёнке
+            importer = self.import_spec(reader, POSITIONS, options['batch_size'])
+
+        if importer:
+            self.stdout.write(self.style.SUCCESS(f"📊 Обновлено должностей: {importer.backfilled['position']}"))
+            self.stdout.write(self.style.SUCCESS(f"📊 Обновлено офисов: {importer.backfilled['office']}"))
+            if importer.index.ambiguous:
+                self.stdout.write(self.style.WARNING(f"⚠️ Неоднозначные имена (взят первый): {len(importer.index.ambiguous)}"))
+                for name, fios in importer.index.ambiguous.items():
+                    self.stdout.write(self.style.WARNING(f"   '{name}': {', '.join(fios)}"))
+        self.stdout.write(self.style.SUCCESS('✅ Обновление должностей и офисов завершено!'))
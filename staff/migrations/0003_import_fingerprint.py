@@ -0,0 +1,27 @@
+# Generated by Django 4.2.25 on 2026-10-18 02:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('staff', '0002_remove_employee_password_employee_pass_3cx_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportFingerprint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sheet', models.CharField(max_length=50, verbose_name='Лист')),
+                ('key', models.CharField(max_length=300, verbose_name='Ключ строки')),
+                ('digest', models.CharField(max_length=40, verbose_name='Хэш')),
+                ('imported_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='importfingerprint',
+            constraint=models.UniqueConstraint(fields=('sheet', 'key'), name='unique_import_fingerprint'),
+        ),
+    ]
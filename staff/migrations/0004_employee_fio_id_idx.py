@@ -0,0 +1,17 @@
+# Generated by Django 4.2.25 on 2026-10-18 03:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('staff', '0003_import_fingerprint'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='employee',
+            index=models.Index(fields=['fio', 'id'], name='employee_fio_id_idx'),
+        ),
+    ]
@@ -0,0 +1,72 @@
+# Полнотекстовый индекс FTS5 (см. staff/search_index.py); на других СУБД не создаётся.
+# Схема и первое заполнение зафиксированы здесь, а не берутся из search_index:
+# миграция не должна меняться вместе с кодом приложения.
+
+from django.db import migrations
+
+# Префиксные индексы на 2 и 3 символа ускоряют короткие запросы при наборе
+TABLE_OPTIONS = "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'"
+
+EMPLOYEE_COLUMNS = ('fio', 'ad_login', 'email', 'sip_number', 'phone', 'position')
+EQUIPMENT_COLUMNS = ('serial_number', 'model', 'mac_address', 'ip_or_anydesk', 'comment')
+
+
+class SQLiteRunSQL(migrations.RunSQL):
+    """RunSQL только для SQLite"""
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'sqlite':
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'sqlite':
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
+
+
+def fold(value):
+    # Как search_index._fold: без NULL и с ё -> е
+    return (value or '').replace('ё', 'е').replace('Ё', 'Е')
+
+
+def fill_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != 'sqlite':
+        return
+    Employee = apps.get_model('staff', 'Employee')
+    Equipment = apps.get_model('staff', 'Equipment')
+    db = connection.alias
+
+    employees = Employee.objects.using(db).values_list('pk', *EMPLOYEE_COLUMNS)
+    equipment = Equipment.objects.using(db).values_list('pk', *EQUIPMENT_COLUMNS, 'employee__fio')
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f"INSERT INTO staff_employee_fts(rowid, {', '.join(EMPLOYEE_COLUMNS)}) VALUES (%s, %s, %s, %s, %s, %s, %s)",
+            [(pk, *map(fold, values)) for pk, *values in employees.iterator()],
+        )
+        cursor.executemany(
+            f"INSERT INTO staff_equipment_fts(rowid, {', '.join(EQUIPMENT_COLUMNS)}, holder_fio) VALUES (%s, %s, %s, %s, %s, %s, %s)",
+            [(pk, *map(fold, values)) for pk, *values in equipment.iterator()],
+        )
+        cursor.execute("INSERT INTO staff_employee_fts(staff_employee_fts) VALUES ('optimize')")
+        cursor.execute("INSERT INTO staff_equipment_fts(staff_equipment_fts) VALUES ('optimize')")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('staff', '0004_employee_fio_id_idx'),
+    ]
+
+    operations = [
+        SQLiteRunSQL(
+            sql=[
+                f"CREATE VIRTUAL TABLE staff_employee_fts USING fts5({', '.join(EMPLOYEE_COLUMNS)}, {TABLE_OPTIONS})",
+                f"CREATE VIRTUAL TABLE staff_equipment_fts USING fts5({', '.join(EQUIPMENT_COLUMNS)}, holder_fio, {TABLE_OPTIONS})",
+            ],
+            reverse_sql=[
+                "DROP TABLE staff_employee_fts",
+                "DROP TABLE staff_equipment_fts",
+            ],
+        ),
+        migrations.RunPython(fill_index, migrations.RunPython.noop),
+    ]
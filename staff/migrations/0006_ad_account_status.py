@@ -0,0 +1,26 @@
+# Generated by Django 4.2.25 on 2026-10-18 03:40
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('staff', '0005_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ADAccountStatus',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('found', models.BooleanField(default=False, verbose_name='Найден в AD')),
+                ('locked', models.BooleanField(default=False, verbose_name='Заблокирован')),
+                ('disabled', models.BooleanField(default=False, verbose_name='Отключён')),
+                ('display_name', models.CharField(blank=True, max_length=255, verbose_name='Отображаемое имя')),
+                ('fetched_at', models.DateTimeField(verbose_name='Получен')),
+                ('employee', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='ad_account', to='staff.employee', verbose_name='Сотрудник')),
+            ],
+        ),
+    ]
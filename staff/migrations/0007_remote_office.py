@@ -0,0 +1,21 @@
+# Импорт оборудования записывал неизвестный или пустой офис как 'REMOTE',
+# которого нет в OFFICE_CHOICES (удалёнка — 'remote'). Исправляем уже записанные.
+
+from django.db import migrations
+
+
+def fix_remote_office(apps, schema_editor):
+    db = schema_editor.connection.alias
+    for model in ('Employee', 'Equipment'):
+        apps.get_model('staff', model).objects.using(db).filter(office='REMOTE').update(office='remote')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('staff', '0006_ad_account_status'),
+    ]
+
+    operations = [
+        migrations.RunPython(fix_remote_office, migrations.RunPython.noop),
+    ]
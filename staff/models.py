@@ -1,9 +1,240 @@
 # staff/models.py
+import logging
+from contextvars import ContextVar
+
 from django.db import models
-from django.db.models.signals import pre_save
+from django.db.models import OuterRef, Subquery
+from django.db.models.lookups import Exact, In
+from django.db.models.sql.where import AND
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
 from django.dispatch import receiver
 
-class Employee(models.Model):
+from . import employee_panel, search_index
+from .dashboard_summary import invalidate_summary
+from .employee_typeahead import invalidate_active_employees
+from .equipment_pagination import invalidate_counts
+
+logger = logging.getLogger(__name__)
+
+# QuerySet.bulk_update пишет через update() — хуки для этих строк выполняет сам bulk_update
+_in_bulk_update = ContextVar('in_bulk_update', default=False)
+
+
+def invalidate_caches(model):
+    """
+    Сводка дашборда и счётчики страниц equipment_list устаревают при любой
+    записи, список подсказок сотрудников — только при записи сотрудников
+    """
+    invalidate_summary()
+    invalidate_counts()
+    if model._meta.model_name == 'employee':
+        invalidate_active_employees()
+
+
+class SummaryQuerySet(models.QuerySet):
+    """
+    Массовые операции не вызывают сигналов save/delete — кэши (invalidate_caches),
+    версии панелей сотрудников (employee_panel) и поисковый индекс (search_index)
+    обновляем сами
+    """
+
+    def update(self, **kwargs):
+        if _in_bulk_update.get():
+            return super().update(**kwargs)
+        field = employee_panel.panel_field(self.model)
+        pks = self._filtered_pks() if field == 'pk' else None
+        if pks is not None:
+            # Панель сотрудника — по его pk, а pk отобраны фильтром: SELECT не нужен
+            before = [(pk, pk) for pk in pks]
+        else:
+            # Затронутые строки — до UPDATE: после него фильтр queryset может уже не совпадать
+            before = list(self.values_list('pk', field))
+        rows = super().update(**kwargs)
+        if rows:
+            invalidate_caches(self.model)
+            employee_panel.invalidate_panels([holder for _, holder in before] + [employee_panel.assigned_id(kwargs)])
+            if search_index.affects(self.model, kwargs):
+                search_index.reindex(self.model, [pk for pk, _ in before], kwargs)
+        return rows
+
+    def delete(self):
+        # Сигналы post_delete вызываются для каждого объекта — индекс обновят они
+        result = super().delete()
+        invalidate_caches(self.model)
+        return result
+
+    def bulk_create(self, objs, *args, **kwargs):
+        # objs читается и здесь, и в super() — генератор был бы исчерпан до записи
+        objs = list(objs)
+        # При update_conflicts существующее оборудование может уйти от прежнего держателя
+        held = self._held_by_keys(objs, kwargs.get('unique_fields')) if kwargs.get('update_conflicts') else []
+        created = super().bulk_create(objs, *args, **kwargs)
+        if created:
+            invalidate_caches(self.model)
+            pks = self._created_pks(created, kwargs.get('unique_fields'))
+            field = employee_panel.panel_field(self.model)
+            employee_panel.invalidate_panels(held + (pks if field == 'pk' else [obj.employee_id for obj in created]))
+            if search_index.is_enabled():
+                search_index.reindex(self.model, pks)
+        return created
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        objs = list(objs)
+        field = employee_panel.panel_field(self.model)
+        held = self._held_by_pks([obj.pk for obj in objs]) if field in fields or 'employee' in fields else []
+        token = _in_bulk_update.set(True)
+        try:
+            rows = super().bulk_update(objs, fields, *args, **kwargs)
+        finally:
+            _in_bulk_update.reset(token)
+        if rows:
+            invalidate_caches(self.model)
+            employee_panel.invalidate_panels(held + [getattr(obj, field) for obj in objs])
+            if search_index.affects(self.model, fields):
+                search_index.reindex(self.model, [obj.pk for obj in objs], fields)
+        return rows
+
+    def _filtered_pks(self):
+        """
+        pk из filter(pk=...) / filter(pk__in=[...]) — строки queryset без запроса
+        (может быть и лишний pk, которого нет в базе); None — отбор не по pk
+        """
+        where = self.query.where
+        if where.connector != AND or where.negated or self.query.is_sliced:
+            return None
+        for lookup in where.children:
+            if isinstance(lookup, (Exact, In)) and getattr(lookup.lhs, 'target', None) is self.model._meta.pk \
+                    and not hasattr(lookup.rhs, 'resolve_expression'):
+                return [lookup.rhs] if isinstance(lookup, Exact) else list(lookup.rhs)
+        return None
+
+    def _held_by(self, field, values):
+        """Держатели (для сотрудников — сами они) строк, у которых field в values — до записи"""
+        holders = []
+        for start in range(0, len(values), search_index.CHUNK_SIZE):
+            holders.extend(self.model._default_manager.filter(
+                **{f'{field}__in': values[start:start + search_index.CHUNK_SIZE]}
+            ).values_list(employee_panel.panel_field(self.model), flat=True))
+        return holders
+
+    def _held_by_pks(self, pks):
+        return self._held_by('pk', [pk for pk in pks if pk is not None])
+
+    def _held_by_keys(self, objs, unique_fields):
+        if not unique_fields or len(unique_fields) != 1:
+            return []
+        field = unique_fields[0]
+        return self._held_by(field, [getattr(obj, field) for obj in objs])
+
+    def _created_pks(self, objs, unique_fields):
+        """pk после bulk_create; при update_conflicts Django 4.2 их не проставляет — ищем по ключу"""
+        pks = [obj.pk for obj in objs if obj.pk is not None]
+        missing = [obj for obj in objs if obj.pk is None]
+        if missing and unique_fields and len(unique_fields) == 1:
+            field = unique_fields[0]
+            values = [getattr(obj, field) for obj in missing]
+            for start in range(0, len(values), search_index.CHUNK_SIZE):
+                pks.extend(self.model._default_manager.filter(
+                    **{f'{field}__in': values[start:start + search_index.CHUNK_SIZE]}
+                ).values_list('pk', flat=True))
+        return pks
+
+
+class LoadedStateMixin:
+    """
+    Снимок значений полей, загруженных из базы (from_db), — чтобы сигналы
+    видели прежние значения (статус сотрудника, держатель оборудования)
+    без SELECT старой строки, а save(only_dirty=True) писал только
+    изменённые поля. После save() снимок обновляется.
+
+    Снимка нет у объектов, созданных не из базы (Model(...), bulk_create) —
+    для них previous_value() бросает KeyError, и сигналы читают строку сами.
+    """
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # field_names — attname загруженных полей (без отложенных), в порядке values
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def previous_value(self, attname):
+        """Значение поля при загрузке или последнем save(); KeyError, если неизвестно"""
+        return self.__dict__.get('_loaded_values', {})[attname]
+
+    def dirty_fields(self):
+        """
+        attname полей, изменённых после загрузки; поле, не загруженное (only/defer),
+        но присвоенное потом, тоже считается изменённым
+        """
+        loaded = self.__dict__.get('_loaded_values', {})
+        return [
+            field.attname for field in self._meta.concrete_fields
+            if field.attname in self.__dict__
+            and (field.attname not in loaded or self.__dict__[field.attname] != loaded[field.attname])
+        ]
+
+    def save(self, *args, only_dirty=False, **kwargs):
+        if only_dirty and not args and kwargs.get('update_fields') is None \
+                and not self._state.adding and '_loaded_values' in self.__dict__:
+            dirty = self.dirty_fields()
+            if not dirty:
+                return
+            auto_now = [f.attname for f in self._meta.concrete_fields if getattr(f, 'auto_now', False)]
+            kwargs['update_fields'] = list(dict.fromkeys(dirty + auto_now))
+        super().save(*args, **kwargs)
+        self._remember_values(kwargs.get('update_fields'))
+
+    def refresh_from_db(self, using=None, fields=None):
+        super().refresh_from_db(using=using, fields=fields)
+        self._remember_values(fields)
+
+    def _remember_values(self, fields):
+        loaded = self.__dict__.setdefault('_loaded_values', {})
+        deferred = self.get_deferred_fields()
+        for field in self._meta.concrete_fields:
+            if field.attname in deferred:
+                continue
+            if fields is None or field.name in fields or field.attname in fields:
+                loaded[field.attname] = getattr(self, field.attname)
+
+
+# Статусы, при переходе в которые оборудование сотрудника освобождается
+RELEASE_STATUSES = ('dismissed', 'maternity')
+
+
+def release_equipment(employee_ids):
+    """
+    Хук для путей, минующих Employee.save() и сигнал free_equipment_on_status_change
+    (QuerySet.update, bulk_update, импорт): освобождает оборудование сотрудников
+    employee_ids (список pk или queryset .values('pk')) одним UPDATE.
+    Вызывать для тех, кто переходит в RELEASE_STATUSES из другого статуса,
+    до или в одной транзакции с записью статуса. Возвращает число строк.
+    """
+    return Equipment.objects.filter(employee_id__in=employee_ids).update(employee=None)
+
+
+# AnyDesk ID в ip_or_anydesk — только цифры (иначе там IP или ссылка)
+ANYDESK_ID_REGEX = r'^[0-9]+$'
+
+
+class EmployeeQuerySet(SummaryQuerySet):
+
+    def with_laptop_anydesk(self):
+        """
+        Аннотирует laptop_anydesk — AnyDesk ID первого ноутбука сотрудника
+        (одним коррелированным подзапросом вместо 1–2 запросов на сотрудника
+        в laptop_anydesk_id())
+        """
+        laptops = Equipment.objects.filter(
+            employee=OuterRef('pk'),
+            type='Ноутбук',
+            ip_or_anydesk__regex=ANYDESK_ID_REGEX,
+        ).order_by('pk').values('ip_or_anydesk')[:1]
+        return self.annotate(laptop_anydesk=Subquery(laptops))
+
+
+class Employee(LoadedStateMixin, models.Model):
     OFFICE_CHOICES = [
         ('ORL', 'Орёл'),
         ('MSK', 'Москва'),
@@ -64,6 +295,14 @@ class Employee(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = EmployeeQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Порядок и постраничный вывод списка сотрудников (см. employee_search)
+            models.Index(fields=['fio', 'id'], name='employee_fio_id_idx'),
+        ]
+
     def __str__(self):
         return self.fio
 
@@ -103,28 +342,27 @@ class Employee(models.Model):
         """
         Возвращает ID AnyDesk для ноутбука сотрудника.
         Ищет оборудование типа 'Ноутбук' и возвращает значение из поля ip_or_anydesk,
-        если оно является числовым ID.
+        если оно является числовым ID (у нескольких ноутбуков — первое такое).
+        Без запросов, если сотрудник выбран через with_laptop_anydesk()
+        или с prefetch_related('equipment_set').
         """
-        try:
-            # Ищем оборудование типа "Ноутбук", привязанное к сотруднику
-            laptop = self.equipment_set.get(type='Ноутбук')
-            # Проверяем, что значение ip_or_anydesk является числовым ID
-            if laptop.ip_or_anydesk and laptop.ip_or_anydesk.isdigit():
-                return laptop.ip_or_anydesk
-            else:
-                return None
-        except Equipment.DoesNotExist:
-            # Ноутбук не найден
-            return None
-        except Equipment.MultipleObjectsReturned:
-            # Найдено несколько ноутбуков, возвращаем ID первого
-            laptops = self.equipment_set.filter(type='Ноутбук')
+        if hasattr(self, 'laptop_anydesk'):
+            return self.laptop_anydesk
+        if 'equipment_set' in getattr(self, '_prefetched_objects_cache', {}):
+            laptops = sorted(
+                (eq for eq in self.equipment_set.all() if eq.type == 'Ноутбук'),
+                key=lambda eq: eq.pk,
+            )
             for laptop in laptops:
-                if laptop.ip_or_anydesk and laptop.ip_or_anydesk.isdigit():
+                if laptop.ip_or_anydesk and laptop.ip_or_anydesk.isascii() and laptop.ip_or_anydesk.isdigit():
                     return laptop.ip_or_anydesk
             return None
+        return self.equipment_set.filter(
+            type='Ноутбук',
+            ip_or_anydesk__regex=ANYDESK_ID_REGEX,
+        ).order_by('pk').values_list('ip_or_anydesk', flat=True).first()
 
-class Equipment(models.Model):
+class Equipment(LoadedStateMixin, models.Model):
     EQUIPMENT_TYPES = [
         ('SIP', 'SIP-телефон'),
         ('Монитор', 'Монитор'),
@@ -146,6 +384,8 @@ class Equipment(models.Model):
     position = models.CharField("Должность", max_length=255, blank=True) # Добавлено ранее
     disposed = models.BooleanField("Списано", default=False) # Добавлено ранее
 
+    objects = SummaryQuerySet.as_manager()
+
     def __str__(self):
         return f"{self.type} ({self.serial_number or 'б/н'})"
 
@@ -162,20 +402,114 @@ class Equipment(models.Model):
             f"**Сотрудник**: {self.employee.fio if self.employee else 'Свободное'}",
         ]
         return "\n".join(lines)
+class ImportFingerprint(models.Model):
+    """Хэш содержимого строки листа Excel на момент последнего импорта"""
+    sheet = models.CharField("Лист", max_length=50)
+    key = models.CharField("Ключ строки", max_length=300)  # AD-логин, серийный номер или ФИО
+    digest = models.CharField("Хэш", max_length=40)
+    imported_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['sheet', 'key'], name='unique_import_fingerprint'),
+        ]
+
+    def __str__(self):
+        return f"{self.sheet}: {self.key}"
+
+
+class ADAccountStatus(models.Model):
+    """Статус учётной записи AD сотрудника на момент последнего sync_ad_status"""
+    employee = models.OneToOneField(Employee, on_delete=models.CASCADE, related_name='ad_account', verbose_name="Сотрудник")
+    found = models.BooleanField("Найден в AD", default=False)
+    locked = models.BooleanField("Заблокирован", default=False)
+    disabled = models.BooleanField("Отключён", default=False)
+    display_name = models.CharField("Отображаемое имя", max_length=255, blank=True)
+    fetched_at = models.DateTimeField("Получен")
+
+    def __str__(self):
+        return f"{self.employee}: {'заблокирован' if self.locked else 'отключён' if self.disabled else 'активен'}"
+
 # === Сигналы ===
 
 @receiver(pre_save, sender=Employee)
-def free_equipment_on_status_change(sender, instance, **kwargs):
+def free_equipment_on_status_change(sender, instance, update_fields=None, **kwargs):
     """
     Освобождает оборудование сотрудника при изменении статуса на 'dismissed' или 'maternity'.
+    Прежний статус — из снимка LoadedStateMixin; запрос к базе только если снимка нет.
+    """
+    if instance.pk is None or instance.status not in RELEASE_STATUSES:
+        return
+    if update_fields is not None and 'status' not in update_fields:
+        return
+    try:
+        old_status = instance.previous_value('status')
+    except KeyError:
+        old_status = Employee.objects.filter(pk=instance.pk).values_list('status', flat=True).first()
+        if old_status is None:
+            return  # Строки нет — это новый сотрудник, ничего не делаем
+    if old_status != instance.status:
+        # Освобождаем все оборудование, привязанное к сотруднику
+        release_equipment([instance.pk])
+        logger.info('Оборудование сотрудника %s освобождено.', instance.fio)
+
+
+@receiver(post_save, sender=Employee)
+@receiver(post_save, sender=Equipment)
+@receiver(post_delete, sender=Employee)
+@receiver(post_delete, sender=Equipment)
+def invalidate_dashboard_summary(sender, **kwargs):
+    """Сбрасывает сводку дашборда и прочие кэши (см. invalidate_caches)"""
+    invalidate_caches(sender)
+
+
+@receiver(post_save, sender=Employee)
+@receiver(post_save, sender=Equipment)
+def update_search_index(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Пересчитывает строку полнотекстового индекса (см. search_index), если
+    изменилось индексируемое поле. Снимок LoadedStateMixin обновляется после
+    сигналов, поэтому здесь по нему ещё видно, что изменил этот save()
     """
-    if instance.pk:  # Проверяем, что это обновление, а не создание
+    fields = update_fields
+    if not created and '_loaded_values' in instance.__dict__ and search_index.affects(sender, fields):
+        fields = instance.dirty_fields()
+    if search_index.affects(sender, fields):
+        search_index.reindex(sender, [instance.pk], fields)
+
+
+@receiver(pre_delete, sender=Employee)
+def remember_held_equipment(sender, instance, **kwargs):
+    # После удаления сотрудника его оборудование станет свободным (SET_NULL) —
+    # в индексе у него нужно убрать ФИО держателя
+    if search_index.is_enabled():
+        instance._held_equipment = list(instance.equipment_set.values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=Employee)
+@receiver(post_delete, sender=Equipment)
+def remove_from_search_index(sender, instance, **kwargs):
+    search_index.reindex(sender, [instance.pk])
+    search_index.reindex_equipment(getattr(instance, '_held_equipment', []))
+
+
+@receiver(pre_save, sender=Equipment)
+def remember_previous_holder(sender, instance, **kwargs):
+    # При перезакреплении панель прежнего держателя тоже устаревает
+    if instance.pk:
         try:
-            old_instance = Employee.objects.get(pk=instance.pk)
-            # Если статус изменился на 'dismissed' или 'maternity'
-            if instance.status in ['dismissed', 'maternity'] and old_instance.status != instance.status:
-                # Освобождаем все оборудование, привязанное к сотруднику
-                Equipment.objects.filter(employee=instance).update(employee=None)
-                print(f"Оборудование сотрудника {instance.fio} освобождено.")
-        except Employee.DoesNotExist:
-            pass  # Это новый сотрудник, ничего не делаем    
\ No newline at end of file
+            instance._previous_holder = instance.previous_value('employee_id')
+        except KeyError:
+            instance._previous_holder = Equipment.objects.filter(pk=instance.pk).values_list('employee_id', flat=True).first()
+
+
+@receiver(post_save, sender=Employee)
+@receiver(post_save, sender=Equipment)
+@receiver(post_delete, sender=Employee)
+@receiver(post_delete, sender=Equipment)
+def invalidate_employee_panel(sender, instance, **kwargs):
+    """Сбрасывает версию закэшированной панели сотрудника (см. employee_panel)"""
+    if sender is Employee:
+        employee_panel.invalidate_panels([instance.pk])
+    else:
+        employee_panel.invalidate_panels([instance.employee_id, getattr(instance, '_previous_holder', None)])
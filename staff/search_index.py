@@ -0,0 +1,174 @@
+# staff/search_index.py
+"""
+Полнотекстовый индекс SQLite FTS5 для поиска сотрудников и оборудования.
+
+Две виртуальные таблицы, rowid = pk строки:
+    staff_employee_fts  — ФИО, AD-логин, email, SIP, телефон, должность;
+    staff_equipment_fts — серийный номер, модель, MAC, IP/AnyDesk,
+                          комментарий и ФИО держателя.
+
+Индекс обновляется сигналами (save/delete) и из SummaryQuerySet
+(update / bulk_create / bulk_update, см. models) — пересчётом строк по pk
+одним INSERT ... SELECT. Полная пересборка — команда rebuild_search_index.
+
+Запрос: каждое слово — префиксный поиск ("иван" найдёт "Иванов"), слова
+объединяются через AND. Регистр не важен (в том числе для кириллицы),
+ё и е не различаются. Если база не SQLite или таблиц нет (миграция
+не применена), search_ids() возвращает None и вызывающий код ищет через LIKE.
+"""
+from django.db import connections, router
+from django.db.models.expressions import RawSQL
+
+EMPLOYEE_TABLE = 'staff_employee_fts'
+EQUIPMENT_TABLE = 'staff_equipment_fts'
+
+EMPLOYEE_COLUMNS = ('fio', 'ad_login', 'email', 'sip_number', 'phone', 'position')
+EQUIPMENT_COLUMNS = ('serial_number', 'model', 'mac_address', 'ip_or_anydesk', 'comment', 'holder_fio')
+
+
+def _fold(expression):
+    """SQL-выражение без NULL и с ё -> е (FTS5 не считает их одной буквой)"""
+    return f"REPLACE(REPLACE(COALESCE({expression}, ''), 'ё', 'е'), 'Ё', 'Е')"
+
+
+EMPLOYEE_SELECT = f"""
+    SELECT id, {', '.join(_fold(column) for column in EMPLOYEE_COLUMNS)}
+    FROM staff_employee
+"""
+
+EQUIPMENT_SELECT = f"""
+    SELECT eq.id, {', '.join(_fold('eq.' + column) for column in EQUIPMENT_COLUMNS[:-1])}, {_fold('emp.fio')}
+    FROM staff_equipment eq LEFT JOIN staff_employee emp ON emp.id = eq.employee_id
+"""
+
+# Лимит переменных в одном запросе SQLite
+CHUNK_SIZE = 500
+
+_available = {}  # (alias, имя базы) -> есть ли таблицы индекса
+
+
+def _connection(model=None):
+    from .models import Employee
+    return connections[router.db_for_write(model or Employee)]
+
+
+def is_enabled(connection=None):
+    connection = connection or _connection()
+    if connection.vendor != 'sqlite':
+        return False
+    key = (connection.alias, str(connection.settings_dict['NAME']))
+    if key not in _available:
+        with connection.cursor() as cursor:
+            tables = set(connection.introspection.table_names(cursor))
+        _available[key] = {EMPLOYEE_TABLE, EQUIPMENT_TABLE} <= tables
+    return _available[key]
+
+
+def rebuild(connection=None):
+    """Пересобирает индекс целиком; возвращает число строк (сотрудники, оборудование)"""
+    connection = connection or _connection()
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {EMPLOYEE_TABLE}")
+        cursor.execute(f"INSERT INTO {EMPLOYEE_TABLE}(rowid, {', '.join(EMPLOYEE_COLUMNS)}) {EMPLOYEE_SELECT}")
+        employees = cursor.rowcount
+        cursor.execute(f"DELETE FROM {EQUIPMENT_TABLE}")
+        cursor.execute(f"INSERT INTO {EQUIPMENT_TABLE}(rowid, {', '.join(EQUIPMENT_COLUMNS)}) {EQUIPMENT_SELECT}")
+        equipment = cursor.rowcount
+        # Слияние сегментов индекса после массовой вставки
+        cursor.execute(f"INSERT INTO {EMPLOYEE_TABLE}({EMPLOYEE_TABLE}) VALUES ('optimize')")
+        cursor.execute(f"INSERT INTO {EQUIPMENT_TABLE}({EQUIPMENT_TABLE}) VALUES ('optimize')")
+    return employees, equipment
+
+
+def _chunks(pks):
+    pks = list(pks)
+    for start in range(0, len(pks), CHUNK_SIZE):
+        yield pks[start:start + CHUNK_SIZE]
+
+
+def reindex_employees(pks, holders=True):
+    """
+    Пересчитывает строки сотрудников по pk (удалённые просто исчезают из индекса)
+    и, если holders, оборудование, которое за ними закреплено: в нём индексируется
+    ФИО держателя.
+    """
+    connection = _connection()
+    if not pks or not is_enabled(connection):
+        return
+    with connection.cursor() as cursor:
+        for chunk in _chunks(pks):
+            marks = ', '.join(['%s'] * len(chunk))
+            cursor.execute(f"DELETE FROM {EMPLOYEE_TABLE} WHERE rowid IN ({marks})", chunk)
+            cursor.execute(
+                f"INSERT INTO {EMPLOYEE_TABLE}(rowid, {', '.join(EMPLOYEE_COLUMNS)}) {EMPLOYEE_SELECT} WHERE id IN ({marks})",
+                chunk,
+            )
+            if holders:
+                cursor.execute(f"SELECT id FROM staff_equipment WHERE employee_id IN ({marks})", chunk)
+                _reindex_equipment(cursor, [row[0] for row in cursor.fetchall()])
+
+
+def reindex_equipment(pks):
+    connection = _connection()
+    if not pks or not is_enabled(connection):
+        return
+    with connection.cursor() as cursor:
+        _reindex_equipment(cursor, pks)
+
+
+def _reindex_equipment(cursor, pks):
+    for chunk in _chunks(pks):
+        marks = ', '.join(['%s'] * len(chunk))
+        cursor.execute(f"DELETE FROM {EQUIPMENT_TABLE} WHERE rowid IN ({marks})", chunk)
+        cursor.execute(
+            f"INSERT INTO {EQUIPMENT_TABLE}(rowid, {', '.join(EQUIPMENT_COLUMNS)}) {EQUIPMENT_SELECT} WHERE eq.id IN ({marks})",
+            chunk,
+        )
+
+
+# Поля моделей, от которых зависит индекс: изменения остальных (статус, офис...) его не трогают
+INDEXED_FIELDS = {
+    'employee': set(EMPLOYEE_COLUMNS),
+    'equipment': set(EQUIPMENT_COLUMNS[:-1]) | {'employee', 'employee_id'},
+}
+
+
+def affects(model, fields):
+    """Затрагивает ли изменение полей fields (None — неизвестно какие) индекс"""
+    indexed = INDEXED_FIELDS.get(model._meta.model_name)
+    if indexed is None:
+        return False
+    return fields is None or bool(indexed & set(fields))
+
+
+def reindex(model, pks, fields=None):
+    """
+    Пересчёт строк model (Employee / Equipment) по pk после изменения полей
+    fields (None — неизвестно каких): оборудование держателей — только если
+    могло измениться ФИО
+    """
+    if model._meta.model_name == 'employee':
+        reindex_employees(pks, holders=fields is None or 'fio' in fields)
+    elif model._meta.model_name == 'equipment':
+        reindex_equipment(pks)
+
+
+def match_expression(query):
+    """
+    Строка поиска -> выражение FTS5 MATCH: слова в кавычках (спецсимволы
+    FTS5 не интерпретируются) с * — поиск по префиксу.
+    """
+    words = query.replace('ё', 'е').replace('Ё', 'Е').split()
+    return ' '.join('"{}"*'.format(word.replace('"', '""')) for word in words)
+
+
+def search_ids(model, query):
+    """
+    Подзапрос pk строк model, подходящих под query, для filter(pk__in=...);
+    None — индекс недоступен, искать нужно через LIKE.
+    """
+    if not is_enabled(_connection(model)):
+        return None
+    expression = match_expression(query)
+    table = EMPLOYEE_TABLE if model._meta.model_name == 'employee' else EQUIPMENT_TABLE
+    return RawSQL(f"SELECT rowid FROM {table} WHERE {table} MATCH %s", [expression])
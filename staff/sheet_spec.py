@@ -0,0 +1,512 @@
+# staff/sheet_spec.py
+"""
+Импорт листа по декларативному описанию (SheetSpec).
+
+Описание листа задаёт колонки (варианты заголовка, запасной индекс,
+приведение типа), вычисляемые поля, ключ для upsert и стратегию
+сопоставления с сотрудником. По заголовку листа описание один раз
+компилируется в CompiledSpec — преобразователь строки в словарь полей,
+дальше каждая строка обрабатывается без разбора заголовков.
+
+SpecImporter пишет записи пачками: по ключу (serial_number) — через
+BulkUpserter, записи, сопоставленные с существующими объектами, —
+через bulk_update, сгруппированный по набору изменённых полей.
+С FingerprintStore строки, не изменившиеся с прошлого импорта, пропускаются.
+С ChangeSet (dry-run, см. import_changes) в базу ничего не пишется: записи
+уходят в набор изменений.
+Варианты листа для отдельных команд (только статус, без создания...)
+получаются из общего описания через SheetSpec.replace().
+
+Поля с префиксом "_" служебные: участвуют в сопоставлении и вычислениях,
+но в модель не пишутся.
+"""
+import inspect
+from collections import Counter
+from contextlib import nullcontext
+from operator import itemgetter
+
+from django.db import transaction
+
+from .bulk_upsert import BulkUpdater, BulkUpserter, bulk_update_changed
+from .employee_index import EmployeeIndex, normalize_name
+
+
+# === Приведение типов (значение ячейки уже прошло clean_cell) ===
+
+def optional(value):
+    """Пустая ячейка -> None (для уникальных полей вроде ad_login)"""
+    return value or None
+
+
+# === Стратегии сопоставления: имя -> (индекс, значение) -> объект ===
+
+def _by_last_name(index, value):
+    parts = value.split()
+    return index.find_by_last_name(parts[0]) if parts else None
+
+
+def _by_last_first(index, value):
+    parts = value.split()
+    return index.find_by_last_name(parts[0], parts[1]) if len(parts) >= 2 else None
+
+
+MATCH_STRATEGIES = {
+    'login': lambda index, value: index.find_by_login(value),
+    'exact': lambda index, value: index.find_exact(value),
+    'prefix': lambda index, value: index.find_by_prefix(value),
+    'containing': lambda index, value: index.find_containing(value),
+    'last_name': _by_last_name,
+    'last_first': _by_last_first,
+}
+
+
+class Column:
+    """
+    Колонка листа.
+
+    field — ключ в записи (поле модели или служебное "_имя"),
+    aliases — варианты заголовка: сначала ищется точное совпадение, затем вхождение,
+    index — позиция, если заголовок не найден (листы с фиксированными колонками),
+    coerce — приведение значения, default — значение, если колонки нет в листе.
+    """
+
+    def __init__(self, field, aliases=(), index=None, coerce=None, default=''):
+        self.field = field
+        self.aliases = [alias.lower() for alias in aliases]
+        self.index = index
+        self.coerce = coerce
+        self.default = default
+
+
+class SheetSpec:
+    """
+    Описание листа.
+
+    key — уникальное поле модели для upsert (строки без ключа не пишутся),
+    match — [(поле записи, стратегия), ...] из MATCH_STRATEGIES, пробуются по порядку;
+    match_target — поле, куда кладётся найденный сотрудник (для оборудования — 'employee');
+    без него найденный объект сам обновляется записью.
+    required — без этих полей строка пропускается целиком,
+    write_if — без этих полей строка учитывается, но не пишется,
+    require_match — строка, для которой сопоставление ничего не нашло, не пишется.
+    derive — функции record -> None, дополняющие запись вычисляемыми полями.
+    constants — постоянные значения полей (офис и статус по умолчанию),
+    update_fields — какие поля обновлять у найденного объекта (по умолчанию все,
+    пустой список — никакие),
+    create — создавать ли объект, если сопоставление ничего не нашло,
+    on_update — вызывается перед записью пачки обновлений со списком
+    (объект, {поле: старое значение}); может вернуть счётчики {имя: число},
+    они добавляются к stats импорта. В dry-run получает и changes, sheet
+    (ChangeSet и лист) и пишет в набор изменений вместо базы.
+    backfill — функции (record, найденный сотрудник) -> {поле: значение} или None:
+    заполнение пустых полей сотрудника (должность из листа Выдано).
+    """
+
+    def __init__(self, sheet, model, columns, key=None, match=(), match_target=None,
+                 required=(), write_if=(), require_match=False, derive=(), constants=None,
+                 update_fields=None, create=True, on_update=None, backfill=()):
+        self.sheet = sheet
+        self.model = model
+        self.columns = list(columns)
+        self.key = key
+        self.match = list(match)
+        self.match_target = match_target
+        self.required = tuple(required)
+        self.write_if = tuple(write_if)
+        self.require_match = require_match
+        self.derive = list(derive)
+        self.constants = dict(constants or {})
+        self.update_fields = update_fields
+        self.create = create
+        self.on_update = on_update
+        self.backfill = list(backfill)
+
+    def replace(self, **overrides):
+        """Копия описания с заменёнными параметрами: DISMISSAL.replace(create=False)"""
+        params = inspect.signature(SheetSpec).parameters
+        unknown = set(overrides) - set(params)
+        if unknown:
+            raise TypeError(f"Неизвестные параметры SheetSpec: {', '.join(sorted(unknown))}")
+        return SheetSpec(**{**{name: getattr(self, name) for name in params}, **overrides})
+
+    def fingerprint_key(self, record):
+        """
+        Ключ отпечатка строки — как в остальных командах импорта (по нему
+        import_vanished находит пропавшие записи): значение key, AD-логин
+        или "fio:<ФИО>" из первого непустого поля сопоставления
+        """
+        if self.key and record.get(self.key):
+            return record[self.key]
+        for field, strategy in self.match:
+            if record.get(field):
+                if strategy == 'login':
+                    return record[field]
+                return f"fio:{normalize_name(str(record[field]))}"
+        return None
+
+    def resolve(self, header):
+        """Позиции колонок по заголовку: field -> индекс или None"""
+        header = [str(h).strip().lower() for h in header]
+        positions = {}
+        taken = set()
+        # Сначала точные совпадения, затем вхождения: "Коментарий" не должен
+        # занять колонку "Коментарий (IP/AnyDesk)", если есть точный заголовок
+        for exact in (True, False):
+            for column in self.columns:
+                if column.field in positions:
+                    continue
+                for i, h in enumerate(header):
+                    if i in taken:
+                        continue
+                    if any(alias == h if exact else alias in h for alias in column.aliases):
+                        positions[column.field] = i
+                        taken.add(i)
+                        break
+        for column in self.columns:
+            if column.field not in positions:
+                positions[column.field] = column.index
+        return positions
+
+    def compile(self, header):
+        return CompiledSpec(self, self.resolve(header))
+
+
+class CompiledSpec:
+    """Преобразователь строки листа в запись (словарь полей) для конкретного заголовка"""
+
+    def __init__(self, spec, positions):
+        self.spec = spec
+        self.positions = positions
+        present = [column for column in spec.columns if positions[column.field] is not None]
+        self.missing = {
+            column.field: column.default for column in spec.columns if positions[column.field] is None
+        }
+        indexes = [positions[column.field] for column in present]
+        self.width = max(indexes) + 1 if indexes else 0
+        self.fields = [column.field for column in present]
+        self.coercers = [(column.field, column.coerce) for column in present if column.coerce]
+        # itemgetter с одним индексом возвращает значение, а не кортеж
+        if len(indexes) == 1:
+            self.getter = lambda row, i=indexes[0]: (row[i],)
+        else:
+            self.getter = itemgetter(*indexes) if indexes else (lambda row: ())
+        self.matchers = [(field, MATCH_STRATEGIES[strategy]) for field, strategy in spec.match]
+
+    def transform(self, row):
+        """Запись для строки или None, если строка пустая / без обязательных полей"""
+        if not any(row):
+            return None
+        record = dict(zip(self.fields, self.getter(row)))
+        for field, coerce in self.coercers:
+            record[field] = coerce(record[field])
+        if self.missing:
+            record.update(self.missing)
+        for derive in self.spec.derive:
+            derive(record)
+        if self.spec.constants:
+            record.update(self.spec.constants)
+        for field in self.spec.required:
+            if not record.get(field):
+                return None
+        return record
+
+    def writable(self, record):
+        return all(record.get(field) for field in self.spec.write_if)
+
+    def match(self, record, index):
+        for field, strategy in self.matchers:
+            value = record.get(field)
+            if value:
+                found = strategy(index, value)
+                if found:
+                    return found
+        return None
+
+
+def model_values(record):
+    """Поля записи, которые пишутся в модель"""
+    return {field: value for field, value in record.items() if not field.startswith('_')}
+
+
+def stored(obj, changes=None):
+    """Объект есть в базе (или, в dry-run, будет создан набором изменений)"""
+    return obj.pk is not None or (changes is not None and changes.is_planned(obj))
+
+
+def employee_key(employee):
+    """Ключ сотрудника, не зависящий от pk"""
+    if employee is None:
+        return None
+    return employee.ad_login or f"fio:{normalize_name(employee.fio)}"
+
+
+class SpecImporter:
+    """
+    Импорт листа по SheetSpec пачками по batch_size.
+
+    stats — счётчики rows / created / updated / unchanged / skipped / not_matched / errors;
+    результаты писателей — пары ({'record': запись, 'rows': [номера строк], ...}, created),
+    created=None — без изменений или ошибка (тогда в словаре есть 'error');
+    on_result(record, created) вызывается для каждой записанной строки (для логов),
+    on_error(record, row_num, error) — для каждой строки, которую не удалось записать.
+    fingerprints — FingerprintStore: неизменившиеся строки пропускаются, отпечатки
+    строк с ошибкой забываются (в следующий раз они будут применены).
+    changes — ChangeSet для dry-run: записи, заполнение полей сотрудников
+    и отпечатки уходят в него, а не в базу.
+    backfilled — сколько раз заполнено каждое поле сотрудника (SheetSpec.backfill).
+    """
+
+    def __init__(self, spec, index=None, batch_size=1000, on_result=None, metrics=None,
+                 fingerprints=None, on_error=None, changes=None):
+        self.spec = spec
+        self.index = index
+        self.batch_size = batch_size
+        self.on_result = on_result or (lambda record, created: None)
+        self.on_error = on_error or (lambda record, row_num, error: None)
+        self.metrics = metrics
+        self.fingerprints = fingerprints
+        self.changes = changes
+        self.stats = {
+            'rows': 0, 'created': 0, 'updated': 0, 'unchanged': 0, 'skipped': 0, 'not_matched': 0, 'errors': 0,
+        }
+        self.backfilled = Counter()
+
+    def _stage(self, name):
+        return self.metrics.stage(name) if self.metrics else nullcontext()
+
+    def run(self, sheet):
+        spec = self.spec
+        compiled = spec.compile(sheet.header())
+        if spec.match and self.index is None:
+            with self._stage('read'):
+                self.index = EmployeeIndex()
+
+        writer = None if spec.key else MatchWriter(spec, self.index, batch_size=self.batch_size, changes=self.changes)
+        backfill = None
+
+        rows = sheet.rows(width=compiled.width)
+        if self.metrics:
+            rows = self.metrics.timed(rows)
+        for row_num, row in rows:
+            with self._stage('parse'):
+                record = compiled.transform(row)
+            if record is None:
+                continue
+            self.stats['rows'] += 1
+            writable = compiled.writable(record)
+            # Строка без записываемых полей ещё может заполнить поля сотрудника (backfill)
+            if not writable and not spec.backfill:
+                self.stats['skipped'] += 1
+                continue
+
+            found = None
+            if spec.match:
+                with self._stage('match'):
+                    found = compiled.match(record, self.index)
+                if found is None:
+                    self.stats['not_matched'] += 1
+
+            if self.fingerprints is not None:
+                # Найденный сотрудник входит в отпечаток: появится в базе — строка применится заново
+                values = row + (employee_key(found),) if spec.match_target else row
+                with self._stage('diff'):
+                    if not self.fingerprints.changed(spec.fingerprint_key(record), values, row_num=row_num):
+                        continue
+            if found is None and spec.require_match:
+                continue
+            if found is not None and spec.backfill and stored(found, self.changes):
+                changed = self._backfill(record, found)
+                if changed and self.changes is not None:
+                    with self._stage('write'):
+                        self.changes.update_employee(found, changed, spec.sheet, row_num)
+                elif changed:
+                    if backfill is None:
+                        backfill = BulkUpdater(type(found), batch_size=self.batch_size)
+                    with self._stage('write'):
+                        self._count_backfill(backfill.add(found, changed, row=row_num), record)
+            if not writable:
+                self.stats['skipped'] += 1
+                continue
+
+            with self._stage('write'):
+                if spec.key:
+                    if spec.match_target:
+                        record[spec.match_target] = found
+                    values = model_values(record)
+                    key = values.pop(spec.key)
+                    if writer is None:
+                        # Набор полей известен после derive — берём его из первой записи
+                        writer = self._upserter(list(values))
+                    self._count(writer.add(key, values, record=record, rows=[row_num], row=row_num))
+                else:
+                    self._count(writer.add(found, record, row=row_num))
+        if writer is not None:
+            with self._stage('write'):
+                self._count(writer.flush())
+        if isinstance(writer, MatchWriter):
+            for name, value in writer.counters.items():
+                self.stats[name] = self.stats.get(name, 0) + value
+        if backfill is not None:
+            with self._stage('write'):
+                self._count_backfill(backfill.flush())
+        return self.stats
+
+    def _upserter(self, update_fields):
+        if self.changes is not None:
+            return self.changes.equipment_upserter(update_fields, self.spec.sheet)
+        return BulkUpserter(self.spec.model, self.spec.key, update_fields, batch_size=self.batch_size)
+
+    def _backfill(self, record, employee):
+        """Заполняет пустые поля найденного сотрудника; возвращает {поле: старое значение}"""
+        changed = {}
+        for fill in self.spec.backfill:
+            for field, value in (fill(record, employee) or {}).items():
+                if getattr(employee, field) != value:
+                    changed.setdefault(field, getattr(employee, field))
+                    setattr(employee, field, value)
+                    self.backfilled[field] += 1
+        return changed
+
+    def _count_backfill(self, results, record=None):
+        for entry, error in results:
+            if error is not None:
+                for row_num in entry['rows']:
+                    self.stats['errors'] += 1
+                    if self.fingerprints is not None:
+                        self.fingerprints.forget_row(row_num)
+                    self.on_error(record or {}, row_num, error)
+
+    def _count(self, results):
+        for item, created in results:
+            record = item['record']
+            if 'error' in item:
+                for row_num in item['rows']:
+                    self.stats['errors'] += 1
+                    if self.fingerprints is not None:
+                        self.fingerprints.forget_row(row_num)
+                    self.on_error(record, row_num, item['error'])
+                continue
+            if created is None:
+                self.stats['unchanged'] += 1
+                continue
+            self.stats['created' if created else 'updated'] += 1
+            self.on_result(record, created)
+
+
+class MatchWriter:
+    """
+    Запись для листов без уникального ключа (сотрудники): найденный объект
+    обновляется только изменившимися полями, ненайденный создаётся.
+    Обновления пишутся bulk_update по группам с одинаковым набором полей,
+    до создания новых: сменённый AD-логин освобождает его для нового сотрудника.
+    Если пачка не прошла (например, дубль AD-логина), она пишется построчно,
+    каждая строка в своей транзакции — ошибка одной не теряет остальные.
+    counters — счётчики, возвращённые on_update (освобождённое оборудование).
+    С changes (dry-run) создание и обновления уходят в ChangeSet.
+    """
+
+    def __init__(self, spec, index, batch_size=1000, changes=None):
+        self.spec = spec
+        self.index = index
+        self.batch_size = batch_size
+        self.changes = changes
+        self.pending = {}  # id(объекта) -> (объект, {поле: старое значение}, запись, [номера строк])
+        self.pending_new = []
+        self.counters = Counter()
+
+    def add(self, obj, record, row=None):
+        values = model_values(record)
+        rows = [row] if row is not None else []
+        fields = self.spec.update_fields if self.spec.update_fields is not None else list(values)
+        if obj is None:
+            if not self.spec.create:
+                return []
+            obj = self.spec.model(**values)
+            if self.index is not None:
+                self.index.add(obj)
+            self.pending_new.append((obj, record, rows))
+        elif not stored(obj, self.changes):
+            # Создан этой же пачкой — просто обновляем значения в памяти
+            for field in fields:
+                setattr(obj, field, values[field])
+            for new_obj, _, new_rows in self.pending_new:
+                if new_obj is obj:
+                    new_rows.extend(rows)
+            return [({'record': record, 'rows': rows}, None)]
+        else:
+            changed = {}
+            old_fio, old_login = getattr(obj, 'fio', None), getattr(obj, 'ad_login', None)
+            for field in fields:
+                if getattr(obj, field) != values[field]:
+                    changed[field] = getattr(obj, field)
+                    setattr(obj, field, values[field])
+            if not changed:
+                return [({'record': record, 'rows': rows}, None)]
+            if self.index is not None:
+                self.index.reindex(obj, old_fio, old_login)
+            _, already_changed, _, already_rows = self.pending.get(id(obj), (obj, {}, record, []))
+            self.pending[id(obj)] = (obj, {**changed, **already_changed}, record, already_rows + rows)
+        if len(self.pending) + len(self.pending_new) >= self.batch_size:
+            return self.flush()
+        return []
+
+    def flush(self):
+        pending, self.pending = list(self.pending.values()), {}
+        pending_new, self.pending_new = self.pending_new, []
+        if not pending and not pending_new:
+            return []
+        if self.changes is not None:
+            return self._plan(pending, pending_new)
+        try:
+            with transaction.atomic():
+                counters = self._update([(obj, changed) for obj, changed, _, _ in pending]) if pending else None
+                if pending_new:
+                    self.spec.model.objects.bulk_create([obj for obj, _, _ in pending_new], batch_size=self.batch_size)
+            self.counters.update(counters or {})
+            return (
+                [({'record': record, 'rows': rows}, False) for _, _, record, rows in pending]
+                + [({'record': record, 'rows': rows}, True) for _, record, rows in pending_new]
+            )
+        except Exception:
+            pass
+
+        results = []
+        for obj, changed, record, rows in pending:
+            try:
+                with transaction.atomic():
+                    counters = self._update([(obj, changed)])
+                self.counters.update(counters or {})
+                results.append(({'record': record, 'rows': rows}, False))
+            except Exception as e:
+                results.append(({'record': record, 'rows': rows, 'error': e}, None))
+        for obj, record, rows in pending_new:
+            obj.pk = None
+            try:
+                with transaction.atomic():
+                    obj.save(force_insert=True)
+                results.append(({'record': record, 'rows': rows}, True))
+            except Exception as e:
+                if self.index is not None:
+                    self.index.remove(obj)
+                results.append(({'record': record, 'rows': rows, 'error': e}, None))
+        return results
+
+    def _plan(self, pending, pending_new):
+        """dry-run: то же, что flush(), но в набор изменений (ошибок записи здесь нет)"""
+        sheet = self.spec.sheet
+        if pending and self.spec.on_update:
+            updates = [(obj, changed) for obj, changed, _, _ in pending]
+            self.counters.update(self.spec.on_update(updates, changes=self.changes, sheet=sheet) or {})
+        for obj, changed, _, rows in pending:
+            self.changes.update_employee(obj, changed, sheet, rows[0] if rows else None)
+        for obj, _, rows in pending_new:
+            self.changes.create_employee(obj, sheet, rows[0] if rows else None)
+        return (
+            [({'record': record, 'rows': rows}, False) for _, _, record, rows in pending]
+            + [({'record': record, 'rows': rows}, True) for _, record, rows in pending_new]
+        )
+
+    def _update(self, changes):
+        counters = self.spec.on_update(changes) if self.spec.on_update else None
+        bulk_update_changed(self.spec.model, changes, self.batch_size)
+        return counters
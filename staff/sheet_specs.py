@@ -0,0 +1,227 @@
+# staff/sheet_specs.py
+"""
+Описания листов книги ТМЦ для движка sheet_spec.
+
+Employment и Dismissal в рабочем файле имеют фиксированный порядок колонок
+(заголовки менялись), поэтому колонки заданы индексами. Выдано и Свободное
+разбираются по заголовкам; у Свободного есть запасные индексы, как раньше
+в import_free_equipment_fixed.
+
+Кроме описаний листов здесь их варианты для отдельных команд импорта
+(DISMISSAL_STATUS, DISMISSAL_DATA, ISSUED_KNOWN, POSITIONS).
+"""
+from .models import RELEASE_STATUSES, Employee, Equipment, release_equipment as release_holders_equipment
+from .sheet_spec import Column, SheetSpec, optional
+
+VALID_OFFICES = [choice[0] for choice in Employee.OFFICE_CHOICES]
+
+# Поля сотрудника, которые лист Dismissal обновляет без смены статуса (update_dismissed_data)
+DISMISSAL_DATA_FIELDS = [
+    'ad_password', 'email', 'email_password', 'sip_number', 'web_3cx', 'pass_3cx',
+    'b24_login', 'b24_password', 'phone', 'tel_b24_login', 'tel_b24_password',
+    'vats_login', 'vats_password',
+]
+
+EQUIPMENT_FIELDS = ['employee', 'type', 'model', 'mac_address', 'ip_or_anydesk', 'comment', 'office']
+
+
+# Заголовки листов рабочего файла: Employment / Dismissal и Выдано / Свободное
+# (по ним пишут книги workbook_export и workbook_generator)
+EMPLOYMENT_HEADER = [
+    '№', 'ФИ', 'О', 'AD логин', 'Пароль AD', 'Email', 'Пароль Email', 'Номер SIP',
+    '3CX WEB', 'Пароль 3CX', 'Логин Б24', 'Пароль Б24', 'Телефон', 'Инфо',
+    'Руководитель', 'Тел Б24 логин', 'Тел Б24 пароль', 'СБИС логин', 'СБИС пароль',
+]
+
+EQUIPMENT_HEADER = [
+    'ФИО сотрудника', 'Должность', 'Офис', 'Перечень ТМЦ', 'Модель', 'Серийный номер',
+    'MAC адрес', 'Коментарий (IP/AnyDesk)', 'Коментарий',
+]
+
+
+def normalize_office(office):
+    """Код офиса из листа: ORL, MSK, ... в верхнем регистре; пустой или неизвестный — 'remote'"""
+    office_normalized = office.upper() if office else ''
+    return office_normalized if office_normalized in VALID_OFFICES else 'remote'
+
+
+# === Вычисляемые поля ===
+
+def compose_fio(record):
+    """ФИО из "Фамилия Имя" и отчества, разбор на фамилию и имя"""
+    first_last, middle = record['_first_last'], record['middle_name']
+    fio = f"{first_last} {middle}" if first_last and middle else first_last
+    parts = fio.split()
+    record['fio'] = fio
+    record['first_name'] = parts[1] if len(parts) > 1 else ''
+    record['last_name'] = parts[0] if parts else ''
+
+
+def email_from_formula(record):
+    """Email, записанный формулой CONCATENATE, восстанавливается из AD-логина"""
+    email = record['email']
+    if email and '=CONCATENATE' in email and 'p-el.ru' in email and record['ad_login']:
+        record['email'] = f"{record['ad_login']}@p-el.ru"
+
+
+def dismissal_status(record):
+    record['status'] = 'maternity' if 'декрет' in record['fio'].lower() else 'dismissed'
+
+
+def equipment_office(record):
+    record['office'] = normalize_office(record['_office'])
+
+
+def free_equipment(record):
+    """Свободное оборудование: без сотрудника, "списано"/"списание" в комментарии — списано"""
+    comment = record['comment'].lower()
+    record['employee'] = None
+    record['disposed'] = 'списано' in comment or 'списание' in comment
+
+
+def release_equipment(updates, changes=None, sheet=None):
+    """
+    on_update: оборудование сотрудников, сменивших статус, освобождается одним UPDATE
+    (в dry-run — записями набора изменений changes)
+    """
+    released = [
+        employee for employee, changed in updates
+        if 'status' in changed and employee.status in RELEASE_STATUSES
+    ]
+    if changes is not None:
+        return {'equipment_freed': changes.release_equipment(released, sheet)}
+    pks = [employee.pk for employee in released]
+    return {'equipment_freed': release_holders_equipment(pks) if pks else 0}
+
+
+# === Заполнение пустых полей сотрудника (SheetSpec.backfill) ===
+
+def fill_position(record, employee):
+    """Должность из листа Выдано — только если у сотрудника её нет"""
+    if record['_position'] and not employee.position.strip():
+        return {'position': record['_position']}
+
+
+def fill_office(record, employee):
+    """Офис из листа Выдано — только сотрудникам на удалёнке или без офиса (update_positions_offices)"""
+    office = record['_office'].upper()
+    if office in VALID_OFFICES and employee.office in ('remote', ''):
+        return {'office': office}
+
+
+# === Листы ===
+
+# Колонки 1..18 листов Employment / Dismissal; 14 — руководитель (ForeignKey), не импортируется
+EMPLOYEE_COLUMNS = [
+    Column('_first_last', index=1),             # ФИ
+    Column('middle_name', index=2),             # О (Отчество)
+    Column('ad_login', index=3, coerce=optional),
+    Column('ad_password', index=4),
+    Column('email', index=5),
+    Column('email_password', index=6),
+    Column('sip_number', index=7),
+    Column('web_3cx', index=8),
+    Column('pass_3cx', index=9),
+    Column('b24_login', index=10),
+    Column('b24_password', index=11),
+    Column('phone', index=12),
+    Column('tel_b24_login', index=15),
+    Column('tel_b24_password', index=16),
+    Column('vats_login', index=17),             # СБИС логин
+    Column('vats_password', index=18),          # СБИС пароль
+]
+
+EMPLOYMENT = SheetSpec(
+    'Employment', Employee,
+    EMPLOYEE_COLUMNS + [Column('info', index=13)],
+    match=[('ad_login', 'login'), ('fio', 'exact')],
+    required=['fio'],
+    derive=[compose_fio, email_from_formula],
+    constants={'office': 'remote', 'status': 'active'},
+)
+
+DISMISSAL = SheetSpec(
+    'Dismissal', Employee,
+    EMPLOYEE_COLUMNS,
+    match=[('ad_login', 'login'), ('fio', 'containing')],
+    required=['fio'],
+    derive=[compose_fio, email_from_formula, dismissal_status],
+    constants={'office': 'remote'},  # только для новых: update_fields офис не трогают
+    update_fields=DISMISSAL_DATA_FIELDS + ['status'],
+    on_update=release_equipment,
+)
+
+ISSUED = SheetSpec(
+    'Выдано', Equipment,
+    [
+        Column('_fio', ['ФИО сотрудника']),
+        Column('_position', ['Должность']),
+        Column('_office', ['Офис'], default='remote'),
+        Column('type', ['Перечень ТМЦ']),
+        Column('model', ['Модель']),
+        Column('serial_number', ['Серийный номер']),
+        Column('mac_address', ['MAC адрес']),
+        Column('ip_or_anydesk', ['Коментарий (IP/AnyDesk)']),
+        Column('comment', ['Коментарий']),
+    ],
+    key='serial_number',
+    match=[('_fio', 'prefix'), ('_fio', 'last_name')],
+    match_target='employee',
+    required=['_fio'],
+    write_if=['type', 'serial_number'],
+    derive=[equipment_office],
+    backfill=[fill_position],  # как import_equipment: пустая должность владельца
+)
+
+FREE = SheetSpec(
+    'Свободное', Equipment,
+    [
+        Column('_office', ['Офис'], index=2),
+        Column('type', ['Перечень ТМЦ'], index=3),
+        Column('model', ['Модель'], index=4),
+        Column('serial_number', ['Серийный номер'], index=5),
+        Column('mac_address', ['MAC адрес'], index=6),
+        Column('ip_or_anydesk', ['Коментарий (IP/AnyDesk)'], index=7),
+        Column('comment', ['Коментарий'], index=8),
+    ],
+    key='serial_number',
+    write_if=['type', 'serial_number'],
+    derive=[equipment_office, free_equipment],
+)
+
+SPECS = {spec.sheet: spec for spec in (EMPLOYMENT, DISMISSAL, ISSUED, FREE)}
+
+
+# === Варианты листов для отдельных команд ===
+
+# import_dismissal_fixed / import_dismissal: у найденных меняется только статус
+DISMISSAL_STATUS = DISMISSAL.replace(update_fields=['status'])
+
+# update_dismissed_data: данные учётных записей найденных, без статуса и создания
+DISMISSAL_DATA = DISMISSAL.replace(
+    match=[('ad_login', 'login'), ('fio', 'exact')],
+    update_fields=DISMISSAL_DATA_FIELDS,
+    create=False,
+    on_update=None,
+)
+
+# import_employment: оборудование только найденных сотрудников, поиск по вхождению ФИО
+ISSUED_KNOWN = ISSUED.replace(
+    match=[('_fio', 'containing'), ('_fio', 'last_first')],
+    require_match=True,
+)
+
+# update_positions_offices: должности и офисы сотрудников по листу Выдано, оборудование не пишется
+POSITIONS = SheetSpec(
+    'Выдано', Employee,
+    [
+        Column('_fio', ['ФИО сотрудника'], index=0),
+        Column('_position', ['Должность'], index=1),
+        Column('_office', ['Офис'], index=2),
+    ],
+    match=[('_fio', 'prefix')],
+    required=['_fio'],
+    update_fields=[],
+    create=False,
+    backfill=[fill_position, fill_office],
+)
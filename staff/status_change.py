@@ -0,0 +1,45 @@
+# staff/status_change.py
+"""
+Массовая смена статуса сотрудников (увольнение / декрет / возврат) — для
+employees_change_status вместо POST на каждого сотрудника.
+
+Всё в одной транзакции: один UPDATE оборудования, освобождающий его у тех,
+кто уходит в 'dismissed' / 'maternity' из другого статуса (models.release_equipment —
+то же, что делает сигнал free_equipment_on_status_change при save()),
+и один UPDATE сотрудников. Сотрудники, уже находящиеся в целевом статусе,
+не трогаются: их дата увольнения не перезаписывается, updated_at не меняется.
+Оба идут через SummaryQuerySet.update — он сбрасывает сводку, счётчики,
+подсказки, панели сотрудников и обновляет поисковый индекс.
+"""
+from datetime import date
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import RELEASE_STATUSES, Employee, release_equipment
+
+# Не больше лимита переменных SQLite в одном запросе (см. search_index.CHUNK_SIZE)
+MAX_EMPLOYEES = 500
+
+
+def change_status(employee_ids, status, dismissal_date=None):
+    """
+    Переводит сотрудников employee_ids в статус status; для увольнения
+    и декрета проставляет dismissal_date (по умолчанию — сегодня).
+    Возвращает (число переведённых сотрудников, число освобождённого оборудования,
+    число сотрудников, которые уже были в статусе status).
+    """
+    employees = Employee.objects.filter(pk__in=set(employee_ids))
+    changing = employees.exclude(status=status)
+    values = {'status': status, 'updated_at': timezone.now()}
+    if status in RELEASE_STATUSES:
+        values['dismissal_date'] = dismissal_date or date.today()
+
+    with transaction.atomic():
+        unchanged = employees.filter(status=status).count()
+        released = 0
+        if status in RELEASE_STATUSES:
+            # До UPDATE сотрудников: после него у них уже новый статус
+            released = release_equipment(changing.values('pk'))
+        updated = changing.update(**values)
+    return updated, released, unchanged
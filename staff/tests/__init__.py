@@ -0,0 +1,32 @@
+# staff/tests
+"""
+Тесты staff: по модулю на подсистему (test_<модуль>.py).
+
+Кэш в тестах — в памяти (LOCMEM_CACHE), книги — из workbook_generator
+во временном каталоге (temp_workbook).
+"""
+import os
+import tempfile
+
+from django.test import override_settings
+
+from staff.workbook_generator import generate_workbook
+
+# Кэш в памяти вместо настроенного в settings — тесты не видят чужих записей
+LOCMEM_CACHE = override_settings(CACHES={
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'staff-tests'},
+})
+
+
+def temp_dir(test):
+    """Временный каталог, удаляемый после теста"""
+    tmp = tempfile.TemporaryDirectory()
+    test.addCleanup(tmp.cleanup)
+    return tmp.name
+
+
+def temp_workbook(test, rows=60, seed=1, **options):
+    """Синтетическая книга ТМЦ во временном каталоге: (путь, строк по листам)"""
+    path = os.path.join(temp_dir(test), 'tmc.xlsx')
+    counts = generate_workbook(path, rows, seed=seed, **options)
+    return path, counts
@@ -0,0 +1,176 @@
+from datetime import datetime
+from types import SimpleNamespace
+from unittest import mock
+
+from django.test import SimpleTestCase
+from ldap3.core.exceptions import LDAPCommunicationError
+
+from staff import ad_service
+from staff.ad_service import ADService, LdapPool, PoolTimeoutError, StaleConnectionError
+
+
+class FakeConnection:
+    """Соединение ldap3 для пула: bound / closed, unbind() и Who am I"""
+
+    def __init__(self, alive=True):
+        self.bound = True
+        self.closed = False
+        self.alive = alive
+        self.checks = 0
+        self.extend = SimpleNamespace(standard=SimpleNamespace(who_am_i=self.who_am_i))
+
+    def who_am_i(self):
+        self.checks += 1
+        return 'u:CORP\\admin' if self.alive else None
+
+    def unbind(self):
+        self.bound = False
+        self.closed = True
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class LdapPoolTests(SimpleTestCase):
+
+    def setUp(self):
+        self.created = []
+        self.clock = Clock()
+        patcher = mock.patch.object(ad_service.time, 'monotonic', self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def factory(self):
+        conn = FakeConnection()
+        self.created.append(conn)
+        return conn
+
+    def test_connection_is_reused(self):
+        pool = LdapPool(self.factory)
+        with pool.connection() as first:
+            pass
+        with pool.connection() as second:
+            pass
+        self.assertIs(first, second)
+        self.assertEqual(len(self.created), 1)
+        self.assertEqual(first.checks, 0)  # только что возвращённое не проверяется
+
+    def test_failed_connection_is_closed(self):
+        pool = LdapPool(self.factory)
+        with self.assertRaises(ValueError):
+            with pool.connection():
+                raise ValueError
+        self.assertTrue(self.created[0].closed)
+        with pool.connection() as conn:
+            self.assertIsNot(conn, self.created[0])
+
+    def test_broken_reused_connection_is_stale(self):
+        pool = LdapPool(self.factory)
+        with pool.connection():
+            pass
+        with self.assertRaises(StaleConnectionError):
+            with pool.connection():
+                raise LDAPCommunicationError('socket closed')
+        # Оборвалось только что открытое — обычная ошибка связи
+        with self.assertRaises(LDAPCommunicationError) as raised:
+            with pool.connection():
+                raise LDAPCommunicationError('socket closed')
+        self.assertNotIsInstance(raised.exception, StaleConnectionError)
+
+    def test_idle_connection_is_checked_then_dropped(self):
+        pool = LdapPool(self.factory, idle_timeout=300)
+        with pool.connection() as conn:
+            pass
+        self.clock.now += ad_service.HEALTH_CHECK_AFTER + 1
+        with pool.connection() as again:
+            pass
+        self.assertIs(again, conn)
+        self.assertEqual(conn.checks, 1)
+
+        conn.alive = False
+        self.clock.now += ad_service.HEALTH_CHECK_AFTER + 1
+        with pool.connection() as replaced:
+            pass
+        self.assertIsNot(replaced, conn)
+        self.assertTrue(conn.closed)
+
+        self.clock.now += 301
+        with pool.connection() as fresh:
+            pass
+        self.assertIsNot(fresh, replaced)
+        self.assertEqual(replaced.checks, 0)  # простаивавшее дольше idle_timeout не проверяется
+        self.assertTrue(replaced.closed)
+
+    def test_exhausted_pool_times_out(self):
+        pool = LdapPool(self.factory, size=1)
+        with mock.patch.object(ad_service, 'ACQUIRE_TIMEOUT', 0.01), pool.connection():
+            with self.assertRaises(PoolTimeoutError):
+                with pool.connection():
+                    pass
+
+
+class ADServiceTests(SimpleTestCase):
+
+    def setUp(self):
+        self.pool = LdapPool(FakeConnection)
+        self.service = ADService()
+        self.service.pool = lambda: self.pool
+
+    def test_stale_connection_is_retried_on_new_one(self):
+        with self.pool.connection():
+            pass
+        calls = []
+
+        def operation(conn):
+            calls.append(conn)
+            if len(calls) == 1:
+                raise LDAPCommunicationError('socket closed')
+            return 'ok'
+
+        self.assertEqual(self.service.run(operation), 'ok')
+        self.assertEqual(len(calls), 2)
+        self.assertIsNot(calls[0], calls[1])
+
+    def test_connection_errors_are_logged(self):
+        def fail(conn):
+            raise LDAPCommunicationError('no route to host')
+
+        with mock.patch.object(self.service, 'run', side_effect=lambda operation: fail(None)):
+            with self.assertLogs('staff.ad_service', 'ERROR') as logs:
+                self.assertEqual(self.service.get_user_status('ivanov'), {'error': 'Connection failed'})
+                self.assertEqual(
+                    self.service.unlock_user('ivanov'), {'success': False, 'error': 'Connection failed'}
+                )
+        self.assertEqual(len(logs.records), 2)
+        self.assertIn('ivanov', logs.output[0])
+        self.assertIsNotNone(logs.records[0].exc_info)
+
+    def test_all_user_statuses_in_one_paged_search(self):
+        entries = [
+            {'type': 'searchResEntry', 'attributes': {
+                'sAMAccountName': 'Ivanov', 'userAccountControl': 512,
+                'lockoutTime': datetime(1601, 1, 1), 'displayName': 'Иванов Иван',
+            }},
+            {'type': 'searchResEntry', 'attributes': {
+                'sAMAccountName': ['petrov'], 'userAccountControl': [514],
+                'lockoutTime': [datetime(2026, 10, 1)], 'displayName': [],
+            }},
+            {'type': 'searchResRef', 'uri': ['ldap://other.corp/DC=other']},
+            {'type': 'searchResEntry', 'attributes': {'sAMAccountName': []}},
+        ]
+        with self.pool.connection() as conn:
+            conn.extend.standard.paged_search = mock.Mock(return_value=iter(entries))
+
+        self.assertEqual(self.service.get_all_user_statuses(page_size=2), {
+            'ivanov': {'found': True, 'locked': False, 'disabled': False, 'display_name': 'Иванов Иван'},
+            'petrov': {'found': True, 'locked': True, 'disabled': True, 'display_name': 'petrov'},
+        })
+        conn.extend.standard.paged_search.assert_called_once_with(
+            self.service.base_dn, ad_service.USER_FILTER, attributes=ad_service.STATUS_ATTRIBUTES,
+            paged_size=2, generator=True,
+        )
@@ -0,0 +1,189 @@
+import json
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from ldap3.core.exceptions import LDAPCommunicationError
+
+from staff import ad_status
+from staff.models import ADAccountStatus, Employee
+
+from . import LOCMEM_CACHE
+
+ACTIVE = {'found': True, 'locked': False, 'disabled': False, 'display_name': 'Иванов Иван'}
+LOCKED = {**ACTIVE, 'locked': True}
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class DeferredThread:
+    """threading.Thread, который запускается только по run_pending()"""
+    started = []
+
+    def __init__(self, target, args=(), daemon=None):
+        self.target, self.args = target, args
+
+    def start(self):
+        DeferredThread.started.append(self)
+
+    @classmethod
+    def run_pending(cls):
+        started, cls.started = cls.started, []
+        for thread in started:
+            thread.target(*thread.args)
+        return len(started)
+
+
+@LOCMEM_CACHE
+class ADStatusCacheTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        DeferredThread.started = []
+        self.clock = Clock()
+        self.ad = mock.Mock()
+        self.ad.get_user_status.return_value = ACTIVE
+        for target, value in (
+            ('staff.ad_status.time.time', self.clock),
+            ('staff.ad_status.ADService', mock.Mock(return_value=self.ad)),
+            ('staff.views.ADService', mock.Mock(return_value=self.ad)),
+            ('staff.ad_status.threading.Thread', DeferredThread),
+        ):
+            patcher = mock.patch(target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_fresh_entry_served_from_cache(self):
+        self.assertEqual(ad_status.get_status('Ivanov'), {**ACTIVE, 'checked_at': 1000.0, 'stale': False})
+        self.clock.now += ad_status.STATUS_TTL - 1
+        # Регистр логина не важен
+        self.assertEqual(ad_status.get_status('ivanov'), {**ACTIVE, 'checked_at': 1000.0, 'stale': False})
+        self.assertEqual(self.ad.get_user_status.call_count, 1)
+        self.assertEqual(DeferredThread.started, [])
+
+    def test_stale_entry_served_while_one_refresh_runs(self):
+        ad_status.get_status('ivanov')
+        self.ad.get_user_status.return_value = LOCKED
+        self.clock.now += ad_status.STATUS_TTL
+
+        self.assertEqual(ad_status.get_status('ivanov'), {**ACTIVE, 'checked_at': 1000.0, 'stale': True})
+        self.assertTrue(ad_status.get_status('ivanov')['stale'])
+        self.assertEqual(self.ad.get_user_status.call_count, 1)
+
+        # Одно обновление на пользователя, после него блокировка снята
+        self.assertEqual(DeferredThread.run_pending(), 1)
+        self.assertEqual(ad_status.get_status('ivanov'), {**LOCKED, 'checked_at': self.clock.now, 'stale': False})
+        self.assertIsNone(cache.get(ad_status.REFRESH_LOCK_KEY.format('ivanov')))
+
+    def test_ttl_from_settings(self):
+        with self.settings(AD_CONFIG={'STATUS_TTL': 10}):
+            ad_status.get_status('ivanov')
+            self.clock.now += 10
+            self.assertTrue(ad_status.get_status('ivanov')['stale'])
+
+    def test_errors_are_not_cached(self):
+        self.ad.get_user_status.return_value = {'error': 'AD недоступен'}
+        self.assertEqual(ad_status.get_status('ivanov'), {'error': 'AD недоступен'})
+        ad_status.get_status('ivanov')
+        self.assertEqual(self.ad.get_user_status.call_count, 2)
+
+    def test_forced_check_falls_back_to_last_status(self):
+        ad_status.get_status('ivanov')
+        self.ad.get_user_status.return_value = {'error': 'AD недоступен'}
+        self.assertEqual(ad_status.get_status('ivanov', force=True), {**ACTIVE, 'checked_at': 1000.0, 'stale': True})
+
+        self.ad.get_user_status.return_value = LOCKED
+        self.assertEqual(ad_status.get_status('ivanov', force=True)['locked'], True)
+        self.assertEqual(ad_status.get_status('ivanov')['locked'], True)
+
+    def test_webhook_invalidates(self):
+        ad_status.get_status('ivanov')
+        self.ad.get_user_status.return_value = LOCKED
+        response = self.client.post(
+            reverse('ad_lockout_webhook'),
+            json.dumps({'username': 'IVANOV', 'event_type': 'lockout'}), content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(ad_status.get_status('ivanov')['locked'])
+        self.assertEqual(self.ad.get_user_status.call_count, 2)
+
+    def test_unlock_invalidates(self):
+        employee = Employee.objects.create(fio='Иванов Иван', office='ORL', ad_login='ivanov')
+        self.ad.get_user_status.return_value = LOCKED
+        ad_status.get_status('ivanov')
+
+        self.ad.unlock_user.return_value = {'success': True}
+        self.ad.get_user_status.return_value = ACTIVE
+        self.client.post(reverse('unlock_ad_account', args=[employee.pk]))
+        self.ad.unlock_user.assert_called_once_with('ivanov')
+        self.assertFalse(self.client.get(reverse('employee_ad_status', args=[employee.pk])).json()['locked'])
+
+
+@LOCMEM_CACHE
+class SyncStatusesTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.ad = mock.Mock()
+        self.ad.get_all_user_statuses.return_value = {
+            'ivanov': ACTIVE,
+            'petrov': {**LOCKED, 'display_name': 'Петров Пётр'},
+            'sidorov': {**ACTIVE, 'disabled': True, 'display_name': 'Сидоров'},
+            'service': ACTIVE,
+        }
+        patcher = mock.patch('staff.ad_status.ADService', mock.Mock(return_value=self.ad))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.ivanov = Employee.objects.create(fio='Иванов Иван', office='ORL', ad_login='Ivanov')
+        self.petrov = Employee.objects.create(fio='Петров Пётр', office='ORL', ad_login='petrov')
+        self.gone = Employee.objects.create(fio='Уволен Давно', office='ORL', ad_login='gone', status='dismissed')
+        Employee.objects.create(fio='Без Логина', office='ORL')
+
+    def run_command(self, *args):
+        out = StringIO()
+        call_command('sync_ad_status', *args, stdout=out)
+        return out.getvalue()
+
+    def test_statuses_stored_by_login(self):
+        output = self.run_command('--page-size', '100')
+        self.ad.get_all_user_statuses.assert_called_once_with(100)
+        self.assertIn('учётных записей в AD 4, сотрудников с логином 3', output)
+        self.assertIn('заблокировано: 1, ⛔ отключено: 0, ⚠️ не найдено в AD: 1', output)
+
+        rows = {row.employee_id: row for row in ADAccountStatus.objects.all()}
+        self.assertEqual(set(rows), {self.ivanov.pk, self.petrov.pk, self.gone.pk})
+        self.assertTrue(rows[self.ivanov.pk].found)
+        self.assertEqual(rows[self.ivanov.pk].display_name, 'Иванов Иван')
+        self.assertTrue(rows[self.petrov.pk].locked)
+        self.assertFalse(rows[self.gone.pk].found)
+        self.assertEqual(len({row.fetched_at for row in rows.values()}), 1)
+
+    def test_table_replaced_and_cache_filled(self):
+        self.run_command()
+        self.ad.get_all_user_statuses.return_value = {'ivanov': LOCKED}
+        self.run_command()
+        self.assertEqual(ADAccountStatus.objects.count(), 3)
+        self.assertTrue(ADAccountStatus.objects.get(employee=self.ivanov).locked)
+        self.assertFalse(ADAccountStatus.objects.get(employee=self.petrov).found)
+
+        # Карточка берёт статус из кэша, который заполнила синхронизация
+        status = ad_status.get_status('ivanov')
+        self.assertTrue(status['locked'])
+        self.assertFalse(status['stale'])
+        self.ad.get_user_status.assert_not_called()
+
+    def test_connection_error_keeps_table(self):
+        self.run_command()
+        self.ad.get_all_user_statuses.side_effect = LDAPCommunicationError('no route to host')
+        self.assertIn('Нет связи с AD', self.run_command())
+        self.assertEqual(ADAccountStatus.objects.count(), 3)
@@ -0,0 +1,127 @@
+from django.db import transaction
+from django.test import TestCase
+
+from staff.bulk_upsert import BulkUpdater, BulkUpserter
+from staff.models import Employee, Equipment
+
+from . import LOCMEM_CACHE
+
+
+def equipment_state():
+    return list(Equipment.objects.order_by('serial_number').values_list(
+        'serial_number', 'type', 'model', 'office', 'comment', 'employee__fio',
+    ))
+
+
+@LOCMEM_CACHE
+class BulkUpserterTests(TestCase):
+    # Повторы ключа внутри пачки и между пачками, плюс уже существующая запись
+    ROWS = [
+        ('SN-1', {'type': 'PC', 'office': 'ORL', 'model': 'a'}),
+        ('SN-2', {'type': 'PC', 'office': 'MSK', 'model': 'b'}),
+        ('SN-1', {'type': 'PC', 'office': 'ORL', 'model': 'c'}),
+        ('SN-0', {'type': 'SIP', 'office': 'ORL', 'model': 'd'}),
+        ('SN-3', {'type': 'Монитор', 'office': 'MSK', 'model': 'e'}),
+        ('SN-2', {'type': 'PC', 'office': 'SKLAD', 'model': 'f'}),
+    ]
+
+    def setUp(self):
+        Equipment.objects.create(serial_number='SN-0', type='SIP', office='MSK', model='old')
+
+    def sequential(self):
+        """created и итог при update_or_create на каждую строку; изменения откатываются"""
+        with transaction.atomic():
+            created = [
+                Equipment.objects.update_or_create(serial_number=key, defaults=defaults)[1]
+                for key, defaults in self.ROWS
+            ]
+            state = equipment_state()
+            transaction.set_rollback(True)
+        return created, state
+
+    def test_same_results_as_update_or_create(self):
+        expected_created, expected_state = self.sequential()
+        for batch_size in (1, 2, 4, len(self.ROWS)):
+            with self.subTest(batch_size=batch_size), transaction.atomic():
+                upserter = BulkUpserter(Equipment, 'serial_number', ['type', 'office', 'model'], batch_size=batch_size)
+                results = []
+                for row_num, (key, defaults) in enumerate(self.ROWS):
+                    results.extend(upserter.add(key, defaults, row=row_num))
+                results.extend(upserter.flush())
+
+                self.assertEqual([item['row'] for item, _ in results], list(range(len(self.ROWS))))
+                self.assertEqual([created for _, created in results], expected_created)
+                self.assertEqual((upserter.created, upserter.updated), (3, 3))
+                self.assertEqual(equipment_state(), expected_state)
+                transaction.set_rollback(True)
+
+
+@LOCMEM_CACHE
+class SummaryQuerySetBulkTests(TestCase):
+
+    def test_bulk_create_accepts_generator(self):
+        Equipment.objects.create(serial_number='SN-0', type='SIP', office='MSK', model='old')
+        objs = (Equipment(serial_number=f'SN-{i}', type='PC', office='ORL', model='new') for i in range(3))
+        Equipment.objects.bulk_create(
+            objs, update_conflicts=True, unique_fields=['serial_number'], update_fields=['type', 'office', 'model'],
+        )
+        self.assertEqual(
+            list(Equipment.objects.order_by('serial_number').values_list('serial_number', 'model')),
+            [('SN-0', 'new'), ('SN-1', 'new'), ('SN-2', 'new')],
+        )
+
+    def test_bulk_update_accepts_generator(self):
+        Equipment.objects.bulk_create([Equipment(serial_number=f'SN-{i}', type='PC', office='ORL') for i in range(3)])
+
+        def renamed():
+            for equipment in Equipment.objects.all():
+                equipment.model = 'renamed'
+                yield equipment
+
+        self.assertEqual(Equipment.objects.bulk_update(renamed(), ['model']), 3)
+        self.assertEqual(set(Equipment.objects.values_list('model', flat=True)), {'renamed'})
+
+
+@LOCMEM_CACHE
+class BulkUpdaterTests(TestCase):
+
+    def setUp(self):
+        for login in ('ivanov', 'petrov', 'sidorov'):
+            Employee.objects.create(fio=login.capitalize(), ad_login=login, office='ORL')
+
+    def test_failed_object_does_not_lose_others(self):
+        # Как при save() по одному: дубль AD-логина падает, остальные записываются
+        employees = {e.ad_login: e for e in Employee.objects.all()}
+        updater = BulkUpdater(Employee, batch_size=10)
+        employees['ivanov'].position = 'Инженер'
+        updater.add(employees['ivanov'], {'position': ''}, row=2)
+        employees['petrov'].ad_login = 'sidorov'
+        updater.add(employees['petrov'], {'ad_login': 'petrov'}, row=3)
+        employees['sidorov'].office = 'MSK'
+        updater.add(employees['sidorov'], {'office': 'ORL'}, row=4)
+        employees['ivanov'].office = 'MSK'
+        updater.add(employees['ivanov'], {'office': 'ORL'}, row=5)
+
+        results = updater.flush()
+
+        errors = {entry['obj'].fio: error for entry, error in results}
+        self.assertIsNone(errors['Ivanov'])
+        self.assertIsNotNone(errors['Petrov'])
+        self.assertIsNone(errors['Sidorov'])
+        merged = next(entry for entry, _ in results if entry['obj'].fio == 'Ivanov')
+        self.assertEqual(merged['rows'], [2, 5])
+        self.assertEqual(merged['changed'], {'position': '', 'office': 'ORL'})
+        self.assertEqual(
+            list(Employee.objects.order_by('fio').values_list('fio', 'ad_login', 'office', 'position')),
+            [('Ivanov', 'ivanov', 'MSK', 'Инженер'), ('Petrov', 'petrov', 'ORL', ''), ('Sidorov', 'sidorov', 'MSK', '')],
+        )
+
+    def test_full_batch_is_written_by_add(self):
+        employees = list(Employee.objects.order_by('fio'))
+        updater = BulkUpdater(Employee, batch_size=2)
+        for employee in employees[:2]:
+            employee.position = 'Юрист'
+        self.assertEqual(updater.add(employees[0], {'position': ''}), [])
+        self.assertEqual(len(updater.add(employees[1], {'position': ''})), 2)
+        self.assertEqual(Employee.objects.filter(position='Юрист').count(), 2)
+        self.assertEqual(updater.flush(), [])
@@ -0,0 +1,84 @@
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from staff.models import Employee, Equipment
+
+from . import LOCMEM_CACHE
+
+
+@LOCMEM_CACHE
+class ConditionalResponseTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(User.objects.create_user('viewer'))
+        self.employee = Employee.objects.create(fio='Иванов Иван', office='ORL')
+        Equipment.objects.create(serial_number='SN-1', type='PC', office='ORL', employee=self.employee)
+
+    def assertNotModified(self, url, params=None, **headers):
+        response = self.client.get(url, params, **headers)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        response = self.client.get(url, params, HTTP_IF_NONE_MATCH=etag, **headers)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+        return etag
+
+    def test_typeahead_not_modified(self):
+        url = reverse('employee_typeahead')
+        etag = self.assertNotModified(url, {'q': 'ив'})
+        self.assertNotEqual(self.client.get(url, {'q': 'ив', 'limit': 5})['ETag'], etag)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Employee.objects.create(fio='Ивлев Олег', office='ORL')
+        response = self.client.get(url, {'q': 'ив'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['results']), 2)
+
+    def test_equipment_partial_not_modified(self):
+        url = reverse('employee_equipment_partial', args=[self.employee.pk])
+        etag = self.assertNotModified(url)
+        # У JSON того же сотрудника свой ETag
+        json_url = reverse('employee_equipment_json', args=[self.employee.pk])
+        self.assertNotEqual(self.client.get(json_url)['ETag'], etag)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Equipment.objects.create(serial_number='SN-2', type='MON', office='ORL', employee=self.employee)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'SN-2')
+
+    def test_employees_list_panel(self):
+        url = reverse('employees_list')
+        params = {'selected_id': self.employee.pk}
+        # CSRF-cookie браузер получает с полной страницей
+        self.client.get(url, params)
+        etag = self.assertNotModified(url, params, HTTP_HX_REQUEST='true')
+
+        # Полная страница без ETag
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('ETag', response)
+
+        # В панели CSRF-токен: новый секрет — новый ETag
+        self.client.cookies[settings.CSRF_COOKIE_NAME] = 'x' * 32
+        response = self.client.get(url, params, HTTP_IF_NONE_MATCH=etag, HTTP_HX_REQUEST='true')
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Employee.objects.filter(pk=self.employee.pk).update(position='Инженер')
+        response = self.client.get(url, params, HTTP_IF_NONE_MATCH=etag, HTTP_HX_REQUEST='true')
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Инженер')
+
+    def test_gzip(self):
+        url = reverse('employees_list')
+        response = self.client.get(
+            url, {'selected_id': self.employee.pk}, HTTP_HX_REQUEST='true', HTTP_ACCEPT_ENCODING='gzip',
+        )
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
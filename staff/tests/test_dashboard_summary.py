@@ -0,0 +1,51 @@
+from django.test import TestCase
+
+from staff.dashboard_summary import build_summary, get_summary
+from staff.models import Employee, Equipment
+
+from . import LOCMEM_CACHE
+
+
+@LOCMEM_CACHE
+class SummaryCacheTests(TestCase):
+
+    def setUp(self):
+        self.employee = Employee.objects.create(fio='Иванов Иван', office='ORL')
+        Equipment.objects.create(serial_number='SN-1', type='PC', office='ORL')
+
+    def assertRecounted(self, action):
+        get_summary()  # сводка в кэше
+        with self.captureOnCommitCallbacks(execute=True):
+            action()
+        self.assertEqual(get_summary(), build_summary())
+
+    def test_counts_in_one_query(self):
+        with self.assertNumQueries(2):
+            summary = build_summary()
+        self.assertEqual((summary['total_employees'], summary['active']), (1, 1))
+        self.assertEqual(summary['free_equipment_summary']['data'], {'PC': {'ORL': 1}})
+
+    def test_cached_until_write(self):
+        get_summary()
+        with self.assertNumQueries(0):
+            get_summary()
+
+    def test_invalidated_by_queryset_writes(self):
+        actions = {
+            'save': lambda: Employee.objects.create(fio='Петров Пётр', office='MSK'),
+            'update': lambda: Employee.objects.filter(pk=self.employee.pk).update(status='maternity'),
+            'bulk_create': lambda: Equipment.objects.bulk_create([Equipment(serial_number='SN-2', type='PC', office='MSK')]),
+            'bulk_update': lambda: Equipment.objects.bulk_update(
+                [Equipment(pk=Equipment.objects.get(serial_number='SN-1').pk, type='SIP', office='MSK')], ['type', 'office'],
+            ),
+            'delete': lambda: Equipment.objects.filter(serial_number='SN-2').delete(),
+        }
+        for name, action in actions.items():
+            with self.subTest(name):
+                self.assertRecounted(action)
+
+    def test_not_invalidated_before_commit(self):
+        cached = get_summary()
+        with self.captureOnCommitCallbacks(execute=False):
+            Employee.objects.filter(pk=self.employee.pk).update(status='dismissed')
+        self.assertEqual(get_summary(), cached)
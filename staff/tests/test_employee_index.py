@@ -0,0 +1,56 @@
+from django.test import TestCase
+
+from staff.employee_index import EmployeeIndex, normalize_name
+from staff.models import Employee
+
+from . import LOCMEM_CACHE
+
+
+@LOCMEM_CACHE
+class EmployeeIndexTests(TestCase):
+
+    def setUp(self):
+        self.ivanov = Employee.objects.create(
+            fio='Иванов Иван Иванович', last_name='Иванов', first_name='Иван', ad_login='ivanov', office='ORL',
+        )
+        self.ivanov2 = Employee.objects.create(
+            fio='Иванов Иван Петрович', last_name='Иванов', first_name='Иван', office='MSK',
+        )
+        self.fedorov = Employee.objects.create(fio='Фёдоров Пётр', last_name='Фёдоров', first_name='Пётр', office='ORL')
+
+    def test_normalize_name(self):
+        self.assertEqual(normalize_name('  ФЁДОРОВ   Пётр '), 'федоров петр')
+        self.assertEqual(normalize_name(None), '')
+
+    def test_lookups_match_orm_first(self):
+        index = EmployeeIndex()
+        with self.assertNumQueries(0):
+            self.assertEqual(index.find_by_login('ivanov'), self.ivanov)
+            self.assertEqual(index.find_exact('иванов иван петрович'), self.ivanov2)
+            self.assertEqual(index.find_by_prefix('Федоров Петр'), self.fedorov)
+            self.assertEqual(index.find_containing('Петрович'), self.ivanov2)
+            self.assertEqual(index.find_by_last_name('Иванов', 'Иван'), self.ivanov)
+            self.assertIsNone(index.find_by_prefix('Сидоров Сидор'))
+
+    def test_ambiguous_prefix_takes_lowest_pk(self):
+        index = EmployeeIndex()
+        self.assertEqual(index.find_by_prefix('Иванов Иван'), self.ivanov)
+        self.assertEqual(index.ambiguous, {'иванов иван': ['Иванов Иван Иванович', 'Иванов Иван Петрович']})
+
+    def test_add_remove_and_reindex(self):
+        index = EmployeeIndex()
+        new = Employee(fio='Сидоров Сидор', ad_login='sidorov', office='ORL')
+        index.add(new)
+        self.assertIs(index.find_by_login('sidorov'), new)
+        self.assertIs(index.find_by_prefix('Сидоров Сидор'), new)
+        index.remove(new)
+        self.assertIsNone(index.find_by_login('sidorov'))
+        self.assertIsNone(index.find_by_prefix('Сидоров Сидор'))
+
+        old_fio, old_login = self.fedorov.fio, self.fedorov.ad_login
+        employee = index.find_exact(old_fio)
+        employee.fio, employee.ad_login = 'Орлов Пётр', 'orlov'
+        index.reindex(employee, old_fio, old_login)
+        self.assertIsNone(index.find_exact(old_fio))
+        self.assertIs(index.find_exact('Орлов Пётр'), employee)
+        self.assertIs(index.find_by_login('orlov'), employee)
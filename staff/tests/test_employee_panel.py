@@ -0,0 +1,108 @@
+import re
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.middleware.csrf import get_token
+from django.template.loader import render_to_string
+from django.test import RequestFactory, TestCase
+from django.urls import reverse
+
+from staff.employee_panel import CSRF_PLACEHOLDER, FRAGMENT_KEY, TEMPLATE, panel_version, render_panel
+from staff.models import Employee, Equipment
+
+from . import LOCMEM_CACHE
+
+CSRF_INPUT = re.compile(r'name="csrfmiddlewaretoken" value="[^"]+"')
+
+
+def unmasked(html):
+    # get_token каждый раз маскирует токен заново
+    return CSRF_INPUT.sub('name="csrfmiddlewaretoken"', html)
+
+
+@LOCMEM_CACHE
+class RenderPanelTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.employee = Employee.objects.create(
+            fio='Иванов Иван', office='ORL', ad_login='ivanov',
+            ad_password='a<b"c\'d', email_password='mail-секрет',
+        )
+        Equipment.objects.create(serial_number='SN-1', type='PC', office='ORL', employee=self.employee)
+        self.request = RequestFactory().get('/employees/')
+
+    def expected(self):
+        # Та же панель без кэша и заглушек
+        employee = Employee.objects.with_laptop_anydesk().prefetch_related('equipment_set').get(pk=self.employee.pk)
+        return render_to_string(TEMPLATE, {'selected_employee': employee, 'csrf_token': get_token(self.request)})
+
+    def test_matches_uncached_render(self):
+        expected = unmasked(self.expected())
+        self.assertEqual(unmasked(render_panel(self.request, self.employee.pk)), expected)
+        # Из кэша: один запрос за паролями
+        with self.assertNumQueries(1):
+            html = render_panel(self.request, str(self.employee.pk))
+        self.assertEqual(unmasked(html), expected)
+
+    def test_passwords_and_csrf_are_not_cached(self):
+        render_panel(self.request, self.employee.pk)
+        fragment = cache.get(FRAGMENT_KEY.format(self.employee.pk, panel_version(self.employee.pk)))
+        self.assertNotIn('mail-секрет', fragment)
+        self.assertIn(CSRF_PLACEHOLDER, fragment)
+
+        # Пароль меняется без записи через ORM-сигналы — всё равно выдаётся текущий
+        Employee.objects.filter(pk=self.employee.pk).update(email_password='новый')
+        cache.set(FRAGMENT_KEY.format(self.employee.pk, panel_version(self.employee.pk)), fragment)
+        html = render_panel(self.request, self.employee.pk)
+        self.assertIn('новый', html)
+        self.assertNotIn('mail-секрет', html)
+
+    def test_version_bumped_by_employee_and_equipment_writes(self):
+        pk = self.employee.pk
+        self.assertEqual(panel_version(pk), 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Employee.objects.filter(pk=pk).update(position='Инженер')
+        version = panel_version(pk)
+        self.assertNotEqual(version, 0)
+        self.assertIn('Инженер', render_panel(self.request, pk))
+
+        # Закрепление оборудования через .update() меняет панель нового держателя
+        Equipment.objects.create(serial_number='SN-2', type='MON', office='ORL')
+        with self.captureOnCommitCallbacks(execute=True):
+            Equipment.objects.filter(serial_number='SN-2').update(employee=self.employee)
+        self.assertNotEqual(panel_version(pk), version)
+        self.assertIn('SN-2', render_panel(self.request, pk))
+
+        # Увольнение освобождает оборудование сигналом — панель без него
+        version = panel_version(pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.employee.status = 'dismissed'
+            self.employee.save()
+        self.assertNotEqual(panel_version(pk), version)
+        self.assertNotIn('SN-2', render_panel(self.request, pk))
+
+    def test_missing_employee(self):
+        self.assertIsNone(render_panel(self.request, 'abc'))
+        self.assertIsNone(render_panel(self.request, self.employee.pk + 100))
+
+        render_panel(self.request, self.employee.pk)
+        Employee.objects.filter(pk=self.employee.pk).delete()
+        self.assertIsNone(render_panel(self.request, self.employee.pk))
+
+
+@LOCMEM_CACHE
+class EmployeesListPanelTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(User.objects.create_user('viewer'))
+        self.employee = Employee.objects.create(fio='Иванов Иван', office='ORL')
+        self.url = reverse('employees_list')
+
+    def test_htmx_returns_panel(self):
+        response = self.client.get(self.url, {'selected_id': self.employee.pk}, HTTP_HX_REQUEST='true')
+        self.assertContains(response, 'Иванов Иван')
+        self.assertNotContains(response, '<html')
+        self.assertIn('HX-Request', response['Vary'])
@@ -0,0 +1,71 @@
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+
+from staff.employee_search import keyset_page, search_employees
+from staff.models import Employee
+
+from . import LOCMEM_CACHE
+
+
+@LOCMEM_CACHE
+class EmployeeKeysetTests(TestCase):
+
+    def test_cursor_walks_fio_ties(self):
+        for fio in ('Петров', 'Иванов', 'Иванов', 'Сидоров', 'Иванов', 'Алексеев', 'Петров'):
+            Employee.objects.create(fio=fio, office='ORL')
+        expected = list(Employee.objects.order_by('fio', 'id').values_list('pk', flat=True))
+
+        seen, cursor = [], None
+        while True:
+            rows, cursor = keyset_page(Employee.objects.all(), cursor, size=3)
+            seen.extend(row.pk for row in rows)
+            if cursor is None:
+                break
+        self.assertEqual(seen, expected)
+
+        # Битый курсор — первая страница, а не ошибка
+        rows, _ = keyset_page(Employee.objects.all(), 'not-a-cursor', size=3)
+        self.assertEqual([row.pk for row in rows], expected[:3])
+
+    def test_exact_page_has_no_next_cursor(self):
+        for i in range(3):
+            Employee.objects.create(fio=f'Сотрудник {i}')
+        rows, cursor = keyset_page(Employee.objects.all(), size=3)
+        self.assertEqual((len(rows), cursor), (3, None))
+
+
+@LOCMEM_CACHE
+class SearchEmployeesTests(TestCase):
+
+    def setUp(self):
+        self.ivanov = Employee.objects.create(
+            fio='Иванов Иван Петрович', position='Инженер', office='ORL', ad_login='ivanov', ad_password='secret',
+        )
+        self.petrov = Employee.objects.create(fio='Петров Пётр', position='Юрист', office='MSK', status='dismissed')
+
+    def found(self, *args):
+        return set(search_employees(*args).values_list('pk', flat=True))
+
+    def test_filters(self):
+        self.assertEqual(self.found('иванов'), {self.ivanov.pk})
+        self.assertEqual(self.found('ИНЖЕНЕР'), {self.ivanov.pk})
+        self.assertEqual(self.found('иван инженер'), {self.ivanov.pk})  # каждое слово
+        self.assertEqual(self.found('иван юрист'), set())
+        self.assertEqual(self.found('', 'dismissed'), {self.petrov.pk})
+        self.assertEqual(self.found('', 'all', 'ORL'), {self.ivanov.pk})
+        self.assertEqual(self.found(''), {self.ivanov.pk, self.petrov.pk})
+
+    def test_list_fields_only(self):
+        employee = search_employees('иванов').get()
+        self.assertIn('ad_password', employee.get_deferred_fields())
+        self.assertIn('info', employee.get_deferred_fields())
+
+    def test_list_view_pages(self):
+        for i in range(60):
+            Employee.objects.create(fio=f'Яковлев {i:02d}', office='ORL')
+        self.client.force_login(User.objects.create_user('viewer'))
+        response = self.client.get(reverse('employees_list'), {'q': 'яковлев'})
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Яковлев 00')
+        self.assertNotContains(response, 'Яковлев 59')
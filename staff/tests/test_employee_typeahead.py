@@ -0,0 +1,77 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from staff.employee_typeahead import MAX_LIMIT, current_version, suggest
+from staff.models import Employee
+
+from . import LOCMEM_CACHE
+
+
+@LOCMEM_CACHE
+class SuggestTests(TestCase):
+
+    def setUp(self):
+        # Версия в кэше пережила бы откат прошлого теста вместе со снимком процесса
+        cache.clear()
+        self.petrov = Employee.objects.create(fio='Иванов Пётр Сергеевич', office='ORL')
+        self.ivan = Employee.objects.create(fio='Петров Иван', office='MSK')
+        Employee.objects.create(fio='Иванова Анна', status='dismissed')
+
+    def test_every_word_matches_start_of_some_part(self):
+        self.assertEqual(suggest('ив серг'), [(self.petrov.pk, 'Иванов Пётр Сергеевич', 'ORL')])
+        self.assertEqual([pk for pk, _, _ in suggest('ив пет')], [self.petrov.pk, self.ivan.pk])
+        self.assertEqual(suggest('ванов'), [])
+        self.assertEqual(suggest('   '), [])
+
+    def test_case_and_yo_are_folded(self):
+        self.assertEqual([pk for pk, _, _ in suggest('ПЕТР СЕРГ')], [self.petrov.pk])
+
+    def test_only_active_employees(self):
+        self.assertEqual([fio for _, fio, _ in suggest('иванов')], ['Иванов Пётр Сергеевич'])
+
+    def test_limit(self):
+        self.assertEqual(len(suggest('ив', limit=1)), 1)
+
+    def test_snapshot_reused_until_employee_write(self):
+        suggest('ив')
+        version = current_version()
+        with self.assertNumQueries(0):
+            suggest('пет')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Employee.objects.filter(pk=self.ivan.pk).update(status='dismissed')
+        self.assertNotEqual(current_version(), version)
+        self.assertEqual([pk for pk, _, _ in suggest('ив')], [self.petrov.pk])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Employee.objects.create(fio='Ивлев Олег')
+        self.assertEqual([fio for _, fio, _ in suggest('ивл')], ['Ивлев Олег'])
+
+
+@LOCMEM_CACHE
+class TypeaheadViewTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        for number in range(MAX_LIMIT + 5):
+            Employee.objects.create(fio=f'Сидоров {number:02d}', office='ORL')
+        self.url = reverse('employee_typeahead')
+
+    def test_anonymous_is_redirected_to_login(self):
+        response = self.client.get(self.url, {'q': 'сид'})
+        self.assertEqual(response.status_code, 302)
+
+    def test_results_and_limit_clamp(self):
+        self.client.force_login(User.objects.create_user('viewer'))
+        results = self.client.get(self.url, {'q': 'сид 00'}).json()['results']
+        self.assertEqual(results, [{
+            'id': Employee.objects.get(fio='Сидоров 00').pk, 'fio': 'Сидоров 00',
+            'office': 'ORL', 'office_display': dict(Employee.OFFICE_CHOICES)['ORL'],
+        }])
+
+        self.assertEqual(len(self.client.get(self.url, {'q': 'сид'}).json()['results']), 20)
+        self.assertEqual(len(self.client.get(self.url, {'q': 'сид', 'limit': 1000}).json()['results']), MAX_LIMIT)
+        self.assertEqual(len(self.client.get(self.url, {'q': 'сид', 'limit': 0}).json()['results']), 1)
+        self.assertEqual(len(self.client.get(self.url, {'q': 'сид', 'limit': 'x'}).json()['results']), 20)
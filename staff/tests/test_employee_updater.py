@@ -0,0 +1,71 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from staff.employee_updater import EmployeeUpdater, create_employees
+from staff.models import Employee, Equipment
+
+from . import LOCMEM_CACHE
+
+
+@LOCMEM_CACHE
+class EmployeeUpdaterTests(TestCase):
+
+    def setUp(self):
+        self.employees = [
+            Employee.objects.create(fio=f'Сотрудник {i}', ad_login=f'user{i}', office='ORL') for i in range(6)
+        ]
+        for i, employee in enumerate(self.employees[:3]):
+            Equipment.objects.create(serial_number=f'SN-{i}', type='PC', office='ORL', employee=employee)
+
+    def test_grouped_by_changed_fields(self):
+        updater = EmployeeUpdater()
+        for i, employee in enumerate(self.employees):
+            # Две группы полей: position и (position, phone)
+            changed = {'position': employee.position}
+            employee.position = 'Инженер'
+            if i % 2:
+                changed['phone'] = employee.phone
+                employee.phone = f'10{i}'
+            updater.add(employee, changed)
+        with CaptureQueriesContext(connection) as queries:
+            updater.flush()
+        updates = [q['sql'] for q in queries if q['sql'].startswith('UPDATE "staff_employee"')]
+        self.assertEqual(len(updates), 2)
+        self.assertEqual(Employee.objects.filter(position='Инженер').count(), 6)
+        self.assertEqual(Employee.objects.get(pk=self.employees[1].pk).phone, '101')
+
+    def test_status_change_releases_equipment(self):
+        updater = EmployeeUpdater()
+        dismissed, maternity, untouched = self.employees[:3]
+        dismissed.status = 'dismissed'
+        updater.add(dismissed, {'status': 'active'})
+        maternity.status = 'maternity'
+        updater.add(maternity, {'status': 'active'})
+        untouched.position = 'Юрист'
+        updater.add(untouched, {'position': ''})
+        results = updater.flush()
+
+        self.assertTrue(all(error is None for _, error in results))
+        self.assertEqual(updater.equipment_freed, 2)
+        self.assertEqual(
+            dict(Equipment.objects.values_list('serial_number', 'employee_id')),
+            {'SN-0': None, 'SN-1': None, 'SN-2': untouched.pk},
+        )
+
+
+class CreateEmployeesTests(TestCase):
+
+    def test_duplicate_does_not_lose_others(self):
+        Employee.objects.create(fio='Занят', ad_login='taken')
+        pending = [
+            (Employee(fio='Новый 1', ad_login='new1'), 2),
+            (Employee(fio='Дубль', ad_login='taken'), 3),
+            (Employee(fio='Новый 2', ad_login='new2'), 4),
+        ]
+        results = create_employees(pending)
+        self.assertEqual([row for _, row, error in results if error is not None], [3])
+        self.assertEqual(
+            sorted(Employee.objects.values_list('ad_login', flat=True)), ['new1', 'new2', 'taken'],
+        )
+        self.assertEqual(create_employees([]), [])
@@ -0,0 +1,57 @@
+from django.test import TestCase
+
+from staff.equipment_pagination import cached_count, keyset_page
+from staff.models import Employee, Equipment
+
+from . import LOCMEM_CACHE
+
+
+@LOCMEM_CACHE
+class EquipmentKeysetTests(TestCase):
+
+    def setUp(self):
+        Equipment.objects.bulk_create([Equipment(serial_number=f'SN-{i}', type='PC', office='ORL') for i in range(25)])
+        self.equipment = Equipment.objects.all()
+        self.ids = list(self.equipment.order_by('-id').values_list('id', flat=True))
+
+    def test_pages_forward_and_back(self):
+        equipment, ids = self.equipment, self.ids
+        pages = [keyset_page(equipment, 25, 10)]
+        while pages[-1].has_next():
+            pages.append(keyset_page(equipment, 25, 10, page=pages[-1].number + 1, after=pages[-1].next_cursor))
+        self.assertEqual([[e.pk for e in page] for page in pages], [ids[:10], ids[10:20], ids[20:]])
+        self.assertEqual([page.number for page in pages], [1, 2, 3])
+
+        back = keyset_page(equipment, 25, 10, page=2, before=pages[-1].previous_cursor)
+        self.assertEqual([e.pk for e in back], ids[10:20])
+        self.assertTrue(back.has_previous() and back.has_next())
+        first = keyset_page(equipment, 25, 10, page=1, before=back.previous_cursor)
+        self.assertEqual([e.pk for e in first], ids[:10])
+        self.assertFalse(first.has_previous())
+
+        last = keyset_page(equipment, 25, 10, page='last')
+        self.assertEqual([e.pk for e in last], ids[20:])
+        self.assertEqual(last.number, 3)
+        self.assertFalse(last.has_next())
+
+    def test_bad_cursor_is_first_page(self):
+        page = keyset_page(self.equipment, 25, 10, page='x', after='not-an-id')
+        self.assertEqual([e.pk for e in page], self.ids[:10])
+        self.assertEqual(page.number, 1)
+
+    def test_count_cached_until_write(self):
+        filters = ('', 'PC', '', '', '', '')
+        self.assertEqual(cached_count(self.equipment.filter(type='PC'), filters), 25)
+        with self.assertNumQueries(0):
+            self.assertEqual(cached_count(self.equipment.filter(type='PC'), filters), 25)
+
+        # Запись оборудования сбрасывает счётчики
+        with self.captureOnCommitCallbacks(execute=True):
+            Equipment.objects.create(serial_number='SN-new', type='PC', office='ORL')
+        self.assertEqual(cached_count(self.equipment.filter(type='PC'), filters), 26)
+
+        # Запись сотрудника тоже: поиск идёт и по ФИО держателя
+        with self.captureOnCommitCallbacks(execute=True):
+            Employee.objects.create(fio='Иванов Иван')
+        with self.assertNumQueries(1):
+            cached_count(self.equipment.filter(type='PC'), filters)
@@ -0,0 +1,127 @@
+import json
+import os
+from datetime import date
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from staff.import_changes import ChangeSet, ChangeSetApplier, apply_change_set
+from staff.models import Employee, ImportFingerprint
+
+from . import LOCMEM_CACHE, temp_workbook
+from .test_workbook_sync import database_state
+
+# Команды импорта с опциями ImportCommandMixin: --dry-run / --apply есть у каждой
+IMPORT_COMMANDS = [
+    ('import_employees_complete', []),
+    ('import_employees', []),
+    ('import_dismissal', []),
+    ('import_dismissal_fixed', []),
+    ('update_dismissed_data', []),
+    ('import_equipment', []),
+    ('import_equipment_fixed', []),
+    ('import_employment', []),
+    ('update_positions_offices', []),
+    ('import_free_equipment', []),
+    ('import_sheet', ['--sheet', 'Dismissal']),
+    ('sync_workbook', []),
+]
+
+
+@LOCMEM_CACHE
+class DryRunCommandTests(TestCase):
+
+    def setUp(self):
+        self.workbook, _ = temp_workbook(self, rows=60, dismissed=0.2)
+        self.changes = os.path.join(os.path.dirname(self.workbook), 'changes.jsonl')
+        # Сотрудники из Employment уже в базе — остальным командам есть что сопоставлять
+        self.run_command('import_employees_complete')
+        ImportFingerprint.objects.all().delete()
+
+    def run_command(self, name, *args):
+        call_command(name, '--file', self.workbook, *args, stdout=StringIO())
+
+    def rolled_back(self, *commands):
+        """Состояние базы после команд; сами изменения откатываются"""
+        with transaction.atomic():
+            for name, args in commands:
+                self.run_command(name, *args)
+            state = database_state(), ImportFingerprint.objects.count()
+            transaction.set_rollback(True)
+        return state
+
+    def test_dry_run_writes_nothing_and_apply_matches_direct_run(self):
+        before = database_state(), ImportFingerprint.objects.count()
+        for name, args in IMPORT_COMMANDS:
+            with self.subTest(name):
+                self.run_command(name, *args, '--dry-run', '--diff-out', self.changes)
+                self.assertEqual((database_state(), ImportFingerprint.objects.count()), before)
+
+                applied = self.rolled_back(('import_sheet', ['--sheet', 'Выдано', '--apply', self.changes]))
+                self.assertEqual(applied, self.rolled_back((name, args)))
+
+
+class ChangeSetApplierTests(TestCase):
+
+    def setUp(self):
+        self.employees = [
+            Employee.objects.create(fio=f'Сотрудник {i:02d}', ad_login=f'user{i:02d}', phone='100')
+            for i in range(20)
+        ]
+
+    def change_set(self, changes):
+        """JSONL набора изменений: changes — (сотрудник, {поле: новое значение})"""
+        stream = StringIO()
+        change_set = ChangeSet(stream)
+        for employee, fields in changes:
+            old = {field: getattr(employee, field) for field in fields}
+            for field, value in fields.items():
+                setattr(employee, field, value)
+            change_set.update_employee(employee, old, 'Employment', 2)
+        return stream.getvalue().splitlines()
+
+    def test_conflicting_update_is_skipped(self):
+        first, second = self.employees[:2]
+        lines = self.change_set([
+            (first, {'phone': '200'}),
+            (second, {'phone': '300'}),
+            (self.employees[2], {'status': 'dismissed', 'dismissal_date': date(2024, 5, 1)}),
+        ])
+        Employee.objects.filter(pk=second.pk).update(phone='999')  # изменён после построения набора
+
+        stats = apply_change_set(lines)
+        self.assertEqual(stats['conflicts'], 1)
+        self.assertEqual(Employee.objects.get(pk=first.pk).phone, '200')
+        self.assertEqual(Employee.objects.get(pk=second.pk).phone, '999')
+        dismissed = Employee.objects.get(pk=self.employees[2].pk)
+        self.assertEqual((dismissed.status, dismissed.dismissal_date), ('dismissed', date(2024, 5, 1)))
+
+        # Старые значения-даты из JSON сравниваются с базой после приведения типа
+        lines = self.change_set([(dismissed, {'dismissal_date': date(2024, 6, 1)})])
+        self.assertEqual(apply_change_set(lines)['conflicts'], 0)
+        self.assertEqual(Employee.objects.get(pk=dismissed.pk).dismissal_date, date(2024, 6, 1))
+
+    def test_updates_are_batched(self):
+        lines = self.change_set([(employee, {'phone': f'2{i:02d}'}) for i, employee in enumerate(self.employees)])
+        applier = ChangeSetApplier()
+        with CaptureQueriesContext(connection) as queries:
+            for line in lines:
+                applier.apply(json.loads(line))
+            applier.flush()
+        # Одно чтение текущих значений и один bulk_update на всю пачку (без учёта поискового индекса)
+        statements = [query['sql'].split()[0] for query in queries if '"staff_employee"' in query['sql']]
+        self.assertEqual(statements, ['SELECT', 'UPDATE'])
+        self.assertEqual(
+            list(Employee.objects.order_by('fio').values_list('phone', flat=True)),
+            [f'2{i:02d}' for i in range(20)],
+        )
+
+    def test_repeated_employee_flushes_batch(self):
+        employee = self.employees[0]
+        lines = self.change_set([(employee, {'phone': '200'}), (employee, {'phone': '300'})])
+        stats = apply_change_set(lines)
+        self.assertEqual(stats['conflicts'], 0)
+        self.assertEqual(Employee.objects.get(pk=employee.pk).phone, '300')
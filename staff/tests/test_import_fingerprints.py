@@ -0,0 +1,76 @@
+from django.test import TestCase
+
+from staff.import_fingerprints import FingerprintStore
+from staff.models import ImportFingerprint
+
+
+class FingerprintStoreTests(TestCase):
+
+    def run_rows(self, rows, full=False, failed=(), keep_vanished=False):
+        store = FingerprintStore('test', full=full, keep_vanished=keep_vanished)
+        applied = []
+        for row_num, (key, values) in enumerate(rows):
+            if store.changed(key, values, row_num=row_num):
+                applied.append(row_num)
+                if row_num in failed:
+                    store.forget_row(row_num)
+        store.save()
+        return store, applied
+
+    def stored_keys(self):
+        return set(ImportFingerprint.objects.values_list('key', flat=True))
+
+    def test_unchanged_rows_are_skipped(self):
+        rows = [('a', ['1']), ('b', ['2']), ('c', ['3'])]
+        self.run_rows(rows)
+        store, applied = self.run_rows([('a', ['1']), ('b', ['changed']), ('c', ['3'])])
+        self.assertEqual(applied, [1])
+        self.assertEqual(store.skipped, 2)
+
+    def test_full_applies_everything(self):
+        rows = [('a', ['1']), ('b', ['2'])]
+        self.run_rows(rows)
+        _, applied = self.run_rows(rows, full=True)
+        self.assertEqual(applied, [0, 1])
+
+    def test_repeated_key_applied_together(self):
+        # Повторы ключа: изменилась первая строка — применяется и вторая
+        self.run_rows([('a', ['1']), ('a', ['2'])])
+        _, applied = self.run_rows([('a', ['changed']), ('a', ['2'])])
+        self.assertEqual(applied, [0, 1])
+
+    def test_forgotten_row_is_applied_again(self):
+        rows = [('a', ['1']), ('b', ['2'])]
+        store, _ = self.run_rows(rows, failed={1})
+        self.assertEqual(self.stored_keys(), {'a'})
+        _, applied = self.run_rows(rows)
+        self.assertEqual(applied, [1])
+
+    def test_failed_row_is_not_vanished(self):
+        self.run_rows([('a', ['1']), ('b', ['2'])])
+        store = FingerprintStore('test')
+        store.changed('a', ['1'], row_num=0)
+        store.changed('b', ['changed'], row_num=1)
+        store.forget_row(1)
+        self.assertEqual(store.vanished, set())
+
+    def test_vanished_rows_are_dropped(self):
+        self.run_rows([('a', ['1']), ('b', ['2'])])
+        store = FingerprintStore('test')
+        store.changed('a', ['1'])
+        self.assertEqual(store.vanished, {'b'})
+        store.save()
+        self.assertEqual(self.stored_keys(), {'a'})
+        _, applied = self.run_rows([('a', ['1']), ('b', ['2'])])
+        self.assertEqual(applied, [1])
+
+    def test_vanished_rows_are_kept_until_pruned(self):
+        self.run_rows([('a', ['1']), ('b', ['2'])])
+        store, _ = self.run_rows([('a', ['1'])], keep_vanished=True)
+        self.assertEqual(store.vanished, {'b'})
+        self.assertEqual(self.stored_keys(), {'a', 'b'})
+        store, _ = self.run_rows([('a', ['1'])], keep_vanished=True)
+        self.assertEqual(store.vanished, {'b'})
+        # Вернулась без изменений — в базе ничего не менялось, применять нечего
+        _, applied = self.run_rows([('a', ['1']), ('b', ['2'])], keep_vanished=True)
+        self.assertEqual(applied, [])
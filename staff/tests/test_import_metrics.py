@@ -0,0 +1,71 @@
+import json
+import os
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from staff.import_metrics import STAGES, ImportMetrics
+from staff.models import Employee
+
+from . import LOCMEM_CACHE, temp_dir, temp_workbook
+
+
+class ImportMetricsTests(TestCase):
+
+    def test_queries_counted_by_stage(self):
+        with ImportMetrics() as metrics:
+            with metrics.stage('read'):
+                list(Employee.objects.all())
+            with metrics.stage('write'):
+                Employee.objects.create(fio='Иванов Иван')
+                # Вложенный этап забирает свои запросы у внешнего
+                with metrics.stage('diff'):
+                    Employee.objects.count()
+            Employee.objects.count()
+        queries = {name: stats['queries'] for name, stats in metrics.stats.items()}
+        self.assertEqual(queries['read'], 1)
+        self.assertEqual(queries['diff'], 1)
+        self.assertGreaterEqual(queries['write'], 1)
+        self.assertEqual(queries['other'], 1)
+        self.assertAlmostEqual(sum(s['seconds'] for s in metrics.stats.values()), metrics.total, places=3)
+
+    def test_timed_rows_go_to_stage(self):
+        def rows():
+            yield 1
+            Employee.objects.count()  # "чтение" следующей строки
+            yield 2
+
+        with ImportMetrics() as metrics:
+            self.assertEqual(list(metrics.timed(rows())), [1, 2])
+        self.assertEqual(metrics.stats['read']['queries'], 1)
+
+    def test_disabled_metrics_do_nothing(self):
+        metrics = ImportMetrics(enabled=False)
+        with metrics:
+            with metrics.stage('read'):
+                Employee.objects.count()
+            self.assertEqual(list(metrics.timed([1, 2])), [1, 2])
+        self.assertEqual(sum(s['queries'] for s in metrics.stats.values()), 0)
+        self.assertEqual(metrics.total, 0.0)
+
+
+@LOCMEM_CACHE
+class MetricsOptionTests(TestCase):
+
+    def test_command_writes_metrics_json(self):
+        workbook, _ = temp_workbook(self, rows=20)
+        path = os.path.join(temp_dir(self), 'metrics.json')
+        stdout = StringIO()
+        call_command(
+            'import_employees_complete', '--file', workbook, '--quiet', '--metrics-json', path, stdout=stdout,
+        )
+        with open(path, encoding='utf-8') as f:
+            report = json.load(f)
+        self.assertEqual(report['command'], 'import_employees_complete')
+        self.assertEqual(set(report['stages']), set(STAGES))
+        self.assertGreater(report['stages']['write']['queries'], 0)
+        self.assertGreater(report['stages']['parse']['seconds'], 0)
+        # --quiet: без построчных сообщений, только итоги
+        self.assertNotIn('✅ Создан', stdout.getvalue())
+        self.assertIn('⏱ Замеры по этапам', stdout.getvalue())
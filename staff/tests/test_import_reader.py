@@ -0,0 +1,51 @@
+import os
+
+from django.test import SimpleTestCase
+from openpyxl import Workbook
+
+from staff.import_reader import WorkbookReader, clean_cell
+
+from . import temp_dir
+
+
+class WorkbookReaderTests(SimpleTestCase):
+
+    def setUp(self):
+        self.dir = temp_dir(self)
+
+    def xlsx(self, rows):
+        path = os.path.join(self.dir, 'book.xlsx')
+        wb = Workbook()
+        ws = wb.active
+        ws.title = 'Выдано'
+        for row in rows:
+            ws.append(row)
+        wb.save(path)
+        return path
+
+    def test_clean_cell(self):
+        self.assertEqual(clean_cell(None), '')
+        self.assertEqual(clean_cell('  Иванов '), 'Иванов')
+        self.assertEqual(clean_cell(12345), '12345')
+
+    def test_rows_are_cleaned_and_padded(self):
+        path = self.xlsx([['ФИО сотрудника', None, 'Офис'], [' Иванов Иван ', 42], [None, None, None]])
+        with WorkbookReader(path) as reader:
+            self.assertIn('Выдано', reader)
+            self.assertNotIn('Свободное', reader)
+            sheet = reader.sheet('Выдано')
+            self.assertEqual(sheet.header(), ['ФИО сотрудника', 'col_1', 'Офис'])
+            self.assertEqual(list(sheet.rows(width=4)), [(2, ('Иванов Иван', '42', '', '')), (3, ('', '', '', ''))])
+            self.assertEqual(list(sheet.rows(clean=False))[0], (2, (' Иванов Иван ', 42, None)))
+
+    def test_csv_is_one_sheet_named_by_file(self):
+        path = os.path.join(self.dir, 'Выдано.csv')
+        with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+            f.write('ФИО сотрудника,Офис\r\nИванов Иван , MSK\r\nПетров\r\n')
+        with WorkbookReader(path) as reader:
+            self.assertEqual(reader.sheetnames, ['Выдано'])
+            sheet = reader.sheet('Выдано')
+            self.assertEqual(sheet.header(), ['ФИО сотрудника', 'Офис'])
+            self.assertEqual(list(sheet.rows(width=2)), [(2, ('Иванов Иван', 'MSK')), (3, ('Петров', ''))])
+            with self.assertRaises(KeyError):
+                reader.sheet('Employment')
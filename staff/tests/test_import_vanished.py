@@ -0,0 +1,93 @@
+import os
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from openpyxl import load_workbook
+
+from staff.import_vanished import prune
+from staff.models import Employee, Equipment
+
+from . import LOCMEM_CACHE, temp_workbook
+
+
+def remove_row(workbook, sheet, column, value):
+    """Удаляет из листа строку, где в колонке column (с 1) стоит value"""
+    ws = workbook[sheet]
+    for row in ws.iter_rows(min_row=2):
+        if row[column - 1].value == value:
+            ws.delete_rows(row[0].row)
+            return
+    raise AssertionError(f"{value!r} нет в листе {sheet}")
+
+
+@LOCMEM_CACHE
+class PruneTests(TestCase):
+
+    def setUp(self):
+        self.workbook, _ = temp_workbook(self, rows=30, duplicates=0, ambiguity=0, dismissed=0)
+        self.sync()
+        self.login = 'user000007'
+        self.serial = Equipment.objects.filter(employee__isnull=False).values_list('serial_number', flat=True)[0]
+
+        # Та же книга без строки сотрудника в Employment и без строки оборудования в Выдано
+        self.shrunk = os.path.join(os.path.dirname(self.workbook), 'shrunk.xlsx')
+        workbook = load_workbook(self.workbook)
+        remove_row(workbook, 'Employment', 4, self.login)
+        remove_row(workbook, 'Выдано', 6, self.serial)
+        workbook.save(self.shrunk)
+
+    def sync(self, *args, file=None):
+        out = StringIO()
+        call_command('sync_workbook', '--file', file or self.workbook, *args, stdout=out)
+        return out.getvalue()
+
+    def state(self):
+        employee = Employee.objects.get(ad_login=self.login)
+        return employee.status, employee.dismissal_date, Equipment.objects.get(serial_number=self.serial).employee_id
+
+    def test_vanished_rows_applied_only_with_prune(self):
+        before = self.state()
+        self.assertEqual(before[0], 'active')
+        self.assertIsNotNone(before[2])
+
+        self.sync(file=self.shrunk)
+        self.assertEqual(self.state(), before)
+
+        # Ключи, пропавшие при запуске без --prune, применяются позже
+        output = self.sync('--prune', file=self.shrunk)
+        status, dismissal_date, owner = self.state()
+        self.assertEqual(status, 'dismissed')
+        self.assertIsNotNone(dismissal_date)
+        self.assertIsNone(owner)
+        self.assertFalse(Equipment.objects.filter(employee__ad_login=self.login).exists())
+        self.assertIn('pruned: 1', output)
+
+        # Применённые ключи забыты: повторный --prune ничего не трогает
+        Employee.objects.filter(ad_login=self.login).update(status='active')
+        self.sync('--prune', file=self.shrunk)
+        self.assertEqual(Employee.objects.get(ad_login=self.login).status, 'active')
+
+    def test_dry_run_plans_prune(self):
+        changes = os.path.join(os.path.dirname(self.workbook), 'changes.jsonl')
+        before = self.state()
+        self.sync('--prune', '--dry-run', '--diff-out', changes, file=self.shrunk)
+        self.assertEqual(self.state(), before)
+
+        self.sync('--apply', changes)
+        status, _, owner = self.state()
+        self.assertEqual(status, 'dismissed')
+        self.assertIsNone(owner)
+
+    def test_other_sheets_untouched(self):
+        self.assertEqual(prune('Dismissal', {self.login}), 0)
+        self.assertEqual(prune('Свободное', {self.serial}), 0)
+        self.assertEqual(self.state()[0], 'active')
+
+    def test_single_sheet_commands(self):
+        # У каждой команды свои отпечатки: сначала полная книга, затем урезанная
+        for file, args in ((self.workbook, []), (self.shrunk, ['--prune'])):
+            call_command('import_employees_complete', '--file', file, *args, stdout=StringIO())
+            call_command('import_equipment', '--file', file, *args, stdout=StringIO())
+        self.assertEqual(self.state()[0], 'dismissed')
+        self.assertIsNone(self.state()[2])
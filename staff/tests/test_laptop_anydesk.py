@@ -0,0 +1,38 @@
+from django.test import TestCase
+
+from staff.models import Employee, Equipment
+
+
+class LaptopAnydeskTests(TestCase):
+
+    def setUp(self):
+        self.cases = {}
+
+        def employee(fio, *laptops, expected):
+            obj = Employee.objects.create(fio=fio, office='ORL')
+            for number, value in enumerate(laptops):
+                Equipment.objects.create(serial_number=f'{fio}-{number}', type='Ноутбук', office='ORL',
+                                         employee=obj, ip_or_anydesk=value)
+            self.cases[obj.pk] = expected
+            return obj
+
+        single = employee('Один', '123456789', expected='123456789')
+        # Первый по pk ноутбук с числовым ID; IP и не-ASCII цифры не подходят
+        employee('Несколько', '10.0.0.1', '111', '222', expected='111')
+        employee('Без ID', '', '10.0.0.2', '١٢٣', expected=None)
+        employee('Без ноутбука', expected=None)
+        Equipment.objects.create(serial_number='PC-1', type='PC', office='ORL', employee=single, ip_or_anydesk='999')
+
+    def test_annotation_prefetch_and_fallback_agree(self):
+        with self.assertNumQueries(1):
+            annotated = {e.pk: e.laptop_anydesk_id() for e in Employee.objects.with_laptop_anydesk()}
+        self.assertEqual(annotated, self.cases)
+
+        with self.assertNumQueries(2):
+            prefetched = {e.pk: e.laptop_anydesk_id() for e in Employee.objects.prefetch_related('equipment_set')}
+        self.assertEqual(prefetched, self.cases)
+
+        employees = list(Employee.objects.all())
+        with self.assertNumQueries(len(employees)):
+            plain = {e.pk: e.laptop_anydesk_id() for e in employees}
+        self.assertEqual(plain, self.cases)
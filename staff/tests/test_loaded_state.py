@@ -0,0 +1,68 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from staff.employee_panel import panel_version
+from staff.models import Employee, Equipment
+
+from . import LOCMEM_CACHE
+
+
+@LOCMEM_CACHE
+class LoadedStateTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.pk = Employee.objects.create(fio='Иванов Иван', office='ORL', position='Инженер').pk
+
+    def test_only_dirty_writes_changed_fields(self):
+        employee = Employee.objects.get(pk=self.pk)
+        employee.position = 'Старший инженер'
+        with CaptureQueriesContext(connection) as queries:
+            employee.save(only_dirty=True)
+        updates = [q['sql'] for q in queries if q['sql'].startswith('UPDATE "staff_employee"')]
+        self.assertEqual(len(updates), 1)
+        self.assertIn('"position"', updates[0])
+        self.assertIn('"updated_at"', updates[0])
+        self.assertNotIn('"fio"', updates[0])
+        self.assertEqual(employee.previous_value('position'), 'Старший инженер')
+        self.assertEqual(Employee.objects.get(pk=self.pk).position, 'Старший инженер')
+
+    def test_only_dirty_without_changes_skips_query(self):
+        employee = Employee.objects.get(pk=self.pk)
+        with self.assertNumQueries(0):
+            employee.save(only_dirty=True)
+
+    def test_deferred_field_assigned_later_is_written(self):
+        employee = Employee.objects.only('id', 'fio').get(pk=self.pk)
+        employee.office = 'MSK'
+        self.assertEqual(employee.dirty_fields(), ['office'])
+        employee.save(only_dirty=True)
+        self.assertEqual(Employee.objects.get(pk=self.pk).office, 'MSK')
+
+    def test_new_object_saved_in_full(self):
+        employee = Employee(fio='Петров Пётр', office='MSK')
+        employee.save(only_dirty=True)
+        self.assertTrue(Employee.objects.filter(pk=employee.pk, office='MSK').exists())
+
+    def test_status_change_releases_equipment(self):
+        employee = Employee.objects.get(pk=self.pk)
+        Equipment.objects.create(serial_number='SN-1', type='PC', office='ORL', employee=employee)
+        employee.status = 'dismissed'
+        employee.save(only_dirty=True)
+        self.assertIsNone(Equipment.objects.get(serial_number='SN-1').employee_id)
+
+    def test_reassigned_equipment_invalidates_previous_holder(self):
+        employee = Employee.objects.get(pk=self.pk)
+        other = Employee.objects.create(fio='Петров Пётр', office='MSK')
+        Equipment.objects.create(serial_number='SN-1', type='PC', office='ORL', employee=employee)
+        equipment = Equipment.objects.get(serial_number='SN-1')
+        self.assertEqual(equipment.previous_value('employee_id'), self.pk)
+
+        equipment.employee = other
+        with self.captureOnCommitCallbacks(execute=True):
+            equipment.save(only_dirty=True)
+        self.assertNotEqual(panel_version(self.pk), 0)
+        self.assertNotEqual(panel_version(other.pk), 0)
+        self.assertEqual(equipment.previous_value('employee_id'), other.pk)
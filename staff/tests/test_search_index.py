@@ -0,0 +1,97 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from staff import search_index
+from staff.models import Employee, Equipment
+
+from . import LOCMEM_CACHE
+
+
+def fts_writes(queries, table):
+    return [q['sql'] for q in queries if q['sql'].startswith(f'DELETE FROM {table}')]
+
+
+@LOCMEM_CACHE
+class SearchIndexTests(TestCase):
+
+    def setUp(self):
+        self.assertTrue(search_index.is_enabled())
+        self.ivanov = Employee.objects.create(fio='Иванов Пётр', ad_login='ivanov', position='Инженер')
+        self.laptop = Equipment.objects.create(
+            serial_number='SN-100', type='NOTEBOOK', model='ThinkPad', employee=self.ivanov,
+        )
+
+    def employees(self, query):
+        return set(Employee.objects.filter(pk__in=search_index.search_ids(Employee, query)).values_list('pk', flat=True))
+
+    def equipment(self, query):
+        return set(Equipment.objects.filter(pk__in=search_index.search_ids(Equipment, query)).values_list('pk', flat=True))
+
+    def test_prefix_case_and_yo(self):
+        for query in ('иван', 'ИВАНОВ', 'петр', 'пётр', 'иван инж'):
+            with self.subTest(query):
+                self.assertEqual(self.employees(query), {self.ivanov.pk})
+        self.assertEqual(self.employees('иван юрист'), set())
+        self.assertEqual(self.equipment('thinkpad иванов'), {self.laptop.pk})
+        # Кавычки и операторы FTS5 — просто символы
+        self.assertEqual(search_index.match_expression('a"b OR'), '"a""b"* "OR"*')
+        self.assertEqual(self.employees('"NEAR'), set())
+
+    def test_save_reindexes_only_indexed_fields(self):
+        employee = Employee.objects.get(pk=self.ivanov.pk)
+        employee.office = 'MSK'
+        with CaptureQueriesContext(connection) as queries:
+            employee.save(only_dirty=True)
+        self.assertEqual(fts_writes(queries, search_index.EMPLOYEE_TABLE), [])
+
+        employee.fio = 'Смирнов Пётр'
+        employee.save(only_dirty=True)
+        self.assertEqual(self.employees('смирнов'), {self.ivanov.pk})
+        # ФИО держателя в индексе оборудования тоже обновилось
+        self.assertEqual(self.equipment('смирнов'), {self.laptop.pk})
+        self.assertEqual(self.equipment('иванов'), set())
+
+    def test_queryset_update(self):
+        with CaptureQueriesContext(connection) as queries:
+            Employee.objects.filter(pk=self.ivanov.pk).update(office='MSK')
+        self.assertEqual(fts_writes(queries, search_index.EMPLOYEE_TABLE), [])
+
+        Employee.objects.filter(pk=self.ivanov.pk).update(position='Юрист')
+        self.assertEqual(self.employees('юрист'), {self.ivanov.pk})
+        Equipment.objects.filter(pk=self.laptop.pk).update(employee=None)
+        self.assertEqual(self.equipment('иванов'), set())
+
+    def test_bulk_writes_reindex_once(self):
+        created = Equipment.objects.bulk_create([
+            Equipment(serial_number=f'SN-{i}', type='PC', model='OptiPlex') for i in range(3)
+        ])
+        self.assertEqual(self.equipment('optiplex'), {obj.pk for obj in created})
+
+        for obj in created:
+            obj.model = 'Vostro'
+        with CaptureQueriesContext(connection) as queries:
+            Equipment.objects.bulk_update(created, ['model'])
+        # update() внутри bulk_update не пересчитывает индекс второй раз
+        self.assertEqual(len(fts_writes(queries, search_index.EQUIPMENT_TABLE)), 1)
+        self.assertEqual(self.equipment('vostro'), {obj.pk for obj in created})
+        self.assertEqual(self.equipment('optiplex'), set())
+
+    def test_delete(self):
+        self.ivanov.delete()
+        self.assertEqual(self.employees('иванов'), set())
+        # Оборудование стало свободным — ФИО держателя из индекса убрано
+        self.assertEqual(self.equipment('иванов'), set())
+        self.assertEqual(self.equipment('thinkpad'), {self.laptop.pk})
+
+    def test_rebuild_command(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {search_index.EMPLOYEE_TABLE}')
+        self.assertEqual(self.employees('иванов'), set())
+        stdout = StringIO()
+        call_command('rebuild_search_index', stdout=stdout)
+        self.assertIn('сотрудников 1, оборудования 1', stdout.getvalue())
+        self.assertEqual(self.employees('иванов'), {self.ivanov.pk})
@@ -0,0 +1,212 @@
+from django.test import SimpleTestCase, TestCase
+
+from staff.import_fingerprints import FingerprintStore
+from staff.models import Employee, Equipment
+from staff.sheet_spec import SpecImporter
+from staff.sheet_specs import (
+    DISMISSAL, DISMISSAL_STATUS, EMPLOYMENT, EMPLOYMENT_HEADER, EQUIPMENT_HEADER, FREE, ISSUED,
+    ISSUED_KNOWN, POSITIONS, normalize_office,
+)
+
+from . import LOCMEM_CACHE
+
+
+class Sheet:
+    """Лист в памяти с интерфейсом SheetReader (значения уже очищены)"""
+
+    def __init__(self, header, rows):
+        self._header = header
+        self._rows = rows
+
+    def header(self):
+        return list(self._header)
+
+    def rows(self, width=None):
+        for row_num, row in enumerate(self._rows, 2):
+            row = tuple(row)
+            if width is not None:
+                row = (row + ('',) * width)[:width]
+            yield row_num, row
+
+
+def employment_row(first_last, middle='', login='', email='', phone=''):
+    row = [''] * len(EMPLOYMENT_HEADER)
+    row[1:4] = first_last, middle, login
+    row[5], row[12] = email, phone
+    return row
+
+
+def equipment_row(fio, serial, type_name='Ноутбук', office='MSK', position=''):
+    return [fio, position, office, type_name, 'ThinkPad', serial, '', '', '']
+
+
+class CompiledSpecTests(SimpleTestCase):
+
+    def test_exact_header_wins_over_containing(self):
+        positions = ISSUED.resolve(['Коментарий (IP/AnyDesk)', 'Коментарий', 'ФИО сотрудника'])
+        self.assertEqual(positions['ip_or_anydesk'], 0)
+        self.assertEqual(positions['comment'], 1)
+        self.assertEqual(positions['_fio'], 0 + 2)
+        self.assertIsNone(positions['serial_number'])
+
+    def test_fallback_index_and_default(self):
+        self.assertEqual(FREE.resolve([f'col_{i}' for i in range(9)])['serial_number'], 5)
+        compiled = ISSUED.compile(['ФИО сотрудника', 'Перечень ТМЦ', 'Серийный номер'])
+        record = compiled.transform(('Иванов Иван', 'PC', 'SN-1'))
+        self.assertEqual(record['_office'], 'remote')
+        self.assertEqual(record['office'], 'remote')
+
+    def test_transform_employment_row(self):
+        compiled = EMPLOYMENT.compile(EMPLOYMENT_HEADER)
+        record = compiled.transform(employment_row(
+            'Иванов Иван', 'Петрович', 'ivanov', email='=CONCATENATE(D2,"@p-el.ru")',
+        ))
+        self.assertEqual(
+            (record['fio'], record['last_name'], record['first_name'], record['middle_name']),
+            ('Иванов Иван Петрович', 'Иванов', 'Иван', 'Петрович'),
+        )
+        self.assertEqual(record['email'], 'ivanov@p-el.ru')
+        self.assertEqual((record['office'], record['status']), ('remote', 'active'))
+        self.assertIsNone(compiled.transform(employment_row('Петров Пётр'))['ad_login'])
+        self.assertIsNone(compiled.transform(employment_row('')))
+        self.assertIsNone(compiled.transform([''] * len(EMPLOYMENT_HEADER)))
+
+    def test_dismissal_status_from_name(self):
+        compiled = DISMISSAL.compile(EMPLOYMENT_HEADER)
+        self.assertEqual(compiled.transform(employment_row('Иванова Анна (декрет)'))['status'], 'maternity')
+        self.assertEqual(compiled.transform(employment_row('Петров Пётр'))['status'], 'dismissed')
+
+    def test_normalize_office(self):
+        self.assertEqual(normalize_office('msk'), 'MSK')
+        self.assertEqual(normalize_office('ЭМКО'), 'ЭМКО')
+        for office in ('', 'remote', 'REMOTE', 'Марс'):
+            with self.subTest(office):
+                self.assertEqual(normalize_office(office), 'remote')
+
+    def test_replace(self):
+        spec = DISMISSAL.replace(create=False)
+        self.assertFalse(spec.create)
+        self.assertTrue(DISMISSAL.create)
+        self.assertEqual(spec.update_fields, DISMISSAL.update_fields)
+        with self.assertRaises(TypeError):
+            DISMISSAL.replace(sheets='Dismissal')
+
+
+@LOCMEM_CACHE
+class SpecImporterTests(TestCase):
+
+    def setUp(self):
+        self.ivanov = Employee.objects.create(
+            fio='Иванов Иван Петрович', last_name='Иванов', first_name='Иван', ad_login='ivanov', office='remote',
+        )
+        self.petrov = Employee.objects.create(
+            fio='Петров Пётр Ильич', last_name='Петров', first_name='Пётр', office='ORL', position='Юрист',
+        )
+
+    def run_spec(self, spec, header, rows, **options):
+        importer = SpecImporter(spec, batch_size=2, **options)
+        importer.run(Sheet(header, rows))
+        return importer
+
+    def holders(self):
+        return dict(Equipment.objects.values_list('serial_number', 'employee__fio'))
+
+    def test_issued_equipment(self):
+        importer = self.run_spec(ISSUED, EQUIPMENT_HEADER, [
+            equipment_row('Иванов Иван', 'SN-1', position='Инженер', office='msk'),
+            equipment_row('Петров Павел', 'SN-2'),          # только фамилия совпадает
+            equipment_row('Сидоров Сидор', 'SN-3'),         # не найден — свободное
+            equipment_row('Иванов Иван', '', type_name=''),  # без оборудования
+            equipment_row('Иванов Иван', 'SN-1', type_name='PC'),  # повтор: побеждает последняя строка
+        ])
+        self.assertEqual(self.holders(), {
+            'SN-1': 'Иванов Иван Петрович', 'SN-2': 'Петров Пётр Ильич', 'SN-3': None,
+        })
+        equipment = Equipment.objects.get(serial_number='SN-1')
+        self.assertEqual((equipment.type, equipment.office), ('PC', 'MSK'))
+        self.assertEqual(Equipment.objects.get(serial_number='SN-3').office, 'MSK')
+        self.assertEqual(importer.stats['created'], 3)
+        self.assertEqual(importer.stats['skipped'], 1)
+        self.assertEqual(importer.stats['not_matched'], 1)
+        # Пустая должность заполняется, заполненная не меняется
+        self.assertEqual(importer.backfilled['position'], 1)
+        self.assertEqual(Employee.objects.get(pk=self.ivanov.pk).position, 'Инженер')
+        self.assertEqual(Employee.objects.get(pk=self.petrov.pk).position, 'Юрист')
+
+    def test_require_match(self):
+        importer = self.run_spec(ISSUED_KNOWN, EQUIPMENT_HEADER, [
+            equipment_row('Иванов Иван Петрович', 'SN-1'),
+            equipment_row('Сидоров Сидор', 'SN-2'),
+        ])
+        self.assertEqual(self.holders(), {'SN-1': 'Иванов Иван Петрович'})
+        self.assertEqual(importer.stats['not_matched'], 1)
+
+    def test_employment_creates_and_updates_changed_fields(self):
+        importer = self.run_spec(EMPLOYMENT, EMPLOYMENT_HEADER, [
+            employment_row('Иванов Иван', 'Петрович', 'ivanov', phone='111'),
+            employment_row('Сидоров Сидор', 'Ильич', 'sidorov'),
+            employment_row('Сидоров Сидор', 'Ильич', 'sidorov', phone='222'),  # повтор нового
+            employment_row('Петров Пётр', 'Ильич'),  # без логина — по точному ФИО
+        ])
+        self.assertEqual(importer.stats['created'], 1)
+        self.assertEqual(Employee.objects.get(ad_login='ivanov').phone, '111')
+        self.assertEqual(Employee.objects.get(ad_login='sidorov').phone, '222')
+        self.assertEqual(Employee.objects.count(), 3)
+        # У Петрова поменялся только офис (константа листа) — остальные поля прежние
+        petrov = Employee.objects.get(pk=self.petrov.pk)
+        self.assertEqual((petrov.office, petrov.position), ('remote', 'Юрист'))
+
+        again = self.run_spec(EMPLOYMENT, EMPLOYMENT_HEADER, [employment_row('Иванов Иван', 'Петрович', 'ivanov', phone='111')])
+        self.assertEqual((again.stats['updated'], again.stats['unchanged']), (0, 1))
+
+    def test_failed_row_does_not_lose_batch(self):
+        Employee.objects.create(fio='Смирнов Олег', ad_login='taken', office='remote')
+        errors = []
+        # Иванову ставится логин, занятый другим сотрудником, — ошибка только этой строки
+        importer = self.run_spec(
+            EMPLOYMENT.replace(match=[('fio', 'exact')]), EMPLOYMENT_HEADER,
+            [employment_row('Иванов Иван', 'Петрович', 'taken'), employment_row('Новиков Олег', '', 'novikov')],
+            on_error=lambda record, row_num, error: errors.append(row_num),
+        )
+        self.assertEqual(errors, [2])
+        self.assertEqual((importer.stats['errors'], importer.stats['created']), (1, 1))
+        self.assertEqual(Employee.objects.get(pk=self.ivanov.pk).ad_login, 'ivanov')
+        self.assertTrue(Employee.objects.filter(ad_login='novikov').exists())
+
+    def test_dismissal_status_frees_equipment(self):
+        Equipment.objects.create(serial_number='SN-1', type='PC', office='ORL', employee=self.ivanov)
+        importer = self.run_spec(DISMISSAL_STATUS, EMPLOYMENT_HEADER, [
+            employment_row('Иванов Иван', 'Петрович', 'ivanov', phone='999'),
+            employment_row('Новикова Анна (декрет)', '', 'novikova'),
+        ])
+        ivanov = Employee.objects.get(pk=self.ivanov.pk)
+        self.assertEqual((ivanov.status, ivanov.phone), ('dismissed', ''))  # меняется только статус
+        self.assertEqual(self.holders(), {'SN-1': None})
+        self.assertEqual(importer.stats['equipment_freed'], 1)
+        self.assertEqual(Employee.objects.get(ad_login='novikova').status, 'maternity')
+
+    def test_positions_without_writing_equipment(self):
+        importer = self.run_spec(POSITIONS, EQUIPMENT_HEADER, [
+            equipment_row('Иванов Иван', 'SN-1', position='Инженер', office='msk'),
+            equipment_row('Петров Пётр', 'SN-2', position='Бухгалтер', office='MSK'),
+        ])
+        self.assertFalse(Equipment.objects.exists())
+        self.assertEqual(Employee.objects.count(), 2)
+        ivanov, petrov = Employee.objects.get(pk=self.ivanov.pk), Employee.objects.get(pk=self.petrov.pk)
+        self.assertEqual((ivanov.position, ivanov.office), ('Инженер', 'MSK'))
+        self.assertEqual((petrov.position, petrov.office), ('Юрист', 'ORL'))
+        self.assertEqual(dict(importer.backfilled), {'position': 1, 'office': 1})
+
+    def test_fingerprints_skip_unchanged_rows(self):
+        rows = [equipment_row('Иванов Иван', 'SN-1'), equipment_row('Сидоров Сидор', 'SN-2')]
+        for expected_applied in (2, 0):
+            store = FingerprintStore('test:Выдано')
+            importer = self.run_spec(ISSUED, EQUIPMENT_HEADER, rows, fingerprints=store)
+            store.save()
+            self.assertEqual(store.applied, expected_applied)
+        # Сотрудник появился в базе — строка с ним применяется заново
+        Employee.objects.create(fio='Сидоров Сидор', office='remote')
+        store = FingerprintStore('test:Выдано')
+        importer = self.run_spec(ISSUED, EQUIPMENT_HEADER, rows, fingerprints=store)
+        self.assertEqual((store.applied, importer.stats['updated']), (1, 1))
+        self.assertEqual(self.holders()['SN-2'], 'Сидоров Сидор')
@@ -0,0 +1,56 @@
+from datetime import date
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+
+from staff.models import Employee, Equipment
+from staff.status_change import change_status
+
+from . import LOCMEM_CACHE
+
+
+@LOCMEM_CACHE
+class ChangeStatusTests(TestCase):
+
+    def setUp(self):
+        self.active = Employee.objects.create(fio='Иванов Иван', status='active')
+        self.dismissed = Employee.objects.create(
+            fio='Петров Пётр', status='dismissed', dismissal_date=date(2020, 1, 31),
+        )
+        Equipment.objects.create(serial_number='SN-1', type='PC', employee=self.active)
+        self.dismissed_updated_at = Employee.objects.get(pk=self.dismissed.pk).updated_at
+
+    def test_mixed_selection_changes_only_other_statuses(self):
+        updated, released, unchanged = change_status(
+            [self.active.pk, self.dismissed.pk], 'dismissed', date(2024, 5, 1)
+        )
+        self.assertEqual((updated, released, unchanged), (1, 1, 1))
+
+        active = Employee.objects.get(pk=self.active.pk)
+        self.assertEqual((active.status, active.dismissal_date), ('dismissed', date(2024, 5, 1)))
+        # Уже уволенный не трогается: прежняя дата увольнения и updated_at
+        dismissed = Employee.objects.get(pk=self.dismissed.pk)
+        self.assertEqual(dismissed.dismissal_date, date(2020, 1, 31))
+        self.assertEqual(dismissed.updated_at, self.dismissed_updated_at)
+        self.assertIsNone(Equipment.objects.get(serial_number='SN-1').employee)
+
+    def test_default_dismissal_date_is_today(self):
+        change_status([self.active.pk], 'maternity')
+        self.assertEqual(Employee.objects.get(pk=self.active.pk).dismissal_date, date.today())
+
+    def test_return_to_active_keeps_equipment_free(self):
+        updated, released, unchanged = change_status([self.active.pk, self.dismissed.pk], 'active')
+        self.assertEqual((updated, released, unchanged), (1, 0, 1))
+        self.assertEqual(Employee.objects.get(pk=self.dismissed.pk).status, 'active')
+        self.assertEqual(Equipment.objects.get(serial_number='SN-1').employee_id, self.active.pk)
+
+    def test_view_reports_unchanged(self):
+        self.client.force_login(User.objects.create_user('admin'))
+        response = self.client.post(reverse('employees_change_status'), {
+            'employee_ids': f'{self.active.pk},{self.dismissed.pk}', 'status': 'dismissed',
+        })
+        data = response.json()
+        self.assertTrue(data['success'])
+        self.assertEqual((data['updated'], data['released'], data['unchanged']), (1, 1, 1))
+        self.assertIn('уже в этом статусе: 1', data['message'])
@@ -0,0 +1,101 @@
+import json
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+
+from staff.models import Employee, Equipment
+
+from . import LOCMEM_CACHE
+
+
+@LOCMEM_CACHE
+class EmployeeEquipmentJsonTests(TestCase):
+
+    def setUp(self):
+        self.employee = Employee.objects.create(fio='Иванов Иван', office='ORL')
+        Equipment.objects.create(serial_number='SN-1', type='PC', office='ORL', employee=self.employee)
+        self.url = reverse('employee_equipment_json', args=[self.employee.pk])
+
+    def test_anonymous_is_redirected_to_login(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(response['Location'].startswith('/admin/login/'))
+        self.assertNotIn('ETag', response)
+
+    def test_not_modified_until_write(self):
+        self.client.force_login(User.objects.create_user('viewer'))
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+        # Запись оборудования сотрудника меняет версию панели
+        with self.captureOnCommitCallbacks(execute=True):
+            Equipment.objects.filter(serial_number='SN-1').update(model='новая')
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.json()[0]['model'], 'новая')
+
+
+@LOCMEM_CACHE
+class StreamingApiTests(TestCase):
+
+    def setUp(self):
+        self.client.force_login(User.objects.create_user('viewer'))
+        self.ivanov = Employee.objects.create(
+            fio='Иванов Иван', office='ORL', ad_login='ivanov', ad_password='secret', info='заметка',
+        )
+        Employee.objects.create(fio='Петров Пётр', office='MSK', status='dismissed')
+        Equipment.objects.create(serial_number='SN-1', type='PC', office='ORL', employee=self.ivanov)
+        Equipment.objects.create(serial_number='SN-2', type='SIP', office='MSK')
+
+    def get(self, name, **params):
+        response = self.client.get(reverse(name), params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content).decode()
+
+    def test_employees_json_array(self):
+        response, body = self.get('api_employees', fields='id,fio,office', status='active')
+        self.assertTrue(response['Content-Type'].startswith('application/json'))
+        self.assertEqual(json.loads(body), [{'id': self.ivanov.pk, 'fio': 'Иванов Иван', 'office': 'ORL'}])
+
+    def test_equipment_ndjson(self):
+        response, body = self.get('api_equipment', fields='serial_number,employee_fio', format='ndjson')
+        self.assertTrue(response['Content-Type'].startswith('application/x-ndjson'))
+        self.assertEqual([json.loads(line) for line in body.splitlines()], [
+            {'serial_number': 'SN-1', 'employee_fio': 'Иванов Иван'},
+            {'serial_number': 'SN-2', 'employee_fio': None},
+        ])
+
+    def test_rows_split_across_chunks(self):
+        with mock.patch('staff.views_api.CHUNK_SIZE', 1):
+            response, body = self.get('api_equipment', fields='serial_number')
+            self.assertEqual(len(list(self.client.get(reverse('api_equipment')).streaming_content)), 4)
+        self.assertEqual(json.loads(body), [{'serial_number': 'SN-1'}, {'serial_number': 'SN-2'}])
+
+    def test_empty_result_is_valid_json(self):
+        _, body = self.get('api_equipment', q='нет такого')
+        self.assertEqual(json.loads(body), [])
+
+    def test_fields_outside_whitelist_are_rejected(self):
+        for fields in ('id,ad_password', 'info', 'employee__ad_password'):
+            with self.subTest(fields):
+                response = self.client.get(reverse('api_employees'), {'fields': fields})
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('Неизвестные поля', response.json()['error'])
+        # По умолчанию пароли и info тоже не выгружаются
+        _, body = self.get('api_employees')
+        self.assertNotIn('secret', body)
+        self.assertNotIn('заметка', body)
+
+    def test_bad_format_and_anonymous(self):
+        self.assertEqual(self.client.get(reverse('api_equipment'), {'format': 'xml'}).status_code, 400)
+        self.client.logout()
+        self.assertEqual(self.client.get(reverse('api_employees')).status_code, 302)
@@ -0,0 +1,97 @@
+import csv
+import os
+from io import BytesIO, StringIO
+
+from django.contrib.auth.models import Permission, User
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from openpyxl import load_workbook
+
+from staff.models import Employee, Equipment
+from staff.sheet_specs import EMPLOYMENT_HEADER, EQUIPMENT_HEADER
+from staff.workbook_export import SHEETS, split_fio, write_xlsx
+
+from . import LOCMEM_CACHE, temp_dir, temp_workbook
+from .test_workbook_sync import clear_database, database_state
+
+
+def round_trip_state():
+    """
+    database_state() без офиса и должности сотрудника: они есть только
+    в строках Выдано (см. workbook_export), а офис там — офис оборудования
+    """
+    employees, equipment = database_state()
+    return [row[:7] + row[9:] for row in employees], equipment
+
+
+@LOCMEM_CACHE
+class RoundTripTests(TestCase):
+
+    def setUp(self):
+        workbook, _ = temp_workbook(self, rows=80, duplicates=0.05, ambiguity=0.05, dismissed=0.2)
+        self.sync(workbook)
+        # Листа Свободное генератор не пишет, декрет бывает не при каждом seed
+        dismissed = Employee.objects.filter(status='dismissed').order_by('pk')[0]
+        first_last, middle = split_fio(dismissed.fio, dismissed.middle_name)
+        Employee.objects.filter(pk=dismissed.pk).update(status='maternity', fio=f'{first_last} (декрет) {middle}')
+        Equipment.objects.create(serial_number='FREE-1', type='Монитор', office='ORL', comment='на складе')
+        Equipment.objects.create(serial_number='FREE-2', type='PC', office='MSK', comment='списано', disposed=True)
+        self.state = round_trip_state()
+        self.assertTrue(self.state[0] and self.state[1])
+
+    def sync(self, path):
+        call_command('sync_workbook', '--file', path, '--full', stdout=StringIO())
+
+    def test_xlsx_round_trip(self):
+        path = os.path.join(temp_dir(self), 'export.xlsx')
+        counts = write_xlsx(path)
+        self.assertEqual(counts['Employment'], Employee.objects.filter(status='active').count())
+        self.assertEqual(counts['Выдано'] + counts['Свободное'], Equipment.objects.count())
+
+        clear_database()
+        self.sync(path)
+        self.assertEqual(round_trip_state(), self.state)
+
+    def test_command_csv(self):
+        folder = os.path.join(temp_dir(self), 'csv')
+        call_command('export_workbook', '--file', folder, '--format', 'csv', '--sheet', 'Выдано', stdout=StringIO())
+        self.assertEqual(os.listdir(folder), ['Выдано.csv'])
+        with open(os.path.join(folder, 'Выдано.csv'), encoding='utf-8-sig', newline='') as f:
+            rows = list(csv.reader(f))
+        self.assertEqual(rows[0], EQUIPMENT_HEADER)
+        self.assertEqual(
+            sorted(row[5] for row in rows[1:]),
+            sorted(Equipment.objects.filter(employee__isnull=False).values_list('serial_number', flat=True)),
+        )
+
+    def test_views(self):
+        url = reverse('export_workbook')
+        self.assertEqual(self.client.get(url).status_code, 302)
+        user = User.objects.create_user('viewer')
+        user.user_permissions.add(Permission.objects.get(codename='view_employee'))
+        self.client.force_login(user)
+
+        response = self.client.get(url, {'sheet': 'Employment'})
+        wb = load_workbook(BytesIO(b''.join(response.streaming_content)), read_only=True)
+        self.assertEqual(wb.sheetnames, ['Employment'])
+
+        response = self.client.get(url, {'format': 'csv', 'sheet': 'Dismissal'})
+        text = b''.join(response.streaming_content).decode('utf-8')
+        self.assertTrue(text.startswith('﻿'))
+        rows = list(csv.reader(StringIO(text[1:])))
+        self.assertEqual(rows[0], EMPLOYMENT_HEADER)
+        self.assertEqual(len(rows) - 1, Employee.objects.exclude(status='active').count())
+
+        self.assertEqual(self.client.get(url, {'format': 'csv'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'sheet': 'Нет такого'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'format': 'pdf'}).status_code, 400)
+
+
+class SplitFioTests(TestCase):
+
+    def test_split_fio(self):
+        self.assertEqual(split_fio('Иванов Иван Петрович', 'Петрович'), ('Иванов Иван', 'Петрович'))
+        self.assertEqual(split_fio('Иванов Иван', ''), ('Иванов Иван', ''))
+        self.assertEqual(split_fio('Иванов Иван', 'Петрович'), ('Иванов Иван', ''))
+        self.assertEqual(set(SHEETS), {'Employment', 'Dismissal', 'Выдано', 'Свободное'})
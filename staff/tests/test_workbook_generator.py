@@ -0,0 +1,48 @@
+from collections import Counter
+
+from django.test import SimpleTestCase
+
+from staff.import_reader import WorkbookReader
+from staff.sheet_specs import EMPLOYMENT_HEADER, EQUIPMENT_HEADER
+
+from . import temp_workbook
+
+
+class WorkbookGeneratorTests(SimpleTestCase):
+
+    def read(self, path):
+        with WorkbookReader(path) as reader:
+            return {
+                name: (reader.sheet(name).header(), [row for _, row in reader.sheet(name).rows()])
+                for name in ('Employment', 'Dismissal', 'Выдано')
+            }
+
+    def test_sheets_in_workbook_layout(self):
+        path, counts = temp_workbook(self, rows=200, dismissed=0.1)
+        sheets = self.read(path)
+        self.assertEqual(counts, {'Employment': 200, 'Dismissal': 20, 'Выдано': 200})
+        self.assertEqual(sheets['Employment'][0], EMPLOYMENT_HEADER)
+        self.assertEqual(sheets['Dismissal'][0], EMPLOYMENT_HEADER)
+        self.assertEqual(sheets['Выдано'][0], EQUIPMENT_HEADER)
+        for name, (_, rows) in sheets.items():
+            self.assertEqual(len(rows), counts[name])
+
+    def test_duplicates_and_ambiguity(self):
+        path, _ = temp_workbook(self, rows=300, duplicates=0.2, ambiguity=0.2)
+        sheets = self.read(path)
+        logins = Counter(row[3] for row in sheets['Employment'][1])
+        serials = Counter(row[5] for row in sheets['Выдано'][1])
+        self.assertTrue(any(n > 1 for n in logins.values()))
+        self.assertTrue(any(n > 1 for n in serials.values()))
+        # Неоднозначные ФИ: одно "Фамилия Имя" у разных логинов
+        names = {}
+        for row in sheets['Employment'][1]:
+            names.setdefault(row[1], set()).add(row[3])
+        self.assertTrue(any(len(group) > 1 for group in names.values()))
+
+    def test_same_seed_same_workbook(self):
+        first, _ = temp_workbook(self, rows=50, seed=7)
+        second, _ = temp_workbook(self, rows=50, seed=7)
+        other, _ = temp_workbook(self, rows=50, seed=8)
+        self.assertEqual(self.read(first), self.read(second))
+        self.assertNotEqual(self.read(first), self.read(other))
@@ -0,0 +1,80 @@
+import os
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from staff.models import Employee, Equipment, ImportFingerprint
+
+from . import LOCMEM_CACHE, temp_workbook
+
+# Команды, которые заменяет sync_workbook, в порядке ручного запуска (см. workbook_sync)
+LEGACY_COMMANDS = [
+    ('import_employees_complete', []),
+    ('import_dismissal_fixed', []),
+    ('update_dismissed_data', []),
+    ('import_equipment', ['--full']),
+    ('update_positions_offices', []),
+]
+
+
+def database_state():
+    employees = list(Employee.objects.order_by('fio', 'ad_login').values_list(
+        'fio', 'first_name', 'last_name', 'middle_name', 'ad_login', 'email',
+        'status', 'office', 'position', 'sip_number', 'ad_password',
+    ))
+    equipment = list(Equipment.objects.order_by('serial_number').values_list(
+        'serial_number', 'type', 'model', 'office', 'comment', 'disposed', 'employee__fio',
+    ))
+    return employees, equipment
+
+
+def clear_database():
+    Equipment.objects.all().delete()
+    Employee.objects.all().delete()
+    ImportFingerprint.objects.all().delete()
+
+
+@LOCMEM_CACHE
+class SyncWorkbookTests(TestCase):
+
+    def setUp(self):
+        self.workbook, self.counts = temp_workbook(self, rows=80, duplicates=0.05, ambiguity=0.05)
+
+    def run_command(self, name, *args, **options):
+        call_command(name, '--file', self.workbook, *args, stdout=StringIO(), **options)
+
+    def test_same_result_as_legacy_commands(self):
+        for name, args in LEGACY_COMMANDS:
+            self.run_command(name, *args)
+        legacy = database_state()
+        self.assertTrue(legacy[0] and legacy[1])
+
+        clear_database()
+        self.run_command('sync_workbook')
+        self.assertEqual(database_state(), legacy)
+
+    def test_second_run_changes_nothing(self):
+        self.run_command('sync_workbook')
+        before = database_state()
+        changes = os.path.join(os.path.dirname(self.workbook), 'changes.jsonl')
+        self.run_command('sync_workbook', '--dry-run', '--diff-out', changes)
+        with open(changes, encoding='utf-8') as f:
+            self.assertEqual(f.read().strip(), '')
+        self.run_command('sync_workbook', '--full')
+        self.assertEqual(database_state(), before)
+
+    def test_dry_run_then_apply_matches_direct_run(self):
+        changes = os.path.join(os.path.dirname(self.workbook), 'changes.jsonl')
+        self.run_command('sync_workbook', '--dry-run', '--diff-out', changes)
+        self.assertFalse(Employee.objects.exists())
+        self.assertFalse(Equipment.objects.exists())
+        self.assertFalse(ImportFingerprint.objects.exists())
+
+        self.run_command('sync_workbook', '--apply', changes)
+        applied = database_state()
+        self.assertTrue(applied[0] and applied[1])
+
+        clear_database()
+        self.run_command('sync_workbook')
+        self.assertEqual(database_state(), applied)
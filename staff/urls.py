@@ -2,6 +2,7 @@ from django.urls import path
 from . import views
 from . import views_ajax
 from . import views_provisioning
+from . import views_api
 from django.conf import settings
 from django.conf.urls.static import static
 
@@ -9,9 +10,11 @@ urlpatterns = [
     # === Основные маршруты ===
     path('', views.dashboard, name='dashboard'),
     path('employees/', views.employees_list, name='employees_list'),
+    path('employees/search/', views.employees_search, name='employees_search'),
     path('employee/new/', views.employee_create, name='employee_create'),
     path('employee/<int:pk>/edit/', views.employee_edit, name='employee_edit'),
     path('employee/<int:pk>/change-status/', views.employee_change_status, name='employee_change_status'),
+    path('employees/change-status/', views.employees_change_status, name='employees_change_status'),
     
     # === Оборудование ===
     path('equipment/', views.equipment_list, name='equipment_list'),
@@ -22,6 +25,7 @@ urlpatterns = [
     
     # === AJAX маршруты ===
     path('employee/<int:employee_id>/equipment/', views_ajax.employee_equipment_partial, name='employee_equipment_partial'),
+    path('employees/typeahead/', views_ajax.employee_typeahead, name='employee_typeahead'),
     
     # === AD Webhook и уведомления ===
     path('staff/ad-webhook/', views.ad_lockout_webhook, name='ad_lockout_webhook'),
@@ -39,6 +43,11 @@ urlpatterns = [
     path('provisioning/send_welcome_email/<int:employee_id>/', views_provisioning.provisioning_send_welcome_email, name='provisioning_send_welcome_email'),
     path('employee/<int:employee_id>/equipment/json/', views_ajax.employee_equipment_json, name='employee_equipment_json'),
 
+    # === Выгрузка (потоковый JSON / NDJSON) ===
+    path('api/employees/', views_api.api_employees, name='api_employees'),
+    path('api/equipment/', views_api.api_equipment, name='api_equipment'),
+    path('api/export/', views_api.export_workbook, name='export_workbook'),
+
     path('employee/<int:employee_id>/ad-status/', views.get_ad_status, name='employee_ad_status'),
     path('employee/<int:employee_id>/unlock-ad/', views.unlock_ad_account, name='unlock_ad_account'),
     
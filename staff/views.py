@@ -2,21 +2,29 @@
 import re
 import time
 import importlib
-from collections import defaultdict
+from urllib.parse import urlencode
 from django.shortcuts import render, redirect, get_object_or_404
+from django.urls import reverse
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
 from django.http import HttpResponse, HttpResponseRedirect, JsonResponse
-from django.db.models import Count, Q
 from django.views.decorators.csrf import csrf_exempt
-from django.views.decorators.http import require_GET
+from django.views.decorators.http import require_GET, require_POST
 from django.templatetags.static import static
 from django.conf import settings
 from django.utils import timezone
+from django.utils.dateparse import parse_date
 from openpyxl import load_workbook
 import requests
+from . import ad_status
 from .ad_service import ADService
+from .conditional import conditional, employee_panel_etag
+from .dashboard_summary import get_summary
+from .employee_panel import render_panel
+from .equipment_pagination import cached_count, keyset_page as equipment_keyset_page
+from .employee_search import keyset_page, search_employees
+from .equipment_search import search_equipment
 from .models import Employee, Equipment
+from .status_change import MAX_EMPLOYEES, change_status
 from .forms import EmployeeForm, EquipmentForm
 
 from django.views.decorators.csrf import csrf_exempt
@@ -53,81 +61,75 @@ except ModuleNotFoundError:
 
 @login_required
 def dashboard(request):
-    active = Employee.objects.filter(status='active').count()
-    dismissed = Employee.objects.filter(status='dismissed').count()
-    maternity = Employee.objects.filter(status='maternity').count()
-    total_employees = Employee.objects.count()
-
-    free_equipment_summary_raw = Equipment.objects.filter(
-        employee__isnull=True,
-        disposed=False
-    ).values('type', 'office').annotate(count=Count('id')).order_by('type', 'office')
-
-    free_summary = {
-        'types': set(),
-        'offices': set(),
-        'data': defaultdict(lambda: defaultdict(int))
-    }
-
-    for item in free_equipment_summary_raw:
-        type_key = item['type']
-        office_key = item['office']
-        count = item['count']
-        free_summary['types'].add(type_key)
-        free_summary['offices'].add(office_key)
-        free_summary['data'][type_key][office_key] = count
-
-    free_summary['types'] = sorted(list(free_summary['types']), key=lambda x: dict(Equipment.EQUIPMENT_TYPES).get(x, x))
-    free_summary['offices'] = sorted(list(free_summary['offices']), key=lambda x: dict(Employee.OFFICE_CHOICES).get(x, x))
-    free_summary['data'] = {k: dict(v) for k, v in free_summary['data'].items()}
-
+    # Счётчики и матрица свободного оборудования — из кэша, пересчёт только после изменений
     return render(request, 'staff/dashboard.html', {
-        'active': active,
-        'dismissed': dismissed,
-        'maternity': maternity,
-        'total_employees': total_employees,
-        'free_equipment_summary': free_summary,
+        **get_summary(),
         'equipment_type_labels': dict(Equipment.EQUIPMENT_TYPES),
         'office_labels': dict(Employee.OFFICE_CHOICES),
     })
 
 
 
+def employee_search_context(request):
+    """Фильтры из GET и страница результатов для левой колонки employees_list"""
+    query = request.GET.get('q', '').strip()
+    status_filter = request.GET.get('status', 'all')
+    office_filter = request.GET.get('office', 'all')
+    cursor = request.GET.get('cursor')
+    selected_id = request.GET.get('selected_id', '')
+
+    employees, next_cursor = keyset_page(search_employees(query, status_filter, office_filter), cursor)
+    next_page_url = None
+    if next_cursor:
+        params = {'q': query, 'status': status_filter, 'office': office_filter, 'cursor': next_cursor}
+        if selected_id:
+            params['selected_id'] = selected_id
+        next_page_url = f"{reverse('employees_search')}?{urlencode(params)}"
+    return {
+        'employees': employees,
+        'cursor': cursor,
+        'next_page_url': next_page_url,
+        'selected_id': selected_id,
+        'query': query,
+        'status_filter': status_filter,
+        'office_filter': office_filter,
+    }
+
+
 @login_required
+@conditional(employee_panel_etag, vary=('HX-Request',))
 def employees_list(request):
     selected_id = request.GET.get('selected_id')
-    employees = Employee.objects.all().order_by('fio')
 
-    paginator = Paginator(employees, 1000)  # отдаём много — фронт сам фильтрует
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # HTMX запрос -> только правая панель, из кэша фрагментов (см. employee_panel)
+    if request.headers.get('HX-Request') == 'true':
+        html = render_panel(request, selected_id) if selected_id else None
+        if html is not None:
+            return HttpResponse(html)
+        return render(request, 'staff/partials/right_column_empty.html')
 
     selected_employee = None
     if selected_id:
         try:
-            selected_employee = Employee.objects.prefetch_related('equipment_set').get(id=selected_id)
-        except Employee.DoesNotExist:
+            selected_employee = Employee.objects.with_laptop_anydesk().prefetch_related('equipment_set').get(id=selected_id)
+        except (Employee.DoesNotExist, ValueError):
             selected_employee = None
 
-    # HTMX запрос -> только правая панель
-    if request.headers.get('HX-Request') == 'true':
-        if selected_employee:
-            return render(request, 'staff/partials/right_column_content.html', {
-                'selected_employee': selected_employee
-            })
-        return render(request, 'staff/partials/right_column_empty.html')
-
-    # Обычная загрузка -> отдаём всю страницу и ВСЕХ без фильтрации
+    # Обычная загрузка -> страница с первой порцией списка, остальное догружает employees_search
     return render(request, 'staff/employees_list.html', {
-        'page_obj': page_obj,
+        **employee_search_context(request),
         'selected_employee': selected_employee,
-        'query': '',              # пусто
-        'status_filter': 'all',   # без фильтра
-        'office_filter': 'all',   # без фильтра
-        'per_page': 1000,
+        'office_choices': Employee.OFFICE_CHOICES,
     })
 
 
+@login_required
+@require_GET
+def employees_search(request):
+    """HTMX: строки списка сотрудников по фильтрам (первая страница или следующая по cursor)"""
+    return render(request, 'staff/partials/employee_list_rows.html', employee_search_context(request))
+
+
 @login_required
 def employee_create(request):
     if request.method == 'POST':
@@ -167,49 +169,36 @@ def equipment_list(request):
     assigned_filter = request.GET.get('assigned', '')  
     employee_filter = request.GET.get('employee', '')  
     per_page = request.GET.get('per_page', 20)
-    equipment = Equipment.objects.select_related('employee').all()
-    
-    if query:
-        equipment = equipment.filter(
-            Q(serial_number__icontains=query) |
-            Q(model__icontains=query) |
-            Q(mac_address__icontains=query) |
-            Q(employee__fio__icontains=query)
-        )
-    if type_filter:
-        equipment = equipment.filter(type=type_filter)
-    if office_filter:
-        equipment = equipment.filter(office=office_filter)
-    if disposed_filter:
-        equipment = equipment.filter(disposed=disposed_filter == 'true')
-    
-    # ✅ Фильтр по закреплению
-    if assigned_filter == 'true':  # Закрепленное
-        equipment = equipment.exclude(employee__isnull=True)
-    elif assigned_filter == 'false':  # Свободное
-        equipment = equipment.filter(employee__isnull=True)
-    
-    if employee_filter:  # ✅ Фильтр по сотруднику
-        try:
-            employee_id = int(employee_filter)
-            equipment = equipment.filter(employee_id=employee_id)
-        except (ValueError, TypeError):
-            pass    
-
+    equipment = search_equipment(
+        query, type_filter, office_filter, disposed_filter, assigned_filter, employee_filter,
+    ).select_related('employee')
 
     try:
         per_page = int(per_page)
     except:
         per_page = 20
     per_page = min(max(per_page, 10), 100)
-    equipment = equipment.order_by('-id')
-    paginator = Paginator(equipment, per_page)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
 
-    # ✅ Передаем всех сотрудников для выпадающего списка
-    all_employees = Employee.objects.filter(status='active').order_by('fio')    
-    
+    # Число строк кэшируется по набору фильтров, страницы — по курсору -id без OFFSET
+    filters = (
+        ' '.join(query.split()), type_filter, office_filter,
+        disposed_filter, assigned_filter, employee_filter,
+    )
+    count = cached_count(equipment, filters)
+    page_obj = equipment_keyset_page(
+        equipment, count, per_page,
+        page=request.GET.get('page'),
+        after=request.GET.get('after'),
+        before=request.GET.get('before'),
+    )
+    pagination_params = urlencode([
+        (name, value) for name, value in (
+            ('q', query), ('type', type_filter), ('office', office_filter),
+            ('disposed', disposed_filter), ('assigned', assigned_filter),
+            ('employee', employee_filter), ('per_page', per_page),
+        ) if value
+    ])
+
     return render(request, 'staff/equipment_list.html', {
         'page_obj': page_obj,
         'query': query,
@@ -218,9 +207,9 @@ def equipment_list(request):
         'disposed_filter': disposed_filter,
         'assigned_filter': assigned_filter,  # ✅ Передаем в шаблон
         'per_page': per_page,
+        'pagination_params': pagination_params,
         'equipment_types': Equipment.EQUIPMENT_TYPES,
         'office_choices': Employee.OFFICE_CHOICES,
-        'all_employees': all_employees,  # ✅ Всегда передаём
     })
 
 @login_required
@@ -266,7 +255,7 @@ def employee_change_status(request, pk):
         new_status = request.POST.get('status')
         if new_status in dict(Employee.STATUS_CHOICES):
             employee.status = new_status
-            employee.save()
+            employee.save(only_dirty=True)
             return JsonResponse({
                 'success': True,
                 'message': f'Статус сотрудника {employee.fio} изменён на {employee.get_status_display()}',
@@ -284,6 +273,48 @@ def employee_change_status(request, pk):
         'message': 'Метод не разрешён'
     }, status=405)
 
+@login_required
+@require_POST
+def employees_change_status(request):
+    """
+    Массово меняет статус выбранных сотрудников через AJAX:
+    employee_ids (списком или через запятую), status, dismissal_date (ГГГГ-ММ-ДД).
+    """
+    raw_ids = ','.join(request.POST.getlist('employee_ids'))
+    try:
+        employee_ids = {int(value) for value in raw_ids.split(',') if value.strip()}
+    except ValueError:
+        return JsonResponse({'success': False, 'message': 'Некорректный список сотрудников'}, status=400)
+    if not employee_ids:
+        return JsonResponse({'success': False, 'message': 'Не выбраны сотрудники'}, status=400)
+    if len(employee_ids) > MAX_EMPLOYEES:
+        return JsonResponse({'success': False, 'message': f'Не больше {MAX_EMPLOYEES} сотрудников за раз'}, status=400)
+
+    new_status = request.POST.get('status')
+    if new_status not in dict(Employee.STATUS_CHOICES):
+        return JsonResponse({'success': False, 'message': 'Недопустимый статус'}, status=400)
+
+    raw_date = request.POST.get('dismissal_date', '').strip()
+    try:
+        dismissal_date = parse_date(raw_date) if raw_date else None
+    except ValueError:
+        dismissal_date = None
+    if raw_date and dismissal_date is None:
+        return JsonResponse({'success': False, 'message': 'Некорректная дата'}, status=400)
+
+    updated, released, unchanged = change_status(employee_ids, new_status, dismissal_date)
+    status_display = dict(Employee.STATUS_CHOICES)[new_status]
+    message = f'Статус {updated} сотрудников изменён на {status_display}, освобождено оборудования: {released}'
+    if unchanged:
+        message += f'; уже в этом статусе: {unchanged}'
+    return JsonResponse({
+        'success': True,
+        'message': message,
+        'updated': updated,
+        'released': released,
+        'unchanged': unchanged,
+    })
+
 @login_required
 def equipment_assign_employee(request, pk):
     """
@@ -311,13 +342,12 @@ def equipment_assign_employee(request, pk):
     return HttpResponseRedirect('/equipment/')
 
 def get_ad_status(request, employee_id):
-    """AJAX: Получить статус AD"""
+    """AJAX: Получить статус AD (из кэша, см. ad_status; ?refresh=1 — сразу из AD)"""
     employee = get_object_or_404(Employee, pk=employee_id)
     if not employee.ad_login:
         return JsonResponse({'error': 'No AD login'})
     
-    ad = ADService()
-    status = ad.get_user_status(employee.ad_login)
+    status = ad_status.get_status(employee.ad_login, force=request.GET.get('refresh') == '1')
     return JsonResponse(status)
 
 def unlock_ad_account(request, employee_id):
@@ -328,6 +358,7 @@ def unlock_ad_account(request, employee_id):
     
     ad = ADService()
     result = ad.unlock_user(employee.ad_login)
+    ad_status.invalidate(employee.ad_login)
     return JsonResponse(result)
 
 # staff/views.py - добавить эту функцию
@@ -368,9 +399,8 @@ def ad_lockout_webhook(request):
         if not username:
             return JsonResponse({'error': 'Username required'}, status=400)
         
-        # Сбрасываем кэш для этого пользователя
-        cache_key = f'ad_status_{username}'
-        cache.delete(cache_key)
+        # Сбрасываем кэш статуса AD для этого пользователя
+        ad_status.invalidate(username)
         
         # Сохраняем уведомление
         notification_id = str(uuid.uuid4())
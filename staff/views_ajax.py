@@ -2,13 +2,17 @@
 
 from django.shortcuts import render, get_object_or_404
 from django.contrib.auth.decorators import login_required
+from .conditional import conditional, employee_equipment_etag, typeahead_etag
+from .employee_typeahead import LIMIT, MAX_LIMIT, suggest
 from .models import Employee, Equipment
 
 from django.http import JsonResponse
 from django.core import serializers
+from django.views.decorators.http import require_GET
 
 
 @login_required
+@conditional(employee_equipment_etag)
 def employee_equipment_partial(request, employee_id):
     """
     Возвращает частичный HTML с таблицей оборудования для конкретного сотрудника.
@@ -22,6 +26,8 @@ def employee_equipment_partial(request, employee_id):
         'equipment_list': equipment_list,
     })
 
+@login_required
+@conditional(employee_equipment_etag)
 def employee_equipment_json(request, employee_id):
     """Возвращает оборудование сотрудника в формате JSON"""
     try:
@@ -33,13 +39,34 @@ def employee_equipment_json(request, employee_id):
                 'type': item.get_type_display() if item.type else '',
                 'model': item.model or '',
                 'serial_number': item.serial_number or '',
-                'inventory_number': item.inventory_number or '',
-                'status': item.get_status_display() if item.status else '',
-                'issue_date': item.issue_date.strftime('%d.%m.%Y') if item.issue_date else '',
+                'mac_address': item.mac_address or '',
+                'ip_or_anydesk': item.ip_or_anydesk or '',
+                'office': item.get_office_display() if item.office else '',
+                'disposed': item.disposed,
                 'comment': item.comment or ''
             })
         
         return JsonResponse(equipment_data, safe=False)
         
     except Exception as e:
-        return JsonResponse({'error': str(e)}, status=500)
\ No newline at end of file
+        return JsonResponse({'error': str(e)}, status=500)
+
+
+@login_required
+@require_GET
+@conditional(typeahead_etag)
+def employee_typeahead(request):
+    """
+    JSON-подсказки активных сотрудников по началу слов ФИО (?q=ив пет&limit=20).
+    Используется полями выбора сотрудника в equipment_list и provisioning.
+    """
+    try:
+        limit = min(max(int(request.GET.get('limit', LIMIT)), 1), MAX_LIMIT)
+    except (TypeError, ValueError):
+        limit = LIMIT
+    office_labels = dict(Employee.OFFICE_CHOICES)
+    results = [
+        {'id': pk, 'fio': fio, 'office': office or '', 'office_display': office_labels.get(office, office or '')}
+        for pk, fio, office in suggest(request.GET.get('q', ''), limit)
+    ]
+    return JsonResponse({'results': results})
@@ -0,0 +1,205 @@
+# staff/views_api.py
+"""
+Выгрузка справочника сотрудников и оборудования целиком для скриптов и фронтенда.
+
+    GET /api/employees/?fields=id,fio,email&status=active&office=ORL&q=иван&updated_since=2025-01-01
+    GET /api/equipment/?fields=id,serial_number,employee_fio&type=SIP&assigned=true&format=ndjson
+
+Строки читаются .values_list().iterator(chunk_size=...) и сразу отдаются
+через StreamingHttpResponse — JSON-массивом объектов (по умолчанию) или
+NDJSON (format=ndjson), — поэтому память не зависит от числа строк.
+Поля — только из белого списка: пароли и info сотрудников не выгружаются.
+
+    GET /api/export/?format=xlsx[&sheet=Выдано...] / ?format=csv&sheet=Выдано
+
+Книга ТМЦ целиком (workbook_export) — в формате, который читает импорт,
+включая пароли: это резервная копия для повторной загрузки, поэтому нужно
+право staff.view_employee.
+"""
+import tempfile
+
+from django.conf import settings
+from django.contrib.auth.decorators import login_required, permission_required
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import FileResponse, JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from django.utils.http import content_disposition_header
+from django.views.decorators.gzip import gzip_page
+from django.views.decorators.http import require_GET
+
+from .employee_search import search_employees
+from .equipment_search import search_equipment
+from .workbook_export import SHEETS, csv_lines, write_xlsx
+
+CHUNK_SIZE = 2000
+
+# Поле ответа -> поле запроса
+EMPLOYEE_FIELDS = {
+    'id': 'id',
+    'fio': 'fio',
+    'first_name': 'first_name',
+    'last_name': 'last_name',
+    'middle_name': 'middle_name',
+    'ad_login': 'ad_login',
+    'email': 'email',
+    'sip_number': 'sip_number',
+    'phone': 'phone',
+    'position': 'position',
+    'department': 'department',
+    'supervisor_id': 'supervisor_id',
+    'office': 'office',
+    'status': 'status',
+    'hire_date': 'hire_date',
+    'dismissal_date': 'dismissal_date',
+    'created_at': 'created_at',
+    'updated_at': 'updated_at',
+}
+EMPLOYEE_DEFAULT_FIELDS = ('id', 'fio', 'position', 'department', 'office', 'status', 'ad_login', 'email', 'sip_number', 'phone')
+
+EQUIPMENT_FIELDS = {
+    'id': 'id',
+    'type': 'type',
+    'model': 'model',
+    'serial_number': 'serial_number',
+    'mac_address': 'mac_address',
+    'ip_or_anydesk': 'ip_or_anydesk',
+    'comment': 'comment',
+    'in_domain': 'in_domain',
+    'office': 'office',
+    'position': 'position',
+    'disposed': 'disposed',
+    'employee_id': 'employee_id',
+    'employee_fio': 'employee__fio',
+}
+EQUIPMENT_DEFAULT_FIELDS = tuple(EQUIPMENT_FIELDS)
+
+
+class ApiError(Exception):
+    pass
+
+
+def parse_fields(request, allowed, default):
+    raw = request.GET.get('fields', '')
+    names = [name.strip() for name in raw.split(',') if name.strip()] or list(default)
+    unknown = [name for name in names if name not in allowed]
+    if unknown:
+        raise ApiError(f"Неизвестные поля: {', '.join(unknown)}. Доступны: {', '.join(allowed)}")
+    return list(dict.fromkeys(names))
+
+
+def stream_rows(queryset, names, allowed, output_format):
+    """Генератор тела ответа: строки пачками по CHUNK_SIZE, без накопления всего списка"""
+    rows = queryset.values_list(*[allowed[name] for name in names]).order_by('pk').iterator(chunk_size=CHUNK_SIZE)
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    ndjson = output_format == 'ndjson'
+    if not ndjson:
+        yield '['
+    first = True
+    batch = []
+    for row in rows:
+        line = encoder.encode(dict(zip(names, row)))
+        if ndjson:
+            batch.append(line + '\n')
+        else:
+            batch.append(line if first else ',' + line)
+            first = False
+        if len(batch) >= CHUNK_SIZE:
+            yield ''.join(batch)
+            batch = []
+    if batch:
+        yield ''.join(batch)
+    if not ndjson:
+        yield ']'
+
+
+def streaming_response(request, queryset, allowed, default):
+    output_format = request.GET.get('format', 'json')
+    if output_format not in ('json', 'ndjson'):
+        return JsonResponse({'error': 'format: json или ndjson'}, status=400)
+    try:
+        names = parse_fields(request, allowed, default)
+    except ApiError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    content_type = 'application/x-ndjson' if output_format == 'ndjson' else 'application/json'
+    return StreamingHttpResponse(
+        stream_rows(queryset, names, allowed, output_format),
+        content_type=f'{content_type}; charset=utf-8',
+    )
+
+
+@gzip_page
+@login_required
+@require_GET
+def api_employees(request):
+    """Сотрудники: фильтры q, status, office, updated_since (дата или дата-время ISO)"""
+    employees = search_employees(
+        request.GET.get('q', ''),
+        request.GET.get('status', 'all'),
+        request.GET.get('office', 'all'),
+    )
+    updated_since = request.GET.get('updated_since')
+    if updated_since:
+        try:
+            since = parse_datetime(updated_since)
+            day = None if since else parse_date(updated_since)
+        except ValueError:
+            since = day = None
+        if since:
+            if settings.USE_TZ and timezone.is_naive(since):
+                since = timezone.make_aware(since)
+            elif not settings.USE_TZ and timezone.is_aware(since):
+                since = timezone.make_naive(since)
+            employees = employees.filter(updated_at__gte=since)
+        elif day:
+            employees = employees.filter(updated_at__date__gte=day)
+        else:
+            return JsonResponse({'error': 'updated_since: ожидается дата ISO 8601'}, status=400)
+    return streaming_response(request, employees, EMPLOYEE_FIELDS, EMPLOYEE_DEFAULT_FIELDS)
+
+
+@gzip_page
+@login_required
+@require_GET
+def api_equipment(request):
+    """Оборудование: фильтры как у списка оборудования — q, type, office, disposed, assigned, employee"""
+    equipment = search_equipment(
+        request.GET.get('q', ''),
+        request.GET.get('type', ''),
+        request.GET.get('office', ''),
+        request.GET.get('disposed', ''),
+        request.GET.get('assigned', ''),
+        request.GET.get('employee', ''),
+    )
+    return streaming_response(request, equipment, EQUIPMENT_FIELDS, EQUIPMENT_DEFAULT_FIELDS)
+
+
+@login_required
+@permission_required('staff.view_employee', raise_exception=True)
+@require_GET
+def export_workbook(request):
+    """Выгрузка книги ТМЦ: XLSX (все листы или ?sheet=...) или CSV одного листа"""
+    output_format = request.GET.get('format', 'xlsx')
+    sheets = request.GET.getlist('sheet') or list(SHEETS)
+    unknown = [name for name in sheets if name not in SHEETS]
+    if unknown or output_format not in ('xlsx', 'csv'):
+        return JsonResponse({'error': f"format: xlsx или csv; sheet: {', '.join(SHEETS)}"}, status=400)
+
+    if output_format == 'csv':
+        if len(sheets) != 1:
+            return JsonResponse({'error': 'CSV выгружается по одному листу: укажите sheet'}, status=400)
+        name = sheets[0]
+        # BOM первой строкой — Excel откроет файл в UTF-8
+        lines = (('\ufeff' if i == 0 else '') + line for i, line in enumerate(csv_lines(name)))
+        response = StreamingHttpResponse(lines, content_type='text/csv; charset=utf-8')
+        response['Content-Disposition'] = content_disposition_header(True, f'{name}.csv')
+        return response
+
+    # write_only пишет листы во временные файлы; готовая книга отдаётся с диска кусками
+    target = tempfile.TemporaryFile()
+    write_xlsx(target, sheets)
+    target.seek(0)
+    return FileResponse(
+        target, as_attachment=True, filename='ТМЦ выгрузка.xlsx',
+        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    )
@@ -9,6 +9,7 @@ from django.http import JsonResponse, HttpResponse
 from django.conf import settings
 from django.views.decorators.csrf import csrf_exempt
 from django.contrib.auth.decorators import login_required
+from django.views.decorators.gzip import gzip_page
 from django.views.decorators.http import require_POST
 from django.shortcuts import render, get_object_or_404
 from django.utils import timezone
@@ -23,9 +24,6 @@ def provisioning_dashboard(request):
     """
     Страница Provisioning: выбор сотрудника и выполнение действий.
     """
-    # Получаем всех активных сотрудников
-    active_employees = Employee.objects.filter(status='active').order_by('fio')
-    
     # Получаем выбранного сотрудника (если передан ID)
     selected_employee_id = request.GET.get('employee_id')
     selected_employee = None
@@ -44,7 +42,6 @@ def provisioning_dashboard(request):
             pass
 
     return render(request, 'staff/provisioning_dashboard.html', {
-        'active_employees': active_employees,
         'selected_employee': selected_employee,
         'sip_phones': sip_phones,
     })
@@ -224,6 +221,8 @@ def send_sip_command(request):
         return JsonResponse({"success": False, "message": f"Ошибка: {e}"})
 
 # === 📋 Получение информации о SIP-телефоне ===
+# POST: условный ответ (304) к нему не применим, только сжатие
+@gzip_page
 @login_required
 def get_sip_phone_info(request):
     """
@@ -0,0 +1,126 @@
+# staff/workbook_export.py
+"""
+Выгрузка базы в формате "ТМЦ макет.xlsx" — теми же листами и колонками,
+что читают команды импорта (см. sheet_specs), чтобы выгрузку можно было
+сразу загрузить обратно (sync_workbook, import_sheet и остальные команды).
+
+    Employment — активные сотрудники, Dismissal — уволенные и декрет,
+    Выдано — закреплённое оборудование, Свободное — свободное.
+
+Строки читаются .values_list().iterator(chunk_size=...) и пишутся сразу:
+XLSX — openpyxl в режиме write_only (листы уходят во временные файлы,
+а не в память), CSV — модулем csv, по листу на файл "<лист>.csv".
+Память не зависит от размера базы.
+
+Чтобы импорт восстановил то, что выводится из текста ячеек:
+    статус "декрет" — по слову "декрет" в ФИ (дописывается, если его нет),
+    "списано" у свободного — по слову "списано" в комментарии (так же).
+Ограничения самого формата книги: офис и должность сотрудника есть только
+в строках Выдано (у сотрудников без оборудования не переносятся),
+колонка "Руководитель" выгружается, но импортом не читается.
+"""
+import csv
+
+from openpyxl import Workbook
+
+from .models import Employee, Equipment
+from .sheet_specs import EMPLOYMENT_HEADER, EQUIPMENT_HEADER
+
+CHUNK_SIZE = 2000
+
+# Колонки 1..18 листов Employment / Dismissal (0 — номер строки), как EMPLOYEE_COLUMNS в sheet_specs
+EMPLOYEE_EXPORT_FIELDS = (
+    'fio', 'middle_name', 'ad_login', 'ad_password', 'email', 'email_password',
+    'sip_number', 'web_3cx', 'pass_3cx', 'b24_login', 'b24_password', 'phone',
+    'info', 'supervisor__fio', 'tel_b24_login', 'tel_b24_password', 'vats_login', 'vats_password',
+    'status',
+)
+
+EQUIPMENT_EXPORT_FIELDS = (
+    'employee__fio', 'employee__position', 'office', 'type', 'model',
+    'serial_number', 'mac_address', 'ip_or_anydesk', 'comment', 'disposed',
+)
+
+
+def _text(value):
+    return '' if value is None else value
+
+
+def split_fio(fio, middle_name):
+    """("Фамилия Имя", "Отчество") — обратное к compose_fio в sheet_specs"""
+    if middle_name and fio.endswith(f' {middle_name}'):
+        return fio[:-len(middle_name) - 1], middle_name
+    return fio, ''
+
+
+def employee_rows(statuses):
+    employees = Employee.objects.filter(status__in=statuses).order_by('pk')
+    rows = employees.values_list(*EMPLOYEE_EXPORT_FIELDS).iterator(chunk_size=CHUNK_SIZE)
+    for num, values in enumerate(rows, 1):
+        fio, middle_name, *data, status = [_text(value) for value in values]
+        first_last, middle = split_fio(fio, middle_name)
+        if status == 'maternity' and 'декрет' not in fio.lower():
+            first_last = f'{first_last} (декрет)'
+        yield [num, first_last, middle, *data]
+
+
+def equipment_rows(assigned):
+    equipment = Equipment.objects.filter(employee__isnull=not assigned).order_by('pk')
+    rows = equipment.values_list(*EQUIPMENT_EXPORT_FIELDS).iterator(chunk_size=CHUNK_SIZE)
+    for values in rows:
+        *row, comment, disposed = [_text(value) for value in values]
+        if not assigned and disposed and not any(word in comment.lower() for word in ('списано', 'списание')):
+            comment = f'{comment} списано'.strip()
+        yield [*row, comment]
+
+
+# Лист -> (заголовок, генератор строк)
+SHEETS = {
+    'Employment': (EMPLOYMENT_HEADER, lambda: employee_rows(['active'])),
+    'Dismissal': (EMPLOYMENT_HEADER, lambda: employee_rows(['dismissed', 'maternity'])),
+    'Выдано': (EQUIPMENT_HEADER, lambda: equipment_rows(assigned=True)),
+    'Свободное': (EQUIPMENT_HEADER, lambda: equipment_rows(assigned=False)),
+}
+
+
+def write_xlsx(target, sheets=None):
+    """Пишет книгу в путь или файловый объект target; возвращает число строк по листам"""
+    wb = Workbook(write_only=True)
+    counts = {}
+    for name in sheets or SHEETS:
+        header, rows = SHEETS[name]
+        ws = wb.create_sheet(name)
+        ws.append(header)
+        counts[name] = 0
+        for row in rows():
+            ws.append(row)
+            counts[name] += 1
+    wb.save(target)
+    return counts
+
+
+def csv_lines(name):
+    """Генератор строк CSV одного листа (для записи в файл или потокового ответа)"""
+    header, rows = SHEETS[name]
+    buffer = _LineBuffer()
+    writer = csv.writer(buffer)
+    yield writer.writerow(header)
+    for row in rows():
+        yield writer.writerow(row)
+
+
+def write_csv(file_path, name):
+    """Лист в CSV (UTF-8 с BOM — Excel открывает без выбора кодировки); возвращает число строк"""
+    count = -1
+    with open(file_path, 'w', encoding='utf-8-sig', newline='') as f:
+        for line in csv_lines(name):
+            f.write(line)
+            count += 1
+    return count
+
+
+class _LineBuffer:
+    """csv.writer пишет в write(); строка сразу возвращается генератору"""
+
+    def write(self, value):
+        return value
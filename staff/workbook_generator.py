@@ -0,0 +1,111 @@
+# staff/workbook_generator.py
+"""
+Генератор синтетических книг в формате "ТМЦ макет.xlsx" для замеров импорта.
+
+Листы Employment и Dismissal — фиксированные 19 колонок, Выдано — колонки
+по заголовкам, как в рабочем файле. Книга пишется в режиме write_only,
+поэтому и 100k строк генерируются в ограниченной памяти.
+
+duplicates — доля строк-повторов (тот же AD-логин / серийный номер
+с изменёнными данными), ambiguity — доля сотрудников, у которых
+"Фамилия Имя" совпадает с предыдущим (в листе Выдано имя неоднозначно).
+"""
+import random
+
+from openpyxl import Workbook
+
+from .sheet_specs import EMPLOYMENT_HEADER, EQUIPMENT_HEADER
+
+LAST_NAMES = [
+    'Иванов', 'Петров', 'Смирнов', 'Кузнецов', 'Попов', 'Васильев', 'Соколов', 'Михайлов',
+    'Новиков', 'Фёдоров', 'Морозов', 'Волков', 'Алексеев', 'Лебедев', 'Семёнов', 'Егоров',
+    'Павлов', 'Козлов', 'Степанов', 'Николаев', 'Орлов', 'Андреев', 'Макаров', 'Никитин',
+]
+FIRST_NAMES = [
+    'Александр', 'Дмитрий', 'Максим', 'Сергей', 'Андрей', 'Алексей', 'Артём', 'Илья',
+    'Кирилл', 'Михаил', 'Никита', 'Матвей', 'Роман', 'Егор', 'Арсений', 'Иван',
+]
+MIDDLE_NAMES = [
+    'Александрович', 'Дмитриевич', 'Сергеевич', 'Андреевич', 'Алексеевич', 'Иванович',
+    'Михайлович', 'Николаевич', 'Петрович', 'Викторович',
+]
+POSITIONS = ['Менеджер', 'Бухгалтер', 'Инженер', 'Кладовщик', 'Программист', 'Юрист', '']
+OFFICES = ['ORL', 'MSK', 'SKLAD', 'remote', 'ЭМКО', 'ORUS', 'msk', '']
+EQUIPMENT = [
+    ('Ноутбук', 'Lenovo ThinkPad E14'), ('Монитор', 'Dell P2422H'), ('SIP', 'Yealink T31P'),
+    ('PC', 'HP ProDesk 400'), ('Android', 'Samsung Galaxy A15'), ('-', 'Logitech MK270'),
+]
+
+
+def _person(i, rng, people, ambiguity):
+    """ФИ и отчество i-го сотрудника; неоднозначный повторяет ФИ предыдущего"""
+    if people and rng.random() < ambiguity:
+        first_last = people[-1][0]
+    else:
+        cycle, n = divmod(i, len(LAST_NAMES) * len(FIRST_NAMES))
+        last = LAST_NAMES[n % len(LAST_NAMES)] + (f'-{cycle}' if cycle else '')
+        first_last = f"{last} {FIRST_NAMES[n // len(LAST_NAMES)]}"
+    return first_last, MIDDLE_NAMES[i % len(MIDDLE_NAMES)]
+
+
+def _employment_row(num, first_last, middle, login, rng):
+    return [
+        num, first_last, middle, login, f'Pw{rng.randrange(10 ** 6):06d}',
+        f'{login}@p-el.ru', f'Ep{rng.randrange(10 ** 6):06d}', str(1000 + num % 9000),
+        'https://pbx.p-el.ru', f'P3{rng.randrange(10 ** 4):04d}', login,
+        f'B{rng.randrange(10 ** 6):06d}', f'+7 900 {rng.randrange(10 ** 7):07d}', '',
+        '', '', '', '', '',
+    ]
+
+
+def generate_workbook(path, rows, duplicates=0.02, ambiguity=0.02, dismissed=0.05, seed=0):
+    """
+    Пишет книгу с листами Employment, Dismissal и Выдано; rows — строк
+    в Employment и в Выдано. Возвращает число строк по листам.
+    """
+    rng = random.Random(seed)
+    wb = Workbook(write_only=True)
+    counts = {}
+
+    people = []
+    for i in range(rows):
+        first_last, middle = _person(i, rng, people, ambiguity)
+        people.append((first_last, middle, f'user{i:06d}'))
+
+    ws = wb.create_sheet('Employment')
+    ws.append(EMPLOYMENT_HEADER)
+    counts['Employment'] = 0
+    for num in range(1, rows + 1):
+        if num > 1 and rng.random() < duplicates:
+            # Повтор уже встречавшегося логина с другими паролями/телефоном
+            first_last, middle, login = people[rng.randrange(num - 1)]
+        else:
+            first_last, middle, login = people[num - 1]
+        ws.append(_employment_row(num, first_last, middle, login, rng))
+        counts['Employment'] += 1
+
+    ws = wb.create_sheet('Dismissal')
+    ws.append(EMPLOYMENT_HEADER)
+    counts['Dismissal'] = 0
+    for num, (first_last, middle, login) in enumerate(rng.sample(people, int(rows * dismissed)), 1):
+        if rng.random() < 0.2:
+            first_last = f'{first_last} (декрет)'
+        ws.append(_employment_row(num, first_last, middle, login, rng))
+        counts['Dismissal'] += 1
+
+    ws = wb.create_sheet('Выдано')
+    ws.append(EQUIPMENT_HEADER)
+    counts['Выдано'] = 0
+    for num in range(rows):
+        serial_num = rng.randrange(num) if num and rng.random() < duplicates else num
+        first_last, _, _ = people[rng.randrange(rows)]
+        type_name, model = EQUIPMENT[serial_num % len(EQUIPMENT)]
+        ws.append([
+            first_last, rng.choice(POSITIONS), rng.choice(OFFICES), type_name, model,
+            f'SN{serial_num:08d}', f'00:1A:2B:{serial_num % 256:02X}:{serial_num // 256 % 256:02X}:00',
+            str(rng.randrange(10 ** 8, 10 ** 9)) if type_name == 'Ноутбук' else '', '',
+        ])
+        counts['Выдано'] += 1
+
+    wb.save(path)
+    return counts
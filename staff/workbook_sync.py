@@ -0,0 +1,410 @@
+# staff/workbook_sync.py
+"""
+Полная синхронизация базы с книгой ТМЦ за один проход.
+
+Заменяет последовательный запуск import_employees_complete,
+import_dismissal_fixed, update_dismissed_data, import_equipment,
+update_positions_offices и import_free_equipment_fixed: книга открывается
+один раз, сотрудники загружаются один раз в EmployeeIndex и переиспользуются
+всеми этапами, запись идёт в одной транзакции. Строки разбираются
+по описаниям листов из sheet_specs.
+
+С changes (см. import_changes) синхронизация ничего не пишет: изменения
+уходят в набор, который потом применяется отдельно.
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from .bulk_upsert import BulkUpserter
+from .employee_updater import EmployeeUpdater, create_employees
+from .employee_index import EmployeeIndex, normalize_name
+from .import_fingerprints import FingerprintStore
+from .import_metrics import ImportMetrics
+from .import_vanished import PRUNE_ACTIONS, prune
+from .models import Employee, Equipment
+from .sheet_spec import employee_key, model_values, stored
+from .sheet_specs import DISMISSAL, EMPLOYMENT, EQUIPMENT_FIELDS, FREE, ISSUED, VALID_OFFICES
+
+
+class WorkbookSync:
+    """
+    Этапы синхронизации в порядке зависимостей:
+    Employment -> Dismissal -> Выдано -> Свободное.
+
+    stats — счётчики по этапам, log — необязательная функция (message, level)
+    для построчных сообщений. По умолчанию строки, не изменившиеся с прошлого
+    запуска, пропускаются (см. import_fingerprints); full=True применяет все.
+    prune=True применяет строки, пропавшие из листов (см. import_vanished) —
+    после всех этапов, чтобы перешедшие в Dismissal сотрудники не были уволены.
+    changes — ChangeSet для dry-run: вместо записи в базу изменения попадают в него.
+    metrics — ImportMetrics для замеров по этапам read / match / diff / write.
+    """
+
+    STAGES = [
+        ('Employment', 'sync_employment'),
+        ('Dismissal', 'sync_dismissal'),
+        ('Выдано', 'sync_equipment'),
+        ('Свободное', 'sync_free_equipment'),
+    ]
+
+    def __init__(self, reader, batch_size=1000, log=None, full=False, changes=None, metrics=None, prune=False):
+        self.reader = reader
+        self.batch_size = batch_size
+        self.log = log or (lambda message, level='info': None)
+        self.full = full
+        self.prune = prune
+        self.changes = changes
+        self.metrics = metrics or ImportMetrics(enabled=False)
+        self.index = None
+        self.fingerprints = None
+        self.equipment_freed = 0
+        self.sheet_name = None
+        self.stats = {}
+
+    def run(self):
+        vanished = {}
+        with transaction.atomic():
+            with self.metrics.stage('read'):
+                self.index = EmployeeIndex()
+            for sheet_name, method in self.STAGES:
+                if sheet_name not in self.reader:
+                    self.log(f"Лист '{sheet_name}' не найден в файле", 'warning')
+                    continue
+                with self.metrics.stage('read'):
+                    self.fingerprints = FingerprintStore(
+                        f'sync_workbook:{sheet_name}', full=self.full,
+                        keep_vanished=not self.prune and sheet_name in PRUNE_ACTIONS,
+                    )
+                self.sheet_name = sheet_name
+                getattr(self, method)(self.reader.sheet(sheet_name))
+                stats = self.stats[sheet_name]
+                stats['skipped'] = self.fingerprints.skipped
+                stats['vanished'] = len(self.fingerprints.vanished)
+                vanished[sheet_name] = self.fingerprints.vanished
+                if self.changes is not None:
+                    self.changes.fingerprints(self.fingerprints)
+                else:
+                    with self.metrics.stage('write'):
+                        self.fingerprints.save()
+            if self.prune:
+                with self.metrics.stage('write'):
+                    for sheet_name, keys in vanished.items():
+                        if sheet_name in PRUNE_ACTIONS:
+                            self.stats[sheet_name]['pruned'] = prune(
+                                sheet_name, keys, index=self.index, changes=self.changes
+                            )
+        return self.stats
+
+    def _stored(self, employee):
+        return stored(employee, self.changes)
+
+    def _upsert(self, upserter, key, defaults, **extra):
+        with self.metrics.stage('write'):
+            return upserter.add(key, defaults, **extra)
+
+    def _flush(self, upserter):
+        with self.metrics.stage('write'):
+            return upserter.flush()
+
+    def _upserter(self, update_fields):
+        if self.changes is not None:
+            return self.changes.equipment_upserter(update_fields, self.sheet_name)
+        return BulkUpserter(Equipment, 'serial_number', update_fields, batch_size=self.batch_size)
+
+    def _row_changed(self, key, values, row_num):
+        with self.metrics.stage('diff'):
+            return self.fingerprints.changed(key, values, row_num=row_num)
+
+    def _row_failed(self, row_num, stats, error):
+        self.fingerprints.forget_row(row_num)
+        stats['errors'] += 1
+        self.log(f"❌ Ошибка в строке {row_num}: {error}", 'error')
+
+    # === Общие операции над сотрудниками ===
+
+    def _apply_fields(self, employee, fields):
+        """Переносит отличающиеся значения в объект, возвращает изменённые поля: поле -> старое значение"""
+        with self.metrics.stage('diff'):
+            changed = {}
+            old_fio, old_login = employee.fio, employee.ad_login
+            for field, value in fields.items():
+                if getattr(employee, field) != value:
+                    changed[field] = getattr(employee, field)
+                    setattr(employee, field, value)
+            if changed:
+                self.index.reindex(employee, old_fio, old_login)
+            return changed
+
+    def _pend(self, pending, employee, changed, row_num):
+        """Копит изменения сотрудника; старое значение поля — из первой строки, изменившей его"""
+        _, already_changed, _ = pending.get(id(employee), (employee, {}, row_num))
+        pending[id(employee)] = (employee, {**changed, **already_changed}, row_num)
+
+    def _write_updates(self, pending, stats):
+        """
+        Записывает накопленные изменения сотрудников (bulk_update пачками,
+        см. employee_updater); возвращает записанные пары (сотрудник, изменённые поля).
+        """
+        with self.metrics.stage('write'):
+            if self.changes is not None:
+                for employee, changed, row_num in pending.values():
+                    self.changes.update_employee(employee, changed, self.sheet_name, row_num)
+                return [(employee, changed) for employee, changed, _ in pending.values()]
+
+            updater = EmployeeUpdater(batch_size=self.batch_size)
+            results = []
+            for employee, changed, row_num in pending.values():
+                results.extend(updater.add(employee, changed, row=row_num))
+            results.extend(updater.flush())
+            self.equipment_freed = updater.equipment_freed
+
+        saved = []
+        for entry, error in results:
+            if error is None:
+                saved.append((entry['obj'], entry['changed']))
+            else:
+                for row_num in entry['rows']:
+                    self._row_failed(row_num, stats, error)
+        return saved
+
+    def _new(self, fields, row_num, pending_new):
+        """
+        Новый сотрудник: сразу попадает в индекс (повторная строка с тем же
+        ФИО/логином найдёт его), а в базу пишется пачкой в _create_pending
+        """
+        employee = Employee(**fields)
+        self.index.add(employee)
+        pending_new.append((employee, row_num))
+        return employee
+
+    def _create_pending(self, pending_new, stats):
+        """Создаёт накопленных сотрудников; возвращает созданных"""
+        with self.metrics.stage('write'):
+            return self._write_new(pending_new, stats)
+
+    def _write_new(self, pending_new, stats):
+        if self.changes is not None:
+            for employee, row_num in pending_new:
+                self.changes.create_employee(employee, self.sheet_name, row_num)
+            return [employee for employee, _ in pending_new]
+        created = []
+        for employee, row_num, error in create_employees(pending_new, batch_size=self.batch_size):
+            if error is None:
+                created.append(employee)
+            else:
+                self.index.remove(employee)
+                self._row_failed(row_num, stats, error)
+        return created
+
+    # === Этапы ===
+
+    def sync_employment(self, sheet):
+        """Активные сотрудники (как import_employees_complete)"""
+        stats = self.stats['Employment'] = {'rows': 0, 'created': 0, 'updated': 0, 'errors': 0}
+        pending = {}  # id(сотрудника) -> (сотрудник, изменённые поля, номер строки)
+        pending_new = []
+
+        compiled = EMPLOYMENT.compile(sheet.header())
+        for row_num, row in self.metrics.timed(sheet.rows(width=compiled.width)):
+            with self.metrics.stage('parse'):
+                record = compiled.transform(row)
+            if record is None:
+                continue
+            fields = model_values(record)
+            fio = fields['fio']
+            stats['rows'] += 1
+            if not self._row_changed(fields['ad_login'] or f"fio:{normalize_name(fio)}", row, row_num):
+                continue
+
+            with self.metrics.stage('match'):
+                employee = compiled.match(record, self.index)
+            if employee:
+                changed = self._apply_fields(employee, fields)
+                if changed and self._stored(employee):
+                    self._pend(pending, employee, changed, row_num)
+            else:
+                self._new(fields, row_num, pending_new)
+
+        # Сначала обновления: сменённый AD-логин освобождает его для нового сотрудника
+        for employee, _ in self._write_updates(pending, stats):
+            stats['updated'] += 1
+            self.log(f"🔄 Обновлен: {employee.fio}")
+        for employee in self._create_pending(pending_new, stats):
+            stats['created'] += 1
+            self.log(f"✅ Создан: {employee.fio}")
+
+    def sync_dismissal(self, sheet):
+        """
+        Уволенные и декретные (как import_dismissal_fixed + update_dismissed_data):
+        статус, данные учётных записей и создание отсутствующих сотрудников.
+        Оборудование освобождается одним UPDATE на пачку.
+        """
+        stats = self.stats['Dismissal'] = {
+            'rows': 0, 'created': 0, 'status_changed': 0, 'updated': 0,
+            'equipment_freed': 0, 'errors': 0,
+        }
+        pending = {}  # id(сотрудника) -> (сотрудник, изменённые поля, номер строки)
+        pending_new = []
+
+        compiled = DISMISSAL.compile(sheet.header())
+        for row_num, row in self.metrics.timed(sheet.rows(width=compiled.width)):
+            with self.metrics.stage('parse'):
+                record = compiled.transform(row)
+            if record is None:
+                continue
+            fields = model_values(record)
+            fio = fields['fio']
+            stats['rows'] += 1
+            if not self._row_changed(fields['ad_login'] or f"fio:{normalize_name(fio)}", row, row_num):
+                continue
+
+            with self.metrics.stage('match'):
+                employee = compiled.match(record, self.index)
+            if employee:
+                updates = {field: fields[field] for field in DISMISSAL.update_fields}
+                changed = self._apply_fields(employee, updates)
+                # Сотрудник без pk добавлен этим этапом и будет записан вместе с остальными новыми
+                if changed and self._stored(employee):
+                    self._pend(pending, employee, changed, row_num)
+            else:
+                self._new(fields, row_num, pending_new)
+
+        for employee in self._create_pending(pending_new, stats):
+            stats['created'] += 1
+            self.log(f"➕ Создан {employee.status}: {employee.fio}")
+
+        # Оборудование сменивших статус освобождается одним UPDATE на пачку
+        # (в dry-run — отдельными записями набора изменений перед обновлениями)
+        if self.changes is not None:
+            released = [employee for employee, changed, _ in pending.values() if 'status' in changed]
+            if released:
+                with self.metrics.stage('write'):
+                    stats['equipment_freed'] = self.changes.release_equipment(released, self.sheet_name)
+
+        for employee, changed in self._write_updates(pending, stats):
+            if 'status' in changed:
+                stats['status_changed'] += 1
+                self.log(f"✅ Обновлен статус: {employee.fio} -> {employee.status}")
+            else:
+                stats['updated'] += 1
+                self.log(f"🔄 Обновлен: {employee.fio}")
+        if self.changes is None:
+            stats['equipment_freed'] = self.equipment_freed
+
+    def sync_equipment(self, sheet):
+        """Выданное оборудование (как import_equipment + update_positions_offices)"""
+        stats = self.stats['Выдано'] = {
+            'rows': 0, 'created': 0, 'updated': 0, 'free': 0, 'employee_not_found': 0,
+            'positions': 0, 'offices': 0,
+        }
+
+        compiled = ISSUED.compile(sheet.header())
+        if '_fio' in compiled.missing or 'type' in compiled.missing:
+            self.log("❌ В листе 'Выдано' нет столбцов 'ФИО сотрудника' / 'Перечень ТМЦ'", 'error')
+            return
+
+        upserter = self._upserter(EQUIPMENT_FIELDS)
+        dirty = {}  # id(сотрудника) -> (сотрудник, поле -> старое значение)
+
+        def count(results):
+            for item, created in results:
+                if not created:
+                    stats['updated'] += 1
+                elif item['defaults']['employee'] is None:
+                    stats['created'] += 1
+                    stats['free'] += 1
+                else:
+                    stats['created'] += 1
+
+        for row_num, row in self.metrics.timed(sheet.rows(width=compiled.width)):
+            with self.metrics.stage('parse'):
+                record = compiled.transform(row)
+            if record is None:
+                continue
+            fio_excel = record['_fio']
+            stats['rows'] += 1
+
+            with self.metrics.stage('match'):
+                employee = compiled.match(record, self.index)
+                # Офис — только по началу ФИО, как в update_positions_offices;
+                # по фамилии ищется лишь владелец оборудования и должность (import_equipment)
+                by_prefix = self.index.find_by_prefix(fio_excel) if employee else None
+            if not employee:
+                stats['employee_not_found'] += 1
+                self.log(f"❌ Сотрудник не найден: '{fio_excel}'", 'warning')
+
+            # В отпечаток входит найденный сотрудник: если он появился в базе позже,
+            # строка будет применена заново и оборудование перестанет быть свободным.
+            # Берётся логин / ФИО, а не pk: в dry-run у нового сотрудника pk ещё нет
+            serial = record['serial_number']
+            key = serial or f"fio:{normalize_name(fio_excel)}"
+            if not self._row_changed(key, row + (employee_key(employee),), row_num):
+                continue
+
+            office = record['_office']
+            position = record['_position']
+            if employee:
+                if position and not employee.position.strip():
+                    old = dirty.setdefault(id(employee), (employee, {}))[1]
+                    old.setdefault('position', employee.position)
+                    employee.position = position
+                    stats['positions'] += 1
+            if by_prefix:
+                if office and office.upper() in VALID_OFFICES and by_prefix.office in ('remote', ''):
+                    old = dirty.setdefault(id(by_prefix), (by_prefix, {}))[1]
+                    old.setdefault('office', by_prefix.office)
+                    by_prefix.office = office.upper()
+                    stats['offices'] += 1
+
+            if compiled.writable(record):
+                record['employee'] = employee
+                defaults = model_values(record)
+                del defaults['serial_number']
+                count(self._upsert(upserter, serial, defaults, row=row_num))
+        count(self._flush(upserter))
+
+        with self.metrics.stage('write'):
+            self._write_positions(dirty)
+
+    def _write_positions(self, dirty):
+        """Должности и офисы сотрудников, изменённые листом Выдано"""
+        if dirty and self.changes is not None:
+            for employee, old in dirty.values():
+                self.changes.update_employee(employee, old, self.sheet_name, None)
+        elif dirty:
+            # Должностей и офисов немного — один UPDATE на каждую пару значений
+            # дешевле, чем bulk_update с CASE по каждому pk
+            groups = {}
+            for employee, _ in dirty.values():
+                groups.setdefault((employee.position, employee.office), []).append(employee.pk)
+            now = timezone.now()
+            for (position, office), pks in groups.items():
+                Employee.objects.filter(pk__in=pks).update(position=position, office=office, updated_at=now)
+
+    def sync_free_equipment(self, sheet):
+        """Свободное и списанное оборудование (как import_free_equipment_fixed)"""
+        stats = self.stats['Свободное'] = {'rows': 0, 'created': 0, 'updated': 0, 'disposed': 0}
+        upserter = self._upserter(EQUIPMENT_FIELDS + ['disposed'])
+
+        def count(results):
+            for item, created in results:
+                stats['created' if created else 'updated'] += 1
+
+        compiled = FREE.compile(sheet.header())
+        for row_num, row in self.metrics.timed(sheet.rows(width=compiled.width)):
+            with self.metrics.stage('parse'):
+                record = compiled.transform(row)
+            if record is None:
+                continue
+            stats['rows'] += 1
+            if not compiled.writable(record):
+                continue
+            serial = record['serial_number']
+            if not self._row_changed(serial, row, row_num):
+                continue
+            if record['disposed']:
+                stats['disposed'] += 1
+            defaults = model_values(record)  # employee=None: всегда свободное
+            del defaults['serial_number']
+            count(self._upsert(upserter, serial, defaults, row=row_num))
+        count(self._flush(upserter))